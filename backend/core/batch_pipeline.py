@@ -0,0 +1,255 @@
+import asyncio
+import time
+from pathlib import Path
+
+import cv2
+
+from backend.core.shared import (
+    analyze_text,
+    convert_text_segments,
+    run_ocr,
+    caption_image,
+    classify_long_batch,
+)
+from backend.core.detection import get_ensemble, detection_labels
+from backend.core.video_pipeline import run_video_pipeline
+from backend.core.executor import run_in_thread, run_stage
+from backend.core.result_cache import result_cache
+from backend.core.uploads import hash_sidecar, upload_hash
+from backend.core.config import BATCH_SIZE, CLASSIFIER_MODE
+
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v"}
+
+
+def file_type_for(path):
+    suffix = Path(path).suffix.lower()
+    if suffix in VIDEO_EXTENSIONS:
+        return "video"
+    if suffix in IMAGE_EXTENSIONS:
+        return "image"
+    return None
+
+
+# =========================================================
+# Image chunk (cross-file batching)
+# =========================================================
+async def _analyze_image_chunk(paths, enable_caption=False, classifier_mode=None,
+                               caption_tier=None, caption_budget_ms=None):
+    """
+    Runs the image pipeline on several files at once: OCR, Presidio and
+    captions run concurrently per file, YOLO and BART see the whole
+    chunk as one batch (BART: the text windows of every file).
+    Returns one result dict per path, or a ValueError for a file that
+    cannot be decoded (the other files are still analyzed).
+    """
+    images = await asyncio.gather(*[run_in_thread(cv2.imread, p) for p in paths])
+    readable = [(p, image) for p, image in zip(paths, images) if image is not None]
+
+    analyzed = iter(await _analyze_images(
+        [p for p, _ in readable], [image for _, image in readable],
+        enable_caption, classifier_mode, caption_tier, caption_budget_ms
+    ) if readable else [])
+
+    return [
+        next(analyzed) if image is not None else ValueError(f"Cannot read image: {Path(p).name}")
+        for p, image in zip(paths, images)
+    ]
+
+
+async def _analyze_images(paths, images, enable_caption, classifier_mode, caption_tier, caption_budget_ms):
+    ocr = await asyncio.gather(*[run_stage("ocr", run_ocr, p, return_regions=True) for p in paths])
+    texts = [text for text, _ in ocr]
+    segments = await asyncio.gather(*[run_stage("pii", analyze_text, t) for t in texts])
+
+    detections = await run_stage("detection", get_ensemble().detect_batch, images)
+
+    captions = [None] * len(paths)
+    if enable_caption:
+        captions = await asyncio.gather(*[
+            run_stage("caption", caption_image, p, caption_tier, caption_budget_ms) for p in paths
+        ])
+
+    results = []
+    merged = []
+    for (text, boxes), seg, dets, captioned in zip(ocr, segments, detections, captions):
+        caption = captioned.pop("caption") if captioned else ""
+        objects = detection_labels(dets)
+        merged.append(f"{text}\n{objects}\n{caption}\n{seg}")
+        results.append({
+            "text": text,
+            "textBoxes": boxes,
+            "textSeg": convert_text_segments(seg),
+            "objects": objects,
+            "detections": dets,
+            "caption": caption,
+            "caption_model": captioned,
+        })
+
+    # Long text is windowed exactly as in the image pipeline (the two
+    # share result-cache entries); windows of all files batch together
+    classifications = await run_stage("classify", classify_long_batch, merged, mode=classifier_mode)
+
+    for data, merged_text, classification in zip(results, merged, classifications):
+        data["sequence"] = merged_text
+        data["labels"] = classification["labels"]
+        data["scores"] = classification["scores"]
+        data["classifier"] = classification.get("engine")
+        data["classification_windows"] = {
+            "windows": classification["windows"],
+            "classified": classification["windows_classified"],
+            "stopped_early": classification["stopped_early"],
+        }
+
+    return results
+
+
+# =========================================================
+# Batch runner
+# =========================================================
+async def run_batch(items, enable_caption=False, classifier_mode=None, batch_size=BATCH_SIZE,
+                    caption_tier=None, caption_budget_ms=None, remove_after=()):
+    """
+    items: list of (name, path) tuples.
+    Async generator yielding one dict per file as soon as it is done,
+    then a final summary with aggregate throughput.
+
+    Paths in `remove_after` (uploaded copies) are deleted, with their
+    hash sidecars, once their line has been yielded, and any left when
+    the generator ends or is closed early.
+    """
+    remove_after = set(remove_after)
+
+    def discard(path):
+        if path in remove_after:
+            remove_after.discard(path)
+            Path(path).unlink(missing_ok=True)
+            hash_sidecar(path).unlink(missing_ok=True)
+
+    try:
+        async for line, path in _run_batch(items, enable_caption, classifier_mode, batch_size,
+                                           caption_tier, caption_budget_ms):
+            yield line
+            if path is not None:
+                await run_in_thread(discard, path)
+    finally:
+        for path in list(remove_after):
+            discard(path)
+
+
+async def _run_batch(items, enable_caption, classifier_mode, batch_size, caption_tier, caption_budget_ms):
+    # Yields (line, path of the file the line is about or None)
+    start = time.perf_counter()
+    counts = {"files": 0, "images": 0, "videos": 0, "errors": 0, "cached": 0, "skipped": 0}
+    total_bytes = 0
+
+    pending_images = []
+
+    async def lookup(name, path, file_type):
+        # Server-side files are hashed without writing sidecars next to them
+        content_hash = await run_in_thread(upload_hash, path, store=False)
+        options = {"enable_caption": enable_caption, "classifier_mode": classifier_mode or CLASSIFIER_MODE}
+        if enable_caption:
+            options.update(caption_tier=caption_tier, caption_budget_ms=caption_budget_ms)
+        if file_type == "video":
+            # No one watches partial results here; videos run in one pass
+            options["segment_seconds"] = 0.0
+        key = result_cache.make_key(content_hash, file_type, **options)
+        return key, await run_in_thread(result_cache.get, key)
+
+    async def flush_images():
+        chunk = list(pending_images)
+        pending_images.clear()
+        if not chunk:
+            return []
+
+        lines = []
+        try:
+            results = await _analyze_image_chunk(
+                [p for _, p, _ in chunk], enable_caption, classifier_mode, caption_tier, caption_budget_ms
+            )
+        except Exception:
+            # One bad file fails the whole chunk; retry one by one to isolate it
+            results = []
+            for name, path, _ in chunk:
+                try:
+                    results.extend(await _analyze_image_chunk(
+                        [path], enable_caption, classifier_mode, caption_tier, caption_budget_ms
+                    ))
+                except Exception as e:
+                    results.append(e)
+
+        for (name, path, key), data in zip(chunk, results):
+            if isinstance(data, Exception):
+                counts["errors"] += 1
+                lines.append(({"type": "error", "file": name, "file_type": "image", "message": str(data)}, path))
+                continue
+
+            await run_in_thread(result_cache.put, key, data)
+            data["cached"] = False
+            counts["images"] += 1
+            lines.append(({"type": "result", "file": name, "file_type": "image", "data": data}, path))
+        return lines
+
+    for name, path in items:
+        counts["files"] += 1
+        file_type = file_type_for(path)
+
+        if file_type is None:
+            counts["skipped"] += 1
+            yield {"type": "error", "file": name, "message": "Unsupported file type"}, path
+            continue
+
+        try:
+            total_bytes += Path(path).stat().st_size
+            key, cached = await lookup(name, path, file_type)
+        except OSError as e:
+            counts["errors"] += 1
+            yield {"type": "error", "file": name, "file_type": file_type, "message": str(e)}, path
+            continue
+
+        if cached is not None:
+            cached["cached"] = True
+            counts["cached"] += 1
+            counts[f"{file_type}s"] += 1
+            yield {"type": "result", "file": name, "file_type": file_type, "data": cached}, path
+            continue
+
+        if file_type == "image":
+            pending_images.append((name, path, key))
+            if len(pending_images) >= batch_size:
+                for line in await flush_images():
+                    yield line
+            continue
+
+        try:
+            data = await run_video_pipeline(
+                path,
+                enable_caption=enable_caption,
+                classifier_mode=classifier_mode,
+                segment_seconds=0,
+                caption_tier=caption_tier,
+                caption_budget_ms=caption_budget_ms
+            )
+            await run_in_thread(result_cache.put, key, data)
+            data["cached"] = False
+            counts["videos"] += 1
+            line = {"type": "result", "file": name, "file_type": "video", "data": data}
+        except Exception as e:
+            counts["errors"] += 1
+            line = {"type": "error", "file": name, "file_type": "video", "message": str(e)}
+        yield line, path
+
+    for line in await flush_images():
+        yield line
+
+    elapsed = time.perf_counter() - start
+    done = counts["images"] + counts["videos"]
+    yield {
+        "type": "summary",
+        **counts,
+        "seconds": round(elapsed, 3),
+        "files_per_second": round(done / elapsed, 3) if elapsed else None,
+        "mb_per_second": round(total_bytes / 1024 ** 2 / elapsed, 3) if elapsed else None,
+    }, None
@@ -0,0 +1,140 @@
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+from backend.core.metrics import Histogram, register_collector
+from backend.core.profiling import attached, current_profile
+
+
+# Seconds an item waited in the queue before its batch started
+QUEUE_DELAY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+
+
+# ==========================================================
+# Micro-batching
+# ==========================================================
+# Requests run on the inference thread pool. Instead of each thread
+# calling the model alone, they submit() their item here; a single
+# worker thread collects items that arrive within `max_wait_ms`
+# (up to `max_batch_size`) and runs the model once on the batch.
+
+_batchers = weakref.WeakSet()
+
+
+def _size_buckets(max_batch_size):
+    buckets = [1]
+    while buckets[-1] < max_batch_size:
+        buckets.append(min(buckets[-1] * 2, max_batch_size))
+    return buckets
+
+
+class MicroBatcher:
+
+    def __init__(self, batch_fn, max_batch_size=8, max_wait_ms=10, name="batcher"):
+        """
+        batch_fn: callable(list_of_items) -> list_of_results (same order)
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+        self.queue_delay = Histogram(QUEUE_DELAY_BUCKETS)
+        self.batch_sizes = Histogram(_size_buckets(self.max_batch_size))
+        _batchers.add(self)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name=self.name,
+                    daemon=True
+                )
+                self._worker.start()
+
+    def submit(self, item):
+        """
+        Blocks the calling thread until the batch containing `item`
+        has been processed and returns that item's result.
+        """
+        return self.submit_async(item).result()
+
+    def submit_async(self, item):
+        future = Future()
+        self._ensure_worker()
+        # The worker thread is sampled by the submitter's profiler, if any
+        self._queue.put((item, future, time.perf_counter(), current_profile()))
+        return future
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self.queue_depth(),
+            "queue_delay_seconds": self.queue_delay.snapshot(),
+            "batch_size": self.batch_sizes.snapshot(),
+        }
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _, _, _ in batch]
+            profiles = {profile for _, _, _, profile in batch if profile is not None}
+
+            started = time.perf_counter()
+            for _, _, submitted, _ in batch:
+                self.queue_delay.observe(started - submitted)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                with attached(*profiles):
+                    results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name}: batch_fn returned {len(results)} results for {len(items)} items"
+                    )
+            except BaseException as e:
+                for _, future, _, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _, _), result in zip(batch, results):
+                future.set_result(result)
+
+
+@register_collector
+def _batcher_metrics():
+    batchers = sorted(_batchers, key=lambda b: b.name)
+    return [
+        ("batcher_queue_depth", "gauge", "Items waiting for the next micro-batch",
+         [({"batcher": b.name}, b.queue_depth()) for b in batchers]),
+        ("batcher_queue_delay_seconds", "histogram", "Time an item waited before its batch started",
+         [({"batcher": b.name}, b.queue_delay) for b in batchers]),
+        ("batcher_batch_size", "histogram", "Items per model call",
+         [({"batcher": b.name}, b.batch_sizes) for b in batchers]),
+    ]
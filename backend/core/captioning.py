@@ -0,0 +1,126 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from backend.core.config import CAPTION_TIER, CAPTION_BUDGET_MS, CAPTION_MAX_TOKENS
+from backend.core.model_manager import MODEL_VERSIONS, get_blip, get_blip_base
+
+
+# Fastest first. expected_ms seeds latency-based selection until the
+# tier has been observed in this process.
+CAPTION_TIERS = {
+    "fast": {"model": MODEL_VERSIONS["blip"], "loader": get_blip_base, "expected_ms": 1500},
+    "detailed": {"model": MODEL_VERSIONS["blip2"], "loader": get_blip, "expected_ms": 30000},
+}
+CAPTION_TIER_NAMES = tuple(CAPTION_TIERS) + ("auto",)
+
+# Weight of the newest observation in the per-tier latency average
+LATENCY_SMOOTHING = 0.3
+
+_observed_ms = {}
+_observed_lock = threading.Lock()
+
+
+# =========================================================
+# Tier selection
+# =========================================================
+def expected_latency_ms(tier):
+    """
+    Smoothed caption latency observed for `tier`, or its prior estimate.
+    """
+    with _observed_lock:
+        return _observed_ms.get(tier, CAPTION_TIERS[tier]["expected_ms"])
+
+
+def _record_latency(tier, ms):
+    with _observed_lock:
+        previous = _observed_ms.get(tier)
+        _observed_ms[tier] = ms if previous is None else previous + LATENCY_SMOOTHING * (ms - previous)
+
+
+def select_tier(tier=None, budget_ms=None):
+    """
+    Resolves a requested tier. A budget without a tier means "auto",
+    which picks the most detailed tier expected to finish within the
+    budget (the fastest tier when none does).
+    """
+    if tier is None:
+        tier = "auto" if budget_ms is not None else CAPTION_TIER
+
+    if tier not in CAPTION_TIER_NAMES:
+        raise ValueError(f"Unknown caption tier: {tier} (expected one of {CAPTION_TIER_NAMES})")
+
+    if tier != "auto":
+        return tier
+
+    budget_ms = CAPTION_BUDGET_MS if budget_ms is None else budget_ms
+    fitting = [t for t in CAPTION_TIERS if expected_latency_ms(t) <= budget_ms]
+    return fitting[-1] if fitting else next(iter(CAPTION_TIERS))
+
+
+# =========================================================
+# Captioning
+# =========================================================
+def _to_rgb(image):
+    """
+    Accepts an image path or an in-memory BGR array.
+    """
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    return Image.open(image).convert("RGB")
+
+
+def caption_image(image, tier=None, budget_ms=None, max_tokens=CAPTION_MAX_TOKENS):
+    """
+    Captions an image path or BGR array with the selected tier.
+
+    Returns {"caption", "tier", "model", "ms"}.
+    """
+    tier = select_tier(tier, budget_ms)
+    processor, model = CAPTION_TIERS[tier]["loader"]()
+
+    start = time.perf_counter()
+    # pixel_values follow the model's weights (fp32 or bf16)
+    inputs = processor(images=_to_rgb(image), return_tensors="pt").to(dtype=model.dtype)
+    ids = model.generate(**inputs, max_new_tokens=max_tokens)
+    caption = processor.decode(ids[0], skip_special_tokens=True).strip()
+    ms = (time.perf_counter() - start) * 1000.0
+
+    _record_latency(tier, ms)
+
+    return {
+        "caption": caption,
+        "tier": tier,
+        "model": CAPTION_TIERS[tier]["model"],
+        "ms": round(ms, 1),
+    }
+
+
+def warm_up(tier=None, max_tokens=5):
+    """
+    Runs one short caption through `tier` (default CAPTION_TIER) without
+    recording its latency: a cold first call would skew tier selection.
+    """
+    tier = select_tier(tier)
+    processor, model = CAPTION_TIERS[tier]["loader"]()
+    image = Image.new("RGB", (384, 384), "white")
+
+    inputs = processor(images=image, return_tensors="pt").to(dtype=model.dtype)
+    model.generate(**inputs, max_new_tokens=max_tokens)
+
+
+def caption_stats():
+    """
+    Expected latency per tier (observed or prior), for /stats.
+    """
+    return {
+        tier: {
+            "model": spec["model"],
+            "expected_ms": round(expected_latency_ms(tier), 1),
+            "observed": tier in _observed_ms,
+        }
+        for tier, spec in CAPTION_TIERS.items()
+    }
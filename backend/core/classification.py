@@ -0,0 +1,367 @@
+import threading
+
+from backend.core.batching import MicroBatcher
+from backend.core.config import (
+    CLASSIFY_MAX_BATCH,
+    CLASSIFY_MAX_WAIT_MS,
+    CLASSIFIER_MODE,
+    EMBED_FALLBACK_MARGIN,
+    CLASSIFY_WINDOW_TOKENS,
+    CLASSIFY_WINDOW_OVERLAP,
+    CLASSIFY_AGGREGATE,
+    CLASSIFY_EARLY_STOP,
+    VIDEO_PROVISIONAL_CLASSIFIER,
+)
+from backend.core.model_manager import get_classifier, get_embedder
+from backend.core.embedding_classifier import (
+    MAX_TOKENS as EMBED_MAX_TOKENS,
+    embedding_classify_batch,
+    label_vectors,
+    tokenizer_lock as _embed_tokenizer_lock,
+)
+
+
+CANDIDATE_LABELS = [
+    "identity information such as a person's name, ID badge or face",
+    "financial information such as bank details or payment cards",
+    "medical or health information",
+    "contact information such as phone number or email",
+    "location or address information",
+    "vehicle information such as license plate numbers",
+    "digital screen content showing private messages",
+    "non-sensitive public information"
+]
+NON_SENSITIVE_LABEL = CANDIDATE_LABELS[-1]
+
+# "nli": BART zero-shot (one forward pass per label)
+# "embedding": one sentence embedding compared to cached label vectors,
+#              falling back to NLI when the top-two margin is small
+CLASSIFIER_MODES = ("nli", "embedding")
+PROVISIONAL_CLASSIFIERS = ("embedding", "request", "off")
+
+
+# =========================================================
+# Zero-shot classification (BART-MNLI)
+# =========================================================
+# The zero-shot pipeline and its fast tokenizer are not thread-safe.
+# The batcher thread, windowed / batch classification and the NLI
+# fallback all call them, so every pipeline call and every use of its
+# tokenizer (split_windows) holds this lock.
+_nli_lock = threading.Lock()
+
+
+class _LockedTokenizer:
+    # A shared tokenizer that is only called under `lock`
+
+    def __init__(self, tokenizer, lock):
+        self.tokenizer = tokenizer
+        self.lock = lock
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            return self.tokenizer(*args, **kwargs)
+
+
+def _nli_classify_batch(texts, batch_size=None, precision=None):
+    """
+    Classifies several texts in one pipeline call. Every text expands to
+    one premise/hypothesis pair per label; all pairs go through the
+    model as padded batches. Returns one result dict per text, in order.
+    precision defaults to BART_PRECISION.
+    """
+    if not texts:
+        return []
+
+    texts = list(texts)
+    if batch_size is None:
+        batch_size = len(texts)
+
+    classifier = get_classifier(precision)
+    with _nli_lock:
+        results = classifier(
+            texts,
+            candidate_labels=CANDIDATE_LABELS,
+            batch_size=batch_size * len(CANDIDATE_LABELS)
+        )
+    results = results if isinstance(results, list) else [results]
+    return [dict(r, engine="nli") for r in results]
+
+
+# Requests arriving within CLASSIFY_MAX_WAIT_MS of each other are
+# classified together (up to CLASSIFY_MAX_BATCH texts per batch)
+_batcher = MicroBatcher(
+    _nli_classify_batch,
+    max_batch_size=CLASSIFY_MAX_BATCH,
+    max_wait_ms=CLASSIFY_MAX_WAIT_MS,
+    name="classifier-batcher"
+)
+
+
+def classifier_batch_stats():
+    """
+    Queueing delay and batch-size histograms of the classifier batcher.
+    """
+    return _batcher.stats()
+
+
+# =========================================================
+# Embedding classification (fast mode)
+# =========================================================
+def _with_fallback(result, nli_result):
+    return dict(nli_result, engine="nli-fallback", margin=result["margin"])
+
+
+def _embedding_classify_batch(texts, batch_size=None, fallback_margin=None):
+    results = embedding_classify_batch(list(texts), CANDIDATE_LABELS)
+    fallback_margin = EMBED_FALLBACK_MARGIN if fallback_margin is None else fallback_margin
+
+    if fallback_margin <= 0:
+        return [dict(r, engine="embedding") for r in results]
+
+    # Ambiguous texts (small top-two margin) go through BART instead
+    unsure = [i for i, r in enumerate(results) if r["margin"] < fallback_margin]
+    fallbacks = _nli_classify_batch([texts[i] for i in unsure], batch_size) if unsure else []
+
+    merged = [dict(r, engine="embedding") for r in results]
+    for i, nli_result in zip(unsure, fallbacks):
+        merged[i] = _with_fallback(results[i], nli_result)
+    return merged
+
+
+# =========================================================
+# Public API
+# =========================================================
+def _resolve_mode(mode):
+    mode = mode or CLASSIFIER_MODE
+    if mode not in CLASSIFIER_MODES:
+        raise ValueError(f"Unknown classifier mode: {mode} (expected one of {CLASSIFIER_MODES})")
+    return mode
+
+
+def classify(text, mode=None, fallback_margin=None):
+    """
+    Classifies one text with the given engine (default CLASSIFIER_MODE).
+    The result carries "engine": nli, embedding or nli-fallback.
+    fallback_margin overrides EMBED_FALLBACK_MARGIN (0 = never BART).
+    """
+    mode = _resolve_mode(mode)
+
+    if mode == "embedding":
+        result = embedding_classify_batch([text], CANDIDATE_LABELS)[0]
+        fallback_margin = EMBED_FALLBACK_MARGIN if fallback_margin is None else fallback_margin
+        if result["margin"] < fallback_margin:
+            return _with_fallback(result, _batcher.submit(text))
+        return dict(result, engine="embedding")
+
+    return _batcher.submit(text)
+
+
+def classify_batch(texts, batch_size=None, mode=None, fallback_margin=None):
+    """
+    Classifies several texts at once. Returns one result per text, in order.
+    """
+    mode = _resolve_mode(mode)
+
+    if mode == "embedding":
+        return _embedding_classify_batch(list(texts), batch_size, fallback_margin)
+    return _nli_classify_batch(texts, batch_size)
+
+
+# =========================================================
+# Long text: token-budgeted windows
+# =========================================================
+def _tokenizer_for(mode):
+    if mode == "embedding":
+        tokenizer, _ = get_embedder()
+        return _LockedTokenizer(tokenizer, _embed_tokenizer_lock)
+    return _LockedTokenizer(get_classifier().tokenizer, _nli_lock)
+
+
+def split_windows(text, tokenizer, window_tokens=CLASSIFY_WINDOW_TOKENS,
+                  overlap=CLASSIFY_WINDOW_OVERLAP):
+    """
+    Splits text into windows of at most `window_tokens` tokens that
+    overlap by `overlap` tokens. Windows are slices of the original
+    text (via token offsets), so nothing is lost to decoding.
+    """
+    encoding = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        truncation=False
+    )
+    offsets = encoding["offset_mapping"]
+
+    if len(offsets) <= window_tokens:
+        return [text]
+
+    step = max(1, window_tokens - overlap)
+    windows = []
+    for start in range(0, len(offsets), step):
+        end = min(start + window_tokens, len(offsets))
+        windows.append(text[offsets[start][0]:offsets[end - 1][1]])
+        if end == len(offsets):
+            break
+
+    return windows
+
+
+def aggregate_results(window_results, how=CLASSIFY_AGGREGATE):
+    """
+    Combines classifications of parts of one input (text windows,
+    video segments) into one (labels, scores) ranking.
+    """
+    per_label = {label: [] for label in CANDIDATE_LABELS}
+    for result in window_results:
+        for label, score in zip(result["labels"], result["scores"]):
+            per_label[label].append(score)
+
+    if how == "mean":
+        scores = {label: sum(v) / len(v) for label, v in per_label.items() if v}
+    else:
+        scores = {label: max(v) for label, v in per_label.items() if v}
+
+    ordered = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    return [label for label, _ in ordered], [float(score) for _, score in ordered]
+
+
+def _reached_early_stop(results, early_stop):
+    # A sensitive label scored at least `early_stop` in one of the windows
+    return early_stop > 0 and any(
+        label != NON_SENSITIVE_LABEL and score >= early_stop
+        for r in results
+        for label, score in zip(r["labels"], r["scores"])
+    )
+
+
+def _long_result(text, windows, window_results, aggregate, stopped_early):
+    labels, scores = aggregate_results(window_results, aggregate)
+    engines = {r.get("engine") for r in window_results}
+    engine = engines.pop() if len(engines) == 1 else "+".join(sorted(e for e in engines if e))
+
+    return {
+        "sequence": text,
+        "labels": labels,
+        "scores": scores,
+        "engine": engine,
+        "aggregate": aggregate,
+        "windows": len(windows),
+        "windows_classified": len(window_results),
+        "stopped_early": stopped_early,
+    }
+
+
+def classify_long(text, mode=None, window_tokens=CLASSIFY_WINDOW_TOKENS,
+                  aggregate=CLASSIFY_AGGREGATE, early_stop=CLASSIFY_EARLY_STOP,
+                  windows_per_batch=CLASSIFY_MAX_BATCH, fallback_margin=None):
+    """
+    Classifies text of any length. Short text goes through classify();
+    long text is split into token-budgeted windows that are classified
+    in batches, and per-label scores are aggregated ("max" or "mean").
+
+    Stops early once a sensitive label reaches `early_stop` in some
+    window (0 disables early stopping).
+    """
+    mode = _resolve_mode(mode)
+    if mode == "embedding":
+        window_tokens = min(window_tokens, EMBED_MAX_TOKENS)
+    windows = split_windows(text, _tokenizer_for(mode), window_tokens)
+
+    if len(windows) == 1:
+        return dict(classify(text, mode=mode, fallback_margin=fallback_margin),
+                    windows=1, windows_classified=1, stopped_early=False)
+
+    window_results = []
+    stopped_early = False
+
+    for start in range(0, len(windows), windows_per_batch):
+        batch = windows[start:start + windows_per_batch]
+        results = classify_batch(batch, len(batch), mode=mode, fallback_margin=fallback_margin)
+        window_results.extend(results)
+
+        if _reached_early_stop(results, early_stop):
+            stopped_early = start + windows_per_batch < len(windows)
+            break
+
+    return _long_result(text, windows, window_results, aggregate, stopped_early)
+
+
+def classify_long_batch(texts, mode=None, window_tokens=CLASSIFY_WINDOW_TOKENS,
+                        aggregate=CLASSIFY_AGGREGATE, early_stop=CLASSIFY_EARLY_STOP,
+                        windows_per_batch=CLASSIFY_MAX_BATCH):
+    """
+    classify_long() for several texts at once. Each round classifies the
+    next `windows_per_batch` windows of every text that has not finished
+    (or stopped early) in one classify_batch() call, so every text gets
+    the same windows, aggregation and result fields as classify_long().
+    """
+    texts = list(texts)
+    mode = _resolve_mode(mode)
+    if mode == "embedding":
+        window_tokens = min(window_tokens, EMBED_MAX_TOKENS)
+    tokenizer = _tokenizer_for(mode)
+    windows = [split_windows(t, tokenizer, window_tokens) for t in texts]
+
+    window_results = [[] for _ in texts]
+    stopped_early = [False] * len(texts)
+    running = list(range(len(texts)))
+
+    for start in range(0, max((len(w) for w in windows), default=0), windows_per_batch):
+        if not running:
+            break
+
+        batch, owners = [], []
+        for i in running:
+            part = windows[i][start:start + windows_per_batch]
+            batch.extend(part)
+            owners.extend([i] * len(part))
+
+        # Same model batch size as classifying the texts unwindowed
+        results = classify_batch(batch, len(texts), mode=mode)
+        round_results = {i: [] for i in running}
+        for i, result in zip(owners, results):
+            round_results[i].append(result)
+            window_results[i].append(result)
+
+        still_running = []
+        for i in running:
+            more = start + windows_per_batch < len(windows[i])
+            if len(windows[i]) > 1 and _reached_early_stop(round_results[i], early_stop):
+                stopped_early[i] = more
+            elif more:
+                still_running.append(i)
+        running = still_running
+
+    return [
+        dict(results[0], windows=1, windows_classified=1, stopped_early=False)
+        if len(text_windows) == 1
+        else _long_result(text, text_windows, results, aggregate, stopped)
+        for text, text_windows, results, stopped in zip(texts, windows, window_results, stopped_early)
+    ]
+
+
+def classify_provisional(text, mode=None, provisional=VIDEO_PROVISIONAL_CLASSIFIER):
+    """
+    Labels for partial input (one video segment) whose final
+    classification runs later anyway. "embedding" never calls BART,
+    "request" classifies like classify_long(text, mode), "off" returns
+    None.
+    """
+    if provisional not in PROVISIONAL_CLASSIFIERS:
+        raise ValueError(f"Unknown provisional classifier: {provisional} "
+                         f"(expected one of {PROVISIONAL_CLASSIFIERS})")
+
+    if provisional == "off":
+        return None
+    if provisional == "embedding":
+        return classify_long(text, mode="embedding", fallback_margin=0)
+    return classify_long(text, mode=mode)
+
+
+def prepare_classifier(mode=None):
+    """
+    Startup hook: computes (or loads from disk) the label vectors
+    when the embedding engine is the default or labels video segments.
+    """
+    if _resolve_mode(mode) == "embedding" or VIDEO_PROVISIONAL_CLASSIFIER == "embedding":
+        label_vectors(CANDIDATE_LABELS)
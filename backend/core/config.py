@@ -0,0 +1,243 @@
+import os
+
+
+# ==========================================================
+# Runtime settings (override with environment variables)
+# ==========================================================
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return float(value)
+
+
+# ==========================================================
+# Execution layer
+# ==========================================================
+
+# Threads used for blocking inference stages (OCR, YOLO, BART, BLIP2).
+# torch / cv2 / tesseract release the GIL, so threads scale here.
+INFERENCE_THREADS = _env_int("INFERENCE_THREADS", max(2, min(4, os.cpu_count() or 1)))
+
+# Processes used for pure-CPU python work (Presidio on large text).
+CPU_PROCESSES = _env_int("CPU_PROCESSES", max(1, min(4, (os.cpu_count() or 1) // 2)))
+
+
+# ==========================================================
+# Model registry
+# ==========================================================
+
+# Resident-weight budget for loaded models, in MB. Least recently
+# used models are unloaded beyond it. 0 disables eviction.
+MODEL_RAM_BUDGET_MB = _env_int("MODEL_RAM_BUDGET_MB", 0)
+
+# Load the models the default settings use at startup (1) instead of
+# on first use (0), with this many models downloaded / loaded at once
+PRELOAD_MODELS = _env_int("PRELOAD_MODELS", 1) == 1
+MODEL_LOAD_WORKERS = _env_int("MODEL_LOAD_WORKERS", max(1, min(4, os.cpu_count() or 1)))
+# Run a synthetic input through every loaded model before /readyz
+# reports ready (the first call into a model is much slower)
+WARMUP = _env_int("WARMUP", 1) == 1
+
+# Weight precision: "fp32", "bf16" or "int8" (dynamic quantization of
+# Linear layers). Converted weights are cached under MODELS_DIR/precision.
+MODEL_PRECISION = os.getenv("MODEL_PRECISION", "fp32")
+BART_PRECISION = os.getenv("BART_PRECISION", MODEL_PRECISION)
+BLIP2_PRECISION = os.getenv("BLIP2_PRECISION", MODEL_PRECISION)
+YOLO_PRECISION = os.getenv("YOLO_PRECISION", MODEL_PRECISION)
+
+
+# ==========================================================
+# Inference backend
+# ==========================================================
+
+# "torch" or "onnx" (ONNX Runtime, CPU). BART-MNLI and the YOLO
+# checkpoints are exported once to MODELS_DIR/onnx; ONNX graphs run
+# in fp32 (the *_PRECISION settings apply to the torch backend).
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+BART_BACKEND = os.getenv("BART_BACKEND", INFERENCE_BACKEND)
+YOLO_BACKEND = os.getenv("YOLO_BACKEND", INFERENCE_BACKEND)
+# Graph optimization level: "disable", "basic", "extended" or "all"
+ONNX_GRAPH_OPT = os.getenv("ONNX_GRAPH_OPT", "all")
+# Threads inside one operator, per session. INFERENCE_THREADS requests
+# run sessions concurrently, so the default splits the cores between them.
+ONNX_INTRA_OP_THREADS = _env_int("ONNX_INTRA_OP_THREADS", max(1, (os.cpu_count() or 1) // INFERENCE_THREADS))
+# Threads running independent graph branches (1 = sequential execution)
+ONNX_INTER_OP_THREADS = _env_int("ONNX_INTER_OP_THREADS", 1)
+ONNX_OPSET = _env_int("ONNX_OPSET", 17)
+
+
+# ==========================================================
+# Object detection (YOLO ensemble)
+# ==========================================================
+
+YOLO_IMGSZ = _env_int("YOLO_IMGSZ", 640)
+YOLO_CONF = _env_float("YOLO_CONF", 0.5)
+# Same-label boxes from different models above this IoU are merged
+YOLO_MERGE_IOU = _env_float("YOLO_MERGE_IOU", 0.5)
+# Images from concurrent requests are batched into one predict call
+YOLO_BATCH_SIZE = _env_int("YOLO_BATCH_SIZE", 8)
+YOLO_BATCH_WAIT_MS = _env_int("YOLO_BATCH_WAIT_MS", 10)
+# Checkpoints used on sampled video frames (comma separated)
+VIDEO_YOLO_MODELS = [
+    m.strip() for m in os.getenv("VIDEO_YOLO_MODELS", "yolov8x-oiv7.pt").split(",") if m.strip()
+]
+# Detect on every Nth keyframe of a video
+VIDEO_DETECT_STRIDE = _env_int("VIDEO_DETECT_STRIDE", 5)
+# Videos are analyzed in segments of this many seconds, with partial
+# results emitted after each one (0 = whole video in one pass)
+VIDEO_SEGMENT_SECONDS = _env_float("VIDEO_SEGMENT_SECONDS", 10.0)
+# Labels sent with each segment's partial results: "embedding" (MiniLM
+# only, no BART fallback; cheap), "request" (the request's classifier,
+# i.e. one more BART pass per segment in nli mode) or "off". The final
+# classification always uses the request's classifier.
+VIDEO_PROVISIONAL_CLASSIFIER = os.getenv("VIDEO_PROVISIONAL_CLASSIFIER", "embedding")
+
+
+# ==========================================================
+# OCR
+# ==========================================================
+
+# Skip OCR for video frames that are near-duplicates of the last
+# OCR'd frame (16x16 difference hash, max differing bits of 256).
+OCR_DEDUP = _env_int("OCR_DEDUP", 1) == 1
+OCR_DEDUP_MAX_DISTANCE = _env_int("OCR_DEDUP_MAX_DISTANCE", 12)
+
+
+# ==========================================================
+# Captioning
+# ==========================================================
+
+# "fast" (BLIP base, about a second on CPU), "detailed" (BLIP2-opt-2.7b,
+# tens of seconds and several GB of RAM) or "auto": the most detailed
+# tier whose observed latency fits CAPTION_BUDGET_MS. Can be overridden
+# per request with "caption_tier" / "caption_budget_ms".
+CAPTION_TIER = os.getenv("CAPTION_TIER", "fast")
+CAPTION_BUDGET_MS = _env_int("CAPTION_BUDGET_MS", 3000)
+CAPTION_MAX_TOKENS = _env_int("CAPTION_MAX_TOKENS", 50)
+
+
+# ==========================================================
+# Keyframes
+# ==========================================================
+
+# "fast": score downscaled thumbnails; "compat": full resolution,
+# same keyframes as the original extractor.
+KEYFRAME_MODE = os.getenv("KEYFRAME_MODE", "fast")
+KEYFRAME_THUMB_WIDTH = _env_int("KEYFRAME_THUMB_WIDTH", 320)
+# Keyframes stay in memory up to this many MB per video, then spill
+# to a temp dir (lossless .npy). 0 keeps everything in memory.
+KEYFRAME_SPILL_MB = _env_int("KEYFRAME_SPILL_MB", 512)
+
+
+# ==========================================================
+# Result cache
+# ==========================================================
+
+RESULT_CACHE_ENABLED = _env_int("RESULT_CACHE_ENABLED", 1) == 1
+RESULT_CACHE_MAX_MB = _env_int("RESULT_CACHE_MAX_MB", 512)
+RESULT_CACHE_TTL_HOURS = _env_int("RESULT_CACHE_TTL_HOURS", 24 * 7)
+
+
+# ==========================================================
+# Batch analysis
+# ==========================================================
+
+# Images analyzed together (one YOLO / BART batch)
+BATCH_SIZE = _env_int("BATCH_SIZE", 8)
+# Server-side directory that /batch/analyze may read from
+# ("directory" / "manifest" inputs). Empty disables server-side paths.
+BATCH_ROOT = os.getenv("BATCH_ROOT", "")
+
+
+# ==========================================================
+# Uploads
+# ==========================================================
+
+# Largest accepted upload (0 = no limit)
+UPLOAD_MAX_MB = _env_int("UPLOAD_MAX_MB", 4096)
+# Unfinished resumable uploads older than this are deleted
+UPLOAD_PARTIAL_TTL_HOURS = _env_int("UPLOAD_PARTIAL_TTL_HOURS", 48)
+
+
+# ==========================================================
+# Classification
+# ==========================================================
+
+# Concurrent classify() calls are micro-batched: up to this many texts
+# per forward batch, waiting at most this long for more to arrive.
+CLASSIFY_MAX_BATCH = _env_int("CLASSIFY_MAX_BATCH", 4)
+CLASSIFY_MAX_WAIT_MS = _env_int("CLASSIFY_MAX_WAIT_MS", 15)
+
+# Default engine: "nli" (BART zero-shot) or "embedding" (label-vector
+# similarity). Can be overridden per request with "classifier_mode".
+CLASSIFIER_MODE = os.getenv("CLASSIFIER_MODE", "nli")
+# Embedding mode falls back to NLI when the cosine gap between the two
+# best labels is below this value (0 disables the fallback)
+EMBED_FALLBACK_MARGIN = _env_float("EMBED_FALLBACK_MARGIN", 0.02)
+
+# Long text is classified in windows of this many tokens (with overlap)
+# and per-label scores are aggregated with "max" or "mean". Scanning
+# stops once a sensitive label reaches CLASSIFY_EARLY_STOP (0 = never).
+CLASSIFY_WINDOW_TOKENS = _env_int("CLASSIFY_WINDOW_TOKENS", 400)
+CLASSIFY_WINDOW_OVERLAP = _env_int("CLASSIFY_WINDOW_OVERLAP", 32)
+CLASSIFY_AGGREGATE = os.getenv("CLASSIFY_AGGREGATE", "max")
+CLASSIFY_EARLY_STOP = _env_float("CLASSIFY_EARLY_STOP", 0.9)
+
+
+# ==========================================================
+# PII analysis (Presidio)
+# ==========================================================
+
+def _env_list(name: str) -> list:
+    return [v.strip() for v in os.getenv(name, "").split(",") if v.strip()]
+
+
+# Text longer than this is split on line boundaries and analyzed in
+# parallel on the CPU process pool (PII_PARALLEL=0 keeps it inline)
+PII_CHUNK_CHARS = _env_int("PII_CHUNK_CHARS", 4000)
+PII_PARALLEL = _env_int("PII_PARALLEL", 1) == 1
+# Allow-lists (comma separated); empty = Presidio defaults. When they
+# leave out every NER-based recognizer (SpacyRecognizer) / entity
+# (PERSON, LOCATION, NRP, DATE_TIME, ORGANIZATION), spaCy runs without
+# its NER and parser; otherwise the full spaCy pipeline runs on every
+# chunk.
+PII_RECOGNIZERS = _env_list("PII_RECOGNIZERS")   # e.g. CreditCardRecognizer,EmailRecognizer
+PII_ENTITIES = _env_list("PII_ENTITIES")         # e.g. CREDIT_CARD,EMAIL_ADDRESS,PHONE_NUMBER
+
+# "auto" (tesserocr if installed, else pytesseract), "tesserocr"
+# (in-process, long-lived workers) or "pytesseract" (process per call)
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto")
+OCR_WORKERS = _env_int("OCR_WORKERS", 2)
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+
+# Text-region detection (EAST) ahead of OCR; only detected regions are
+# OCR'd and frames without text skip OCR. Falls back to full-frame OCR
+# when disabled or when the EAST model file is missing.
+TEXT_DETECT = _env_int("TEXT_DETECT", 1) == 1
+TEXT_DETECT_SIZE = _env_int("TEXT_DETECT_SIZE", 640)        # long side, rounded to a multiple of 32
+TEXT_DETECT_CONF = _env_float("TEXT_DETECT_CONF", 0.5)
+TEXT_DETECT_NMS = _env_float("TEXT_DETECT_NMS", 0.4)
+TEXT_REGION_PAD = _env_int("TEXT_REGION_PAD", 4)            # pixels added around each region
+TEXT_FULL_PAGE_RATIO = _env_float("TEXT_FULL_PAGE_RATIO", 0.5)  # regions covering more than this -> OCR the whole page
+
+
+# ==========================================================
+# Profiling
+# ==========================================================
+
+# Fraction of /ws/analyze jobs profiled without being asked
+# ({"profile": true} in the request always profiles). 0 disables.
+PROFILE_SAMPLE_RATE = _env_float("PROFILE_SAMPLE_RATE", 0.0)
+# Stack sampling interval of the profiler
+PROFILE_INTERVAL_MS = _env_float("PROFILE_INTERVAL_MS", 5.0)
+# Stored profiles beyond this many are deleted, oldest first (0 = keep all)
+PROFILE_KEEP = _env_int("PROFILE_KEEP", 200)
@@ -0,0 +1,253 @@
+import threading
+from contextlib import nullcontext
+
+import cv2
+import numpy as np
+import torch
+
+from backend.core.batching import MicroBatcher
+from backend.core.config import (
+    YOLO_IMGSZ,
+    YOLO_CONF,
+    YOLO_MERGE_IOU,
+    YOLO_BATCH_SIZE,
+    YOLO_BATCH_WAIT_MS,
+    YOLO_PRECISION,
+    YOLO_BACKEND,
+    VIDEO_YOLO_MODELS,
+)
+from backend.core.model_manager import YOLO_MODEL_FILES, get_yolo
+
+
+# Ultralytics predictors are not thread-safe, and the image and video
+# ensembles (and batch jobs) share checkpoints, so predict() on one
+# torch model runs one call at a time. ONNX Runtime sessions are safe
+# to call concurrently.
+_predict_locks = {}
+_predict_locks_guard = threading.Lock()
+
+
+def _predict_lock(name, precision, backend):
+    if backend == "onnx":
+        return nullcontext()
+
+    with _predict_locks_guard:
+        return _predict_locks.setdefault((name, precision), threading.Lock())
+
+
+# =========================================================
+# Shared preprocessing
+# =========================================================
+def letterbox(img, size=640, color=(114, 114, 114)):
+    """
+    Resizes a BGR image to fit a size x size square (keeping aspect
+    ratio) and pads the rest. Returns (padded, ratio, (pad_x, pad_y)).
+    """
+    h, w = img.shape[:2]
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+
+    if (new_w, new_h) != (w, h):
+        img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    pad_x = (size - new_w) // 2
+    pad_y = (size - new_h) // 2
+
+    padded = cv2.copyMakeBorder(
+        img,
+        pad_y, size - new_h - pad_y,
+        pad_x, size - new_w - pad_x,
+        cv2.BORDER_CONSTANT,
+        value=color
+    )
+    return padded, ratio, (pad_x, pad_y)
+
+
+def preprocess_batch(images, size=640):
+    """
+    BGR uint8 images -> one float RGB tensor (B, 3, size, size) in [0, 1]
+    plus the letterbox metadata needed to map boxes back.
+    """
+    tensors = []
+    metas = []
+
+    for img in images:
+        padded, ratio, pad = letterbox(img, size)
+        rgb = cv2.cvtColor(padded, cv2.COLOR_BGR2RGB)
+        tensors.append(np.ascontiguousarray(rgb.transpose(2, 0, 1)))
+        metas.append((ratio, pad, img.shape[:2]))
+
+    batch = torch.from_numpy(np.stack(tensors)).float().div_(255.0)
+    return batch, metas
+
+
+def _unletterbox(xyxy, meta):
+    ratio, (pad_x, pad_y), (h, w) = meta
+    x1 = (xyxy[0] - pad_x) / ratio
+    y1 = (xyxy[1] - pad_y) / ratio
+    x2 = (xyxy[2] - pad_x) / ratio
+    y2 = (xyxy[3] - pad_y) / ratio
+    return [
+        float(min(max(x1, 0), w)),
+        float(min(max(y1, 0), h)),
+        float(min(max(x2, 0), w)),
+        float(min(max(y2, 0), h)),
+    ]
+
+
+def _iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / (area_a + area_b - inter)
+
+
+def merge_detections(detections, iou_threshold=0.5):
+    """
+    Merges detections of the same label from different models that
+    overlap by at least `iou_threshold`. Each merged detection keeps
+    the highest confidence and the list of models that found it.
+    """
+    merged = []
+
+    for det in sorted(detections, key=lambda d: d["confidence"], reverse=True):
+        for m in merged:
+            if m["label"] == det["label"] and _iou(m["box"], det["box"]) >= iou_threshold:
+                if det["model"] not in m["models"]:
+                    m["models"].append(det["model"])
+                break
+        else:
+            merged.append({
+                "label": det["label"],
+                "confidence": det["confidence"],
+                "box": det["box"],
+                "models": [det["model"]],
+            })
+
+    return merged
+
+
+# =========================================================
+# YOLO ensemble
+# =========================================================
+class YoloEnsemble:
+    """
+    Runs several YOLO checkpoints on one preprocessed tensor.
+
+    Images are letterboxed and normalized once per batch, every model
+    predicts on that same tensor, and boxes are mapped back to the
+    original image. Nothing is drawn on the input images.
+    """
+
+    def __init__(self,
+                 model_names=None,
+                 imgsz=YOLO_IMGSZ,
+                 conf=YOLO_CONF,
+                 merge_iou=YOLO_MERGE_IOU,
+                 max_batch_size=YOLO_BATCH_SIZE,
+                 max_wait_ms=YOLO_BATCH_WAIT_MS,
+                 precision=YOLO_PRECISION,
+                 backend=YOLO_BACKEND,
+                 name="yolo-batcher"):
+        self.model_names = list(model_names or YOLO_MODEL_FILES)
+        self.precision = precision
+        self.backend = backend
+        self.imgsz = imgsz
+        self.conf = conf
+        self.merge_iou = merge_iou
+        self.max_batch_size = max_batch_size
+
+        # Collects images from concurrent requests into one predict call
+        self._batcher = MicroBatcher(
+            self.detect_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name=name
+        )
+
+    def detect_batch(self, images, conf=None):
+        """
+        images: list of BGR numpy arrays.
+        conf: confidence threshold for this call (default self.conf).
+        returns: one list of merged detections per image.
+        """
+        if not images:
+            return []
+
+        conf = self.conf if conf is None else conf
+
+        raw = [[] for _ in images]
+
+        for start in range(0, len(images), self.max_batch_size):
+            chunk = images[start:start + self.max_batch_size]
+            tensor, metas = preprocess_batch(chunk, self.imgsz)
+
+            for name in self.model_names:
+                model = get_yolo(name, self.precision, self.backend)
+                with _predict_lock(name, self.precision, self.backend):
+                    results = model.predict(tensor, conf=conf, imgsz=self.imgsz, verbose=False)
+
+                for offset, result in enumerate(results):
+                    if result.boxes is None:
+                        continue
+
+                    meta = metas[offset]
+                    xyxy = result.boxes.xyxy.cpu().numpy()
+                    confs = result.boxes.conf.cpu().numpy()
+                    classes = result.boxes.cls.cpu().numpy()
+
+                    for box, score, cls in zip(xyxy, confs, classes):
+                        raw[start + offset].append({
+                            "label": result.names[int(cls)].strip().lower(),
+                            "confidence": round(float(score), 4),
+                            "box": _unletterbox(box, meta),
+                            "model": name,
+                        })
+
+        return [merge_detections(dets, self.merge_iou) for dets in raw]
+
+    def detect(self, image):
+        """
+        Detects objects in one BGR image, batched together with
+        images submitted by other requests at the same time.
+        """
+        return self._batcher.submit(image)
+
+    def batch_stats(self):
+        return self._batcher.stats()
+
+
+_ensemble = None
+_video_ensemble = None
+_ensembles_lock = threading.Lock()
+
+
+def get_ensemble():
+    global _ensemble
+
+    with _ensembles_lock:
+        if _ensemble is None:
+            _ensemble = YoloEnsemble()
+
+    return _ensemble
+
+
+def get_video_ensemble():
+    """
+    The VIDEO_YOLO_MODELS ensemble used on sampled video frames.
+    """
+    global _video_ensemble
+
+    with _ensembles_lock:
+        if _video_ensemble is None:
+            _video_ensemble = YoloEnsemble(model_names=VIDEO_YOLO_MODELS, name="video-yolo-batcher")
+
+    return _video_ensemble
+
+
+def detection_labels(detections):
+    return sorted({d["label"] for d in detections})
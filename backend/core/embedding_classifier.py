@@ -0,0 +1,128 @@
+import hashlib
+import threading
+
+import numpy as np
+import torch
+
+from backend.core.model_manager import MODELS_DIR, EMBEDDER_MODEL_NAME, get_embedder
+
+
+LABEL_CACHE_DIR = MODELS_DIR / "label_embeddings"
+
+# Longest input (tokens) the embedder sees; longer text is truncated
+MAX_TOKENS = 256
+
+# Cosine similarities are sharpened into label scores with this temperature
+SCORE_TEMPERATURE = 0.05
+
+
+# =========================================================
+# Sentence embeddings
+# =========================================================
+# Fast (Rust) tokenizers raise "Already borrowed" when one instance is
+# used from several threads at once; every use of the embedder's
+# tokenizer holds this lock.
+tokenizer_lock = threading.Lock()
+
+
+def encode(texts, max_length=MAX_TOKENS, batch_size=32):
+    """
+    Mean-pooled, L2-normalized sentence embeddings, shape (len(texts), dim).
+    """
+    tokenizer, model = get_embedder()
+    vectors = []
+
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        with tokenizer_lock:
+            inputs = tokenizer(
+                chunk,
+                padding=True,
+                truncation=True,
+                max_length=max_length,
+                return_tensors="pt"
+            )
+
+        with torch.inference_mode():
+            hidden = model(**inputs).last_hidden_state
+
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+        vectors.append(pooled.float().cpu().numpy())
+
+    return np.concatenate(vectors, axis=0)
+
+
+# =========================================================
+# Label vectors (computed once, cached on disk)
+# =========================================================
+_label_vectors = {}
+_label_lock = threading.Lock()
+
+
+def _label_cache_path(labels):
+    digest = hashlib.sha256(
+        "\n".join([EMBEDDER_MODEL_NAME] + list(labels)).encode("utf-8")
+    ).hexdigest()[:16]
+    return LABEL_CACHE_DIR / f"{digest}.npy"
+
+
+def label_vectors(labels):
+    """
+    Embeddings of the candidate labels. Kept in memory and in
+    MODELS_DIR/label_embeddings, keyed by model + label text, so a
+    label change automatically produces a fresh file.
+    """
+    key = tuple(labels)
+
+    with _label_lock:
+        if key in _label_vectors:
+            return _label_vectors[key]
+
+        path = _label_cache_path(labels)
+        if path.exists():
+            vectors = np.load(path)
+        else:
+            vectors = encode(list(labels))
+            LABEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            np.save(path, vectors)
+            print(f"Cached label embeddings: {path.name}")
+
+        _label_vectors[key] = vectors
+        return vectors
+
+
+# =========================================================
+# Classification
+# =========================================================
+def embedding_classify_batch(texts, labels):
+    """
+    Scores each text against the labels by cosine similarity.
+
+    Returns, per text, a dict shaped like the zero-shot pipeline output
+    (sequence / labels / scores, best first) plus "margin": the cosine
+    gap between the two best labels.
+    """
+    if not texts:
+        return []
+
+    label_vecs = label_vectors(labels)
+    text_vecs = encode(list(texts))
+    sims = text_vecs @ label_vecs.T
+
+    results = []
+    for text, row in zip(texts, sims):
+        order = np.argsort(-row)
+        logits = row / SCORE_TEMPERATURE
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+
+        results.append({
+            "sequence": text,
+            "labels": [labels[i] for i in order],
+            "scores": [float(probs[i]) for i in order],
+            "margin": float(row[order[0]] - row[order[1]]) if len(order) > 1 else 1.0,
+        })
+
+    return results
@@ -0,0 +1,139 @@
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from backend.core.config import INFERENCE_THREADS, CPU_PROCESSES
+from backend.core.metrics import Histogram, register_collector, stage
+from backend.core.profiling import attached
+
+
+# ==========================================================
+# Execution layer
+# ==========================================================
+# The asyncio loop only coordinates work. Every blocking stage
+# (OCR, YOLO, BART, BLIP2, keyframe scoring) is pushed into one
+# of two bounded pools so other websockets / uploads keep flowing.
+
+_inference_pool = None
+_cpu_pool = None
+
+# Seconds a call waited for a free inference thread
+QUEUE_WAIT_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+inference_queue_wait = Histogram(QUEUE_WAIT_BUCKETS)
+
+_counts = {"inference_queued": 0, "inference_running": 0, "cpu_pending": 0}
+_counts_lock = threading.Lock()
+
+
+def _count(name, delta):
+    with _counts_lock:
+        _counts[name] += delta
+
+
+def get_inference_pool():
+    global _inference_pool
+
+    if _inference_pool is None:
+        _inference_pool = ThreadPoolExecutor(
+            max_workers=INFERENCE_THREADS,
+            thread_name_prefix="inference"
+        )
+
+    return _inference_pool
+
+
+def get_cpu_pool():
+    global _cpu_pool
+
+    if _cpu_pool is None:
+        # forkserver: workers start from a clean interpreter instead of
+        # forking a parent that holds model weights and torch threads
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+        _cpu_pool = ProcessPoolExecutor(max_workers=CPU_PROCESSES, mp_context=context)
+
+    return _cpu_pool
+
+
+def _tracked(submitted, fn, /, *args, **kwargs):
+    inference_queue_wait.observe(time.perf_counter() - submitted)
+    _count("inference_queued", -1)
+    _count("inference_running", 1)
+    try:
+        # Sampled by the job's profiler while it runs (if profiled)
+        with attached():
+            return fn(*args, **kwargs)
+    finally:
+        _count("inference_running", -1)
+
+
+async def run_in_thread(fn, *args, **kwargs):
+    """
+    Runs a blocking callable on the inference thread pool.
+    The caller's context (contextvars) is carried into the worker.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, _tracked, time.perf_counter(), fn, *args, **kwargs)
+    _count("inference_queued", 1)
+    return await loop.run_in_executor(get_inference_pool(), call)
+
+
+def _staged(stage_name, fn, /, *args, **kwargs):
+    with stage(stage_name):
+        return fn(*args, **kwargs)
+
+
+async def run_stage(stage_name, fn, *args, **kwargs):
+    """
+    run_in_thread() that records fn's execution time (not its wait in
+    the queue) as pipeline stage `stage_name` (see metrics.stage).
+    """
+    return await run_in_thread(_staged, stage_name, fn, *args, **kwargs)
+
+
+def submit_cpu(fn, *args, **kwargs):
+    """
+    Submits a picklable, module-level callable to the CPU process pool
+    and returns its Future. Use only for functions whose modules do not
+    load models on import.
+    """
+    _count("cpu_pending", 1)
+    future = get_cpu_pool().submit(fn, *args, **kwargs)
+    future.add_done_callback(lambda _: _count("cpu_pending", -1))
+    return future
+
+
+def shutdown_executors():
+    global _inference_pool, _cpu_pool
+
+    if _inference_pool is not None:
+        _inference_pool.shutdown(wait=False, cancel_futures=True)
+        _inference_pool = None
+
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
+
+
+@register_collector
+def _executor_metrics():
+    with _counts_lock:
+        counts = dict(_counts)
+
+    return [
+        ("inference_queue_depth", "gauge", "Calls waiting for an inference thread",
+         [({}, counts["inference_queued"])]),
+        ("inference_threads_busy", "gauge", "Inference threads running a call",
+         [({}, counts["inference_running"])]),
+        ("inference_threads", "gauge", "Size of the inference thread pool",
+         [({}, INFERENCE_THREADS)]),
+        ("inference_queue_wait_seconds", "histogram", "Time a call waited for an inference thread",
+         [({}, inference_queue_wait)]),
+        ("cpu_pool_pending", "gauge", "Calls submitted to the CPU process pool and not finished",
+         [({}, counts["cpu_pending"])]),
+    ]
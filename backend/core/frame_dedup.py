@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+
+
+# =========================================================
+# Perceptual-hash frame dedup
+# =========================================================
+def dhash(frame, hash_size=16):
+    """
+    Difference hash of a frame (BGR or grayscale).
+    Returns a flat boolean array of hash_size * hash_size bits.
+    """
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    small = cv2.resize(frame, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return (small[:, 1:] > small[:, :-1]).flatten()
+
+
+class FrameDeduper:
+    """
+    Decides whether a frame is a near-duplicate of the last frame that
+    was actually processed. Comparing against the last *processed*
+    frame (not the previous one) keeps slow drifts from accumulating.
+    """
+
+    def __init__(self, hash_size=16, max_distance=12):
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self._reference = None
+
+        self.seen = 0
+        self.skipped = 0
+
+    def is_duplicate(self, frame):
+        fingerprint = dhash(frame, self.hash_size)
+        self.seen += 1
+
+        if self._reference is not None:
+            distance = int(np.count_nonzero(fingerprint != self._reference))
+            if distance <= self.max_distance:
+                self.skipped += 1
+                return True
+
+        self._reference = fingerprint
+        return False
+
+    def stats(self):
+        return {
+            "frames": self.seen,
+            "processed": self.seen - self.skipped,
+            "skipped": self.skipped,
+        }
@@ -4,14 +4,16 @@ from backend.core.shared import (
     convert_text_segments,
     run_ocr,
     detect_objects_on_image,
-    generate_caption,
-    classify,
+    caption_image,
+    classify_long,
 )
+from backend.core.executor import run_stage
 
 
 
 
-async def run_image_pipeline(image_path, progress_cb=None, enable_caption=False):
+async def run_image_pipeline(image_path, progress_cb=None, enable_caption=False, classifier_mode=None,
+                             caption_tier=None, caption_budget_ms=None):
 
     async def emit(step: str, percent: int, data=None):
         if progress_cb:
@@ -23,35 +25,49 @@ async def run_image_pipeline(image_path, progress_cb=None, enable_caption=False)
 
     # OCR
     await emit("Detecting text (OCR)", 20, data)
-    text = run_ocr(image_path)
-    textSeg = analyze_text(text)
+    text, textBoxes = await run_stage("ocr", run_ocr, image_path, return_regions=True)
+    textSeg = await run_stage("pii", analyze_text, text)
 
     data["text"] = text
+    data["textBoxes"] = textBoxes
     data["textSeg"] = convert_text_segments(textSeg)
 
     await emit("Running object detection", 45, data)
 
     # Object detection
-    objects = detect_objects_on_image(image_path)
+    objects, detections = await run_stage(
+        "detection", detect_objects_on_image, image_path, return_detections=True
+    )
     data["objects"] = objects
+    data["detections"] = detections
 
     await emit("Generating image caption", 70, data)
 
     # Caption
     caption = ""
+    data["caption_model"] = None
     if enable_caption:
-        caption = generate_caption(image_path)
+        captioned = await run_stage("caption", caption_image, image_path, caption_tier, caption_budget_ms)
+        caption = captioned.pop("caption")
+        data["caption_model"] = captioned
     data["caption"] = caption
 
     await emit("Final sensitivity classification", 90, data)
 
     # Classification
     merged_text = f"{text}\n{objects}\n{caption}\n{textSeg}"
-    classification = classify(merged_text)
+    # Long text is classified in token windows instead of being truncated
+    classification = await run_stage("classify", classify_long, merged_text, mode=classifier_mode)
 
     data["sequence"] = merged_text
     data["labels"] = classification["labels"]
     data["scores"] = classification["scores"]
+    data["classifier"] = classification.get("engine")
+    data["classification_windows"] = {
+        "windows": classification["windows"],
+        "classified": classification["windows_classified"],
+        "stopped_early": classification["stopped_early"],
+    }
 
     
     await emit("Completed", 100, data)
@@ -0,0 +1,263 @@
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+import cv2
+import numpy as np
+from skimage.metrics import structural_similarity as ssim
+
+from backend.core.config import KEYFRAME_MODE, KEYFRAME_THUMB_WIDTH, KEYFRAME_SPILL_MB
+
+
+# =========================================================
+# Thresholds (same values the original extract_keyframes used)
+# =========================================================
+SIM_THRESHOLD = 0.90        # frame must differ from the previous one
+BLUR_THRESHOLD = 120        # Laplacian variance (sharpness)
+MOTION_THRESHOLD = 2.0      # mean absolute difference to previous frame
+DUPLICATE_THRESHOLD = 0.95  # frame must differ from the last keyframe
+
+
+@dataclass
+class Keyframe:
+    index: int                          # frame number in the source video
+    timestamp: float                    # seconds
+    frame: Optional[np.ndarray] = field(default=None, repr=False)  # BGR, in memory
+    path: Optional[str] = None          # lossless .npy copy once spilled
+
+    def image(self):
+        """
+        The full-resolution BGR frame, loaded back from disk if spilled.
+        """
+        if self.frame is not None:
+            return self.frame
+        return np.load(self.path)
+
+
+class KeyframeStore:
+    """
+    Ordered keyframes kept as in-memory arrays. Once the arrays held in
+    memory exceed `spill_threshold_mb`, further keyframes are written
+    losslessly (.npy) to `spill_dir` and loaded back on access.
+    """
+
+    def __init__(self, spill_dir, spill_threshold_mb=KEYFRAME_SPILL_MB):
+        self.spill_dir = spill_dir
+        self.spill_threshold = int(spill_threshold_mb * 1024 * 1024)
+        self.memory_bytes = 0
+        self.spilled = 0
+        self._keyframes = []
+
+    def add(self, keyframe):
+        frame = keyframe.frame
+
+        if self.spill_threshold > 0 and self.memory_bytes + frame.nbytes > self.spill_threshold:
+            path = os.path.join(self.spill_dir, f"keyframe_{keyframe.index:07d}.npy")
+            np.save(path, frame)
+            keyframe = Keyframe(keyframe.index, keyframe.timestamp, path=path)
+            self.spilled += 1
+        else:
+            self.memory_bytes += frame.nbytes
+
+        self._keyframes.append(keyframe)
+        return keyframe
+
+    def images(self, step=1):
+        """
+        Yields the BGR frames in order (every `step`-th keyframe).
+        """
+        for keyframe in self._keyframes[::step]:
+            yield keyframe.image()
+
+    def __iter__(self):
+        return iter(self._keyframes)
+
+    def __len__(self):
+        return len(self._keyframes)
+
+    def __getitem__(self, i):
+        return self._keyframes[i]
+
+
+# =========================================================
+# Background decoding
+# =========================================================
+_END = object()
+
+
+def _decode_worker(video_path, out_queue, stop_event):
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            out_queue.put(ValueError("Could not open video file"))
+            return
+
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        out_queue.put(fps)
+
+        idx = 0
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            out_queue.put((idx, frame))
+            idx += 1
+    finally:
+        cap.release()
+        out_queue.put(_END)
+
+
+def iter_decoded_frames(video_path, prefetch=32):
+    """
+    Decodes a video on a separate thread and yields
+    (frame_index, timestamp, frame) while scoring runs on the caller.
+    """
+    frames = queue.Queue(maxsize=prefetch)
+    stop_event = threading.Event()
+    worker = threading.Thread(
+        target=_decode_worker,
+        args=(video_path, frames, stop_event),
+        name="keyframe-decoder",
+        daemon=True
+    )
+    worker.start()
+
+    try:
+        first = frames.get()
+        if isinstance(first, Exception):
+            raise first
+        if first is _END:
+            return
+        fps = first
+
+        while True:
+            item = frames.get()
+            if item is _END:
+                break
+            idx, frame = item
+            yield idx, (idx / fps if fps > 0 else 0.0), frame
+    finally:
+        stop_event.set()
+        # Unblock the decoder if it is waiting on a full queue
+        while worker.is_alive():
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                worker.join(timeout=0.05)
+
+
+# =========================================================
+# Keyframe engine
+# =========================================================
+class KeyframeExtractor:
+    """
+    Selects keyframes: sharp frames that changed from the previous
+    frame and are not near-duplicates of the last keyframe.
+
+    mode="compat": full-resolution grayscale with the original
+        thresholds. Selects the same frames as the original SSIM loop;
+        the cheap motion and blur gates just run before SSIM so most
+        frames never reach it.
+    mode="fast": motion and SSIM are scored on downscaled grayscale
+        thumbnails (thumb_width px wide); a mean-difference gate also
+        rejects near-copies of the last keyframe before SSIM.
+    """
+
+    def __init__(self, mode=KEYFRAME_MODE, thumb_width=KEYFRAME_THUMB_WIDTH):
+        if mode not in ("compat", "fast"):
+            raise ValueError(f"Unknown keyframe mode: {mode}")
+
+        self.mode = mode
+        self.thumb_width = thumb_width
+        self.reset()
+
+    def _gray(self, frame):
+        """
+        Returns (full-resolution gray, gray used for similarity scoring).
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self.mode == "fast" and gray.shape[1] > self.thumb_width:
+            scale = self.thumb_width / gray.shape[1]
+            size = (self.thumb_width, max(1, int(round(gray.shape[0] * scale))))
+            return gray, cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+        return gray, gray
+
+    def reset(self):
+        self.stats = {"frames": 0, "motion_rejected": 0, "blur_rejected": 0,
+                      "ssim_computed": 0, "keyframes": 0}
+        self._prev_gray = None
+        self._last_saved = None
+
+    def feed(self, idx, timestamp, frame):
+        """
+        Scores one decoded frame against the frames fed before it
+        (since the last reset()). Returns a Keyframe or None.
+        """
+        stats = self.stats
+        stats["frames"] += 1
+        full_gray, gray = self._gray(frame)
+
+        if self._prev_gray is None:
+            # The first frame is only a reference, as before
+            self._prev_gray = gray
+            return None
+
+        is_key = self._is_keyframe(self._prev_gray, gray, full_gray, self._last_saved, stats)
+        self._prev_gray = gray
+
+        if not is_key:
+            return None
+
+        self._last_saved = gray
+        stats["keyframes"] += 1
+        return Keyframe(index=idx, timestamp=timestamp, frame=frame)
+
+    def iter_keyframes(self, frames):
+        """
+        frames: iterable of (frame_index, timestamp, frame).
+        Yields Keyframe objects as soon as they are selected.
+        """
+        self.reset()
+
+        for idx, timestamp, frame in frames:
+            keyframe = self.feed(idx, timestamp, frame)
+            if keyframe is not None:
+                yield keyframe
+
+    def _is_keyframe(self, prev_gray, gray, full_gray, last_saved, stats):
+        # Cheapest gate first: mean absolute difference
+        motion = cv2.absdiff(prev_gray, gray).mean()
+        if motion <= MOTION_THRESHOLD:
+            stats["motion_rejected"] += 1
+            return False
+
+        # Sharpness is scale dependent, so it is always measured at full
+        # resolution (thumbnails look sharper than the frame they came from)
+        blur = cv2.Laplacian(full_gray, cv2.CV_64F).var()
+        if blur <= BLUR_THRESHOLD:
+            stats["blur_rejected"] += 1
+            return False
+
+        stats["ssim_computed"] += 1
+        if ssim(prev_gray, gray) >= SIM_THRESHOLD:
+            return False
+
+        if last_saved is None:
+            return True
+
+        if self.mode == "fast" and cv2.absdiff(last_saved, gray).mean() <= MOTION_THRESHOLD:
+            # Practically identical to the last keyframe, skip its SSIM
+            return False
+
+        stats["ssim_computed"] += 1
+        return ssim(last_saved, gray) < DUPLICATE_THRESHOLD
+
+    def extract(self, video_path):
+        """
+        Decodes the video on a background thread and returns all keyframes.
+        """
+        return list(self.iter_keyframes(iter_decoded_frames(video_path)))
@@ -0,0 +1,240 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+
+# ==========================================================
+# Histogram
+# ==========================================================
+
+class Histogram:
+    """
+    Cumulative-bucket histogram (Prometheus semantics: each bucket
+    counts observations <= its upper bound).
+    """
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last = +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        with self._lock:
+            cumulative = []
+            running = 0
+            for bound, count in zip(self.buckets + [float("inf")], self._counts):
+                running += count
+                cumulative.append((bound, running))
+
+            return {
+                "count": self._count,
+                "sum": self._sum,
+                "mean": self._sum / self._count if self._count else None,
+                "buckets": cumulative,
+            }
+
+
+# ==========================================================
+# Per-request stage timings
+# ==========================================================
+# A pipeline run inside collect_stage_timings() accumulates the time
+# spent in each stage. Worker threads see the same collector through
+# the copied context (see executor.run_stage). Stages that run in
+# parallel each count their own time, so the sum can exceed wall time.
+
+_current_timings = contextvars.ContextVar("stage_timings", default=None)
+
+# Seconds per stage call, process-wide (exported on /metrics)
+STAGE_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0]
+_stage_histograms = {}
+_stage_lock = threading.Lock()
+
+
+def _stage_histogram(stage_name):
+    with _stage_lock:
+        if stage_name not in _stage_histograms:
+            _stage_histograms[stage_name] = Histogram(STAGE_BUCKETS)
+        return _stage_histograms[stage_name]
+
+
+class StageTimings:
+
+    def __init__(self):
+        self._seconds = {}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage_name, seconds):
+        with self._lock:
+            self._seconds[stage_name] = self._seconds.get(stage_name, 0.0) + seconds
+            self._calls[stage_name] = self._calls.get(stage_name, 0) + 1
+
+    def as_dict(self):
+        """
+        {stage: {"seconds", "calls"}}
+        """
+        with self._lock:
+            return {
+                name: {"seconds": round(seconds, 4), "calls": self._calls[name]}
+                for name, seconds in self._seconds.items()
+            }
+
+
+@contextmanager
+def collect_stage_timings():
+    timings = StageTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+def record_stage(stage_name, seconds):
+    _stage_histogram(stage_name).observe(seconds)
+
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage_name, seconds)
+
+
+@contextmanager
+def stage(stage_name):
+    """
+    Times the block under `stage_name` for the current collector
+    (no-op outside collect_stage_timings()).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage_name, time.perf_counter() - start)
+
+
+# ==========================================================
+# Jobs (in flight, completed, duration)
+# ==========================================================
+
+JOB_BUCKETS = [0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0]
+_jobs_in_flight = {}
+_jobs_total = {}          # (job_type, status) -> count
+_job_histograms = {}
+_jobs_lock = threading.Lock()
+
+
+@contextmanager
+def track_job(job_type):
+    """
+    Counts the job as in flight while the block runs. The yielded dict's
+    "status" ("ok" by default, "error" on exception) labels the job
+    when it completes; set it to e.g. "cached" to record a cache hit.
+    """
+    job = {"status": "ok"}
+    start = time.perf_counter()
+
+    with _jobs_lock:
+        _jobs_in_flight[job_type] = _jobs_in_flight.get(job_type, 0) + 1
+        if job_type not in _job_histograms:
+            _job_histograms[job_type] = Histogram(JOB_BUCKETS)
+
+    try:
+        yield job
+    except BaseException:
+        job["status"] = "error"
+        raise
+    finally:
+        _job_histograms[job_type].observe(time.perf_counter() - start)
+        with _jobs_lock:
+            _jobs_in_flight[job_type] -= 1
+            key = (job_type, job["status"])
+            _jobs_total[key] = _jobs_total.get(key, 0) + 1
+
+
+# ==========================================================
+# Prometheus text exposition
+# ==========================================================
+# Modules register collectors returning metric families:
+#   (name, type, help, [(labels_dict, value), ...])
+# where type is "gauge", "counter" or "histogram" (value = a
+# Histogram). render_prometheus() formats all of them.
+
+_collectors = []
+
+
+def register_collector(collector):
+    _collectors.append(collector)
+    return collector
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=None):
+    items = dict(labels or {}, **(extra or {}))
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items.items()) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_family(name, kind, help_text, samples):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+    for labels, value in samples:
+        if kind != "histogram":
+            if value is not None:
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+            continue
+
+        snapshot = value.snapshot()
+        for bound, count in snapshot["buckets"]:
+            lines.append(f"{name}_bucket{_labels(labels, {'le': _number(float(bound))})} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(float(snapshot['sum']))}")
+        lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+
+    return lines
+
+
+@register_collector
+def _core_metrics():
+    with _stage_lock:
+        stages = sorted(_stage_histograms.items())
+    with _jobs_lock:
+        in_flight = sorted(_jobs_in_flight.items())
+        totals = sorted(_jobs_total.items())
+        jobs = sorted(_job_histograms.items())
+
+    return [
+        ("pipeline_stage_seconds", "histogram", "Time spent in one pipeline stage call",
+         [({"stage": name}, hist) for name, hist in stages]),
+        ("jobs_in_flight", "gauge", "Analysis jobs currently running",
+         [({"type": job_type}, count) for job_type, count in in_flight]),
+        ("jobs_total", "counter", "Completed analysis jobs",
+         [({"type": job_type, "status": status}, count) for (job_type, status), count in totals]),
+        ("job_seconds", "histogram", "Wall time of one analysis job",
+         [({"type": job_type}, hist) for job_type, hist in jobs]),
+    ]
+
+
+def render_prometheus():
+    lines = []
+    for collector in list(_collectors):
+        for name, kind, help_text, samples in collector():
+            lines.extend(_format_family(name, kind, help_text, samples))
+    return "\n".join(lines) + "\n"
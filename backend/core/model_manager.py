@@ -2,18 +2,52 @@
 
 
 
+import gc
+import shutil
+import tarfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from ultralytics import YOLO
+import urllib.request
 
+import cv2
+import torch
+from ultralytics import YOLO
 from transformers import (
+    AutoConfig,
     AutoTokenizer,
+    AutoModel,
     AutoModelForSequenceClassification,
     AutoProcessor,
+    BlipForConditionalGeneration,
     Blip2ForConditionalGeneration,
     pipeline,
 )
 
-
+try:
+    from transformers.initialization import no_init_weights
+except ImportError:  # transformers < 5
+    from transformers.modeling_utils import no_init_weights
+
+from backend.core.metrics import register_collector
+from backend.core.config import (
+    MODEL_RAM_BUDGET_MB,
+    MODEL_LOAD_WORKERS,
+    CLASSIFIER_MODE,
+    VIDEO_PROVISIONAL_CLASSIFIER,
+    CAPTION_TIER,
+    TEXT_DETECT,
+    BART_BACKEND,
+    YOLO_BACKEND,
+    YOLO_IMGSZ,
+    BART_PRECISION,
+    BLIP2_PRECISION,
+    YOLO_PRECISION,
+    TEXT_DETECT_CONF,
+    TEXT_DETECT_NMS,
+)
 
 
 # ==========================================================
@@ -23,20 +57,317 @@ from transformers import (
 BASE_PATH = Path(__file__).resolve().parents[2]
 MODELS_DIR = BASE_PATH / "backend" / "models"
 YOLO_DIR = MODELS_DIR / "yolo"
+PRECISION_DIR = MODELS_DIR / "precision"
+ONNX_DIR = MODELS_DIR / "onnx"
 
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 YOLO_DIR.mkdir(parents=True, exist_ok=True)
 
 BART_MODEL_PATH = MODELS_DIR / "bart-mnli"
 BLIP2_MODEL_PATH = MODELS_DIR / "blip2-opt-2.7b"
+BLIP_MODEL_PATH = MODELS_DIR / "blip-base"
+BLIP_MODEL_NAME = "Salesforce/blip-image-captioning-base"
+EMBEDDER_MODEL_PATH = MODELS_DIR / "minilm-l6"
+EMBEDDER_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+TEXT_DETECTOR_PATH = MODELS_DIR / "east" / "frozen_east_text_detection.pb"
+BART_ONNX_PATH = ONNX_DIR / "bart-mnli.onnx"
+
+YOLO_MODEL_FILES = [
+    "yolov9c.pt",
+    "yolov8l-oiv7.pt",
+    "yolov8x-oiv7.pt",
+]
+
+# Identifies the models behind a result (part of the result cache key).
+# Bump "pipeline" whenever pipeline changes alter results.
+MODEL_VERSIONS = {
+    "bart": "facebook/bart-large-mnli",
+    "blip2": "Salesforce/blip2-opt-2.7b",
+    "blip": BLIP_MODEL_NAME,
+    "embedder": EMBEDDER_MODEL_NAME,
+    "yolo": YOLO_MODEL_FILES,
+    "text_detector": TEXT_DETECTOR_PATH.name if TEXT_DETECTOR_PATH.exists() else None,
+    "pipeline": 2,
+}
 
 # ==========================================================
-# GLOBAL CACHE (VERY IMPORTANT)
+# MODEL REGISTRY (on-demand loading, LRU under a RAM budget)
 # ==========================================================
 
-_classifier = None
-_blip_processor = None
-_blip_model = None
+def _module_nbytes(module):
+    """
+    Bytes held by a torch module's parameters and buffers
+    (including the packed weights of dynamically quantized layers).
+    """
+    total = 0
+    for tensor in list(module.parameters()) + list(module.buffers()):
+        total += tensor.numel() * tensor.element_size()
+
+    for m in module.modules():
+        if isinstance(m, torch.ao.nn.quantized.dynamic.Linear):
+            weight = m.weight()
+            total += weight.numel() * weight.element_size()
+
+    return total
+
+
+def _resident_nbytes(obj):
+    """
+    Best-effort resident size of a loaded model object
+    (HF pipeline, (processor, model) tuple, YOLO wrapper, nn.Module
+    or ONNX Runtime model).
+    """
+    if isinstance(obj, (tuple, list)):
+        return sum(_resident_nbytes(o) for o in obj)
+
+    # ONNX Runtime models report the size of their graph file
+    if isinstance(getattr(obj, "nbytes", None), int):
+        return obj.nbytes
+
+    if hasattr(obj, "parameters") and hasattr(obj, "buffers"):
+        return _module_nbytes(obj)
+
+    # HF pipeline -> .model, ultralytics YOLO -> .model
+    inner = getattr(obj, "model", None)
+    if inner is not None and inner is not obj:
+        return _resident_nbytes(inner)
+
+    return 0
+
+
+def _process_rss_mb():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return round(psutil.Process().memory_info().rss / 1024 ** 2, 1)
+
+
+class ModelRegistry:
+    """
+    Loads models the first time they are requested and keeps them in
+    LRU order. When the resident total exceeds `budget_mb`, the least
+    recently used models are dropped (they are reloaded on next use).
+
+    A model that is evicted while a request still holds a reference
+    is freed once that request finishes with it.
+    """
+
+    def __init__(self, budget_mb=0):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._loaders = {}
+        self._models = OrderedDict()   # name -> loaded object (LRU order)
+        self._sizes = {}               # name -> bytes (kept after eviction)
+        self._load_seconds = {}
+        self._loads = {}               # name -> number of loads (reloads after eviction included)
+        self._last_used = {}
+        self._lock = threading.RLock()
+        self._load_locks = {}
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def is_loaded(self, name):
+        with self._lock:
+            return name in self._models
+
+    def get(self, name):
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                self._last_used[name] = time.time()
+                return self._models[name]
+
+        # One loader per model; other models can load concurrently
+        with self._load_locks[name]:
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    self._last_used[name] = time.time()
+                    return self._models[name]
+
+                # Make room up front if we already know how big it is
+                self._evict_for(self._sizes.get(name, 0), keep=name)
+
+            start = time.perf_counter()
+            obj = self._loaders[name]()
+            elapsed = time.perf_counter() - start
+            size = _resident_nbytes(obj)
+
+            with self._lock:
+                self._models[name] = obj
+                self._sizes[name] = size
+                self._load_seconds[name] = elapsed
+                self._loads[name] = self._loads.get(name, 0) + 1
+                self._last_used[name] = time.time()
+                self._evict_for(0, keep=name)
+
+            print(f"Loaded {name} in {elapsed:.1f}s ({size / 1024 ** 2:.0f} MB)")
+            return obj
+
+    def unload(self, name):
+        with self._lock:
+            obj = self._models.pop(name, None)
+
+        if obj is not None:
+            del obj
+            gc.collect()
+            print(f"Unloaded {name}")
+
+    def _resident_total(self):
+        return sum(self._sizes.get(n, 0) for n in self._models)
+
+    def _evict_for(self, incoming_bytes, keep=None):
+        if self.budget_bytes <= 0:
+            return
+
+        evicted = []
+        while self._resident_total() + incoming_bytes > self.budget_bytes:
+            victim = next((n for n in self._models if n != keep), None)
+            if victim is None:
+                break
+            self._models.pop(victim)
+            evicted.append(victim)
+
+        if evicted:
+            gc.collect()
+            print(f"Evicted (RAM budget): {', '.join(evicted)}")
+
+    def stats(self):
+        with self._lock:
+            models = {}
+            for name in self._loaders:
+                models[name] = {
+                    "loaded": name in self._models,
+                    "resident_mb": round(self._sizes.get(name, 0) / 1024 ** 2, 1) if name in self._models else 0.0,
+                    "last_size_mb": round(self._sizes.get(name, 0) / 1024 ** 2, 1),
+                    "load_seconds": self._load_seconds.get(name),
+                    "loads": self._loads.get(name, 0),
+                    "last_used": self._last_used.get(name),
+                }
+
+            return {
+                "process_rss_mb": _process_rss_mb(),
+                "budget_mb": round(self.budget_bytes / 1024 ** 2, 1),
+                "resident_mb": round(self._resident_total() / 1024 ** 2, 1),
+                "models": models,
+            }
+
+
+registry = ModelRegistry(budget_mb=MODEL_RAM_BUDGET_MB)
+
+
+# ==========================================================
+# PRECISION (fp32 / bf16 / int8)
+# ==========================================================
+
+PRECISIONS = ("fp32", "bf16", "int8")
+
+
+def _check_precision(precision):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision} (expected one of {list(PRECISIONS)})")
+    return precision
+
+
+def _registry_name(name, precision):
+    """
+    fp32 keeps the plain name; other precisions are separate entries.
+    """
+    return name if precision == "fp32" else f"{name}:{precision}"
+
+
+def _quantize_int8(model):
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_hf_precision(name, precision, model_cls, load_fp32):
+    """
+    Returns a transformers model in `precision`, converting from fp32
+    the first time and caching the converted weights under
+    PRECISION_DIR (bf16: save_pretrained dir, int8: config plus a
+    quantized state_dict, keyed by torch version).
+    """
+    if precision == "fp32":
+        return load_fp32()
+
+    if precision == "bf16":
+        path = PRECISION_DIR / f"{name}-bf16"
+        if (path / "config.json").exists():
+            model = model_cls.from_pretrained(path, local_files_only=True, dtype=torch.bfloat16)
+        else:
+            model = load_fp32().to(torch.bfloat16)
+            model.save_pretrained(path)
+            print(f"Cached {name} bf16 weights")
+
+        # Callers (pipelines, numpy post-processing) get fp32 outputs
+        model.register_forward_hook(lambda module, inputs, output: _to_float(output))
+        return model
+
+    path = PRECISION_DIR / f"{name}-int8-torch{torch.__version__}"
+    weights = path / "model.int8.pt"
+    if weights.exists():
+        # Uninitialized skeleton, quantized so its layers match the
+        # saved packed weights; no pickled code is loaded
+        config = AutoConfig.from_pretrained(path, local_files_only=True)
+        with no_init_weights():
+            model = _quantize_int8(model_cls(config))
+        model.load_state_dict(torch.load(weights, weights_only=True))
+        model.tie_weights()
+        return model
+
+    model = _quantize_int8(load_fp32())
+    path.mkdir(parents=True, exist_ok=True)
+    model.config.save_pretrained(path)
+    torch.save(model.state_dict(), weights)
+    print(f"Cached {name} int8 weights")
+    return model
+
+
+def _to_float(output):
+    if isinstance(output, torch.Tensor):
+        return output.float() if output.is_floating_point() else output
+    if isinstance(output, dict):
+        # transformers ModelOutput: converted in place
+        for key, value in output.items():
+            output[key] = _to_float(value)
+        return output
+    if isinstance(output, (list, tuple)):
+        return type(output)(_to_float(o) for o in output)
+    return output
+
+
+def _autocast_bf16(module):
+    """
+    Runs module.forward under CPU bf16 autocast and hands back fp32
+    outputs, so pre- and post-processing (NMS) stay in fp32.
+    """
+    forward = module.forward
+
+    def bf16_forward(*args, **kwargs):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            return _to_float(forward(*args, **kwargs))
+
+    module.forward = bf16_forward
+    return module
+
+
+# ==========================================================
+# INFERENCE BACKEND (torch / onnx)
+# ==========================================================
+
+BACKENDS = ("torch", "onnx")
+
+
+def _check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend} (expected one of {list(BACKENDS)})")
+    return backend
 
 
 # ==========================================================
@@ -62,29 +393,121 @@ def ensure_bart_model():
         print("BART model already exists.")
 
 
-def get_classifier():
-    global _classifier
+def _load_classifier(precision="fp32"):
+    print(f"Loading BART ({precision}) into memory...")
 
-    if _classifier is None:
-        print("Loading BART into memory...")
-
-        model = AutoModelForSequenceClassification.from_pretrained(
+    model = _load_hf_precision(
+        "bart-mnli",
+        precision,
+        AutoModelForSequenceClassification,
+        lambda: AutoModelForSequenceClassification.from_pretrained(
             BART_MODEL_PATH,
             local_files_only=True,
             # device_map="auto"
-        )
-        tokenizer = AutoTokenizer.from_pretrained(
-            BART_MODEL_PATH,
-            local_files_only=True
-        )
+        ),
+    )
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(
+        BART_MODEL_PATH,
+        local_files_only=True
+    )
+
+    return pipeline(
+        "zero-shot-classification",
+        model=model,
+        tokenizer=tokenizer
+    )
+
+
+def ensure_bart_onnx():
+    """
+    Exports BART-MNLI to ONNX once (loads the fp32 torch weights).
+    """
+    if BART_ONNX_PATH.exists():
+        print("BART ONNX graph already exists.")
+        return
+
+    from backend.core.onnx_backend import export_sequence_classifier
+
+    print("Exporting BART to ONNX...")
+    model = AutoModelForSequenceClassification.from_pretrained(BART_MODEL_PATH, local_files_only=True)
+    tokenizer = AutoTokenizer.from_pretrained(BART_MODEL_PATH, local_files_only=True)
+    export_sequence_classifier(model, tokenizer, BART_ONNX_PATH)
+    print("BART ONNX graph saved.")
+
+
+def _load_onnx_classifier():
+    from backend.core.onnx_backend import OrtZeroShotClassifier
+
+    ensure_bart_onnx()
+    print("Loading BART (onnx) into memory...")
+
+    tokenizer = AutoTokenizer.from_pretrained(BART_MODEL_PATH, local_files_only=True)
+    config = AutoConfig.from_pretrained(BART_MODEL_PATH, local_files_only=True)
+
+    # Same lookup as the transformers zero-shot pipeline
+    entailment_id = next(
+        (i for label, i in config.label2id.items() if label.lower().startswith("entail")),
+        -1
+    )
+
+    return OrtZeroShotClassifier(BART_ONNX_PATH, tokenizer, entailment_id)
+
+
+def get_classifier(precision=None, backend=None):
+    """
+    Zero-shot classifier in `precision` (default BART_PRECISION) on
+    `backend` (default BART_BACKEND). Both backends are called like the
+    transformers zero-shot pipeline and expose .tokenizer.
+    """
+    if _check_backend(backend or BART_BACKEND) == "onnx":
+        registry.register("bart:onnx", _load_onnx_classifier)
+        return registry.get("bart:onnx")
 
-        _classifier = pipeline(
-            "zero-shot-classification",
-            model=model,
-            tokenizer=tokenizer
-        )
+    precision = _check_precision(precision or BART_PRECISION)
+    name = _registry_name("bart", precision)
+    registry.register(name, lambda: _load_classifier(precision))
+    return registry.get(name)
 
-    return _classifier
+
+# ==========================================================
+# Sentence embedder (fast classification mode)
+# ==========================================================
+
+def ensure_embedder_model():
+    config_file = EMBEDDER_MODEL_PATH / "config.json"
+    if not EMBEDDER_MODEL_PATH.exists() or not config_file.exists():
+        print("Downloading embedding model...")
+
+        tokenizer = AutoTokenizer.from_pretrained(EMBEDDER_MODEL_NAME)
+        model = AutoModel.from_pretrained(EMBEDDER_MODEL_NAME)
+
+        tokenizer.save_pretrained(EMBEDDER_MODEL_PATH)
+        model.save_pretrained(EMBEDDER_MODEL_PATH)
+
+        print("Embedding model saved locally.")
+    else:
+        print("Embedding model already exists.")
+
+
+def _load_embedder():
+    print("Loading embedding model into memory...")
+
+    tokenizer = AutoTokenizer.from_pretrained(
+        EMBEDDER_MODEL_PATH,
+        local_files_only=True
+    )
+    model = AutoModel.from_pretrained(
+        EMBEDDER_MODEL_PATH,
+        local_files_only=True
+    )
+    model.eval()
+
+    return tokenizer, model
+
+
+def get_embedder():
+    return registry.get("embedder")
 
 
 # ==========================================================
@@ -110,26 +533,78 @@ def ensure_blip2_model():
         print("BLIP2 model already exists.")
 
 
-def get_blip():
-    global _blip_processor, _blip_model
+def _load_blip(precision="fp32"):
+    print(f"Loading BLIP2 ({precision}) into memory...")
 
-    if _blip_model is None:
-        print("Loading BLIP2 into memory...")
+    processor = AutoProcessor.from_pretrained(
+        BLIP2_MODEL_PATH,
+        local_files_only=True,
+        use_fast=False
+    )
 
-        _blip_processor = AutoProcessor.from_pretrained(
-            BLIP2_MODEL_PATH,
-            local_files_only=True,
-            use_fast=False
-        )
-
-        _blip_model = Blip2ForConditionalGeneration.from_pretrained(
+    model = _load_hf_precision(
+        "blip2-opt-2.7b",
+        precision,
+        Blip2ForConditionalGeneration,
+        lambda: Blip2ForConditionalGeneration.from_pretrained(
             BLIP2_MODEL_PATH,
             local_files_only=True
-        )
+        ),
+    )
 
-        _blip_model.eval()
+    model.eval()
 
-    return _blip_processor, _blip_model
+    return processor, model
+
+
+def get_blip(precision=None):
+    """
+    (processor, model) in `precision` (default BLIP2_PRECISION).
+    """
+    precision = _check_precision(precision or BLIP2_PRECISION)
+    name = _registry_name("blip2", precision)
+    registry.register(name, lambda: _load_blip(precision))
+    return registry.get(name)
+
+
+# ==========================================================
+# BLIP base (fast captioning tier)
+# ==========================================================
+
+def ensure_blip_model():
+    config_file = BLIP_MODEL_PATH / "config.json"
+    if not BLIP_MODEL_PATH.exists() or not config_file.exists():
+        print("Downloading BLIP base model...")
+
+        processor = AutoProcessor.from_pretrained(BLIP_MODEL_NAME)
+        model = BlipForConditionalGeneration.from_pretrained(BLIP_MODEL_NAME)
+
+        processor.save_pretrained(BLIP_MODEL_PATH)
+        model.save_pretrained(BLIP_MODEL_PATH)
+
+        print("BLIP base saved locally.")
+    else:
+        print("BLIP base model already exists.")
+
+
+def _load_blip_base():
+    print("Loading BLIP base into memory...")
+
+    processor = AutoProcessor.from_pretrained(
+        BLIP_MODEL_PATH,
+        local_files_only=True
+    )
+    model = BlipForConditionalGeneration.from_pretrained(
+        BLIP_MODEL_PATH,
+        local_files_only=True
+    )
+    model.eval()
+
+    return processor, model
+
+
+def get_blip_base():
+    return registry.get("blip")
 
 
 # ==========================================================
@@ -147,35 +622,237 @@ def ensure_yolo_model(model_filename: str):
     else:
         print(f"{model_filename} already exists.")
 
-    return YOLO(str(model_path))
+    return model_path
 
 
-def load_yolo_models():
-    model_files = [
-        "yolov9c.pt",
-        "yolov8l-oiv7.pt",
-        "yolov8x-oiv7.pt",
-    ]
+def _yolo_precision(precision):
+    precision = _check_precision(precision or YOLO_PRECISION)
+    # Dynamic quantization only covers Linear layers; YOLO is
+    # convolutional, so int8 would change nothing and runs as fp32
+    return "fp32" if precision == "int8" else precision
+
+
+def _load_yolo(model_filename: str, precision="fp32"):
+    print(f"Loading {model_filename} ({precision}) into memory...")
+    model = YOLO(str(YOLO_DIR / model_filename))
+
+    if precision == "bf16":
+        # Ultralytics casts loaded weights back to fp32, so bf16 is
+        # applied as autocast around the network forward pass
+        _autocast_bf16(model.model)
+
+    return model
+
+
+def _yolo_onnx_path(model_filename: str):
+    return ONNX_DIR / f"{Path(model_filename).stem}.onnx"
+
+
+def ensure_yolo_onnx(model_filename: str):
+    onnx_path = _yolo_onnx_path(model_filename)
+
+    if onnx_path.exists():
+        print(f"{onnx_path.name} already exists.")
+        return
+
+    from backend.core.onnx_backend import export_yolo
+
+    print(f"Exporting {model_filename} to ONNX...")
+    export_yolo(YOLO_DIR / model_filename, onnx_path, YOLO_IMGSZ)
+    print(f"Saved {onnx_path.name}")
+
+
+def _load_onnx_yolo(model_filename: str):
+    from backend.core.onnx_backend import OrtYolo
+
+    ensure_yolo_onnx(model_filename)
+    print(f"Loading {model_filename} (onnx) into memory...")
+    return OrtYolo(_yolo_onnx_path(model_filename))
+
 
-    return [ensure_yolo_model(name) for name in model_files]
+def get_yolo(model_filename: str, precision=None, backend=None):
+    """
+    A YOLO checkpoint on `backend` (default YOLO_BACKEND). Either
+    backend is used through predict().
+    """
+    if _check_backend(backend or YOLO_BACKEND) == "onnx":
+        name = f"{model_filename}:onnx"
+        registry.register(name, lambda: _load_onnx_yolo(model_filename))
+        return registry.get(name)
+
+    precision = _yolo_precision(precision)
+    name = _registry_name(model_filename, precision)
+    registry.register(name, lambda: _load_yolo(model_filename, precision))
+    return registry.get(name)
+
+
+def load_yolo_models(precision=None, backend=None):
+    return [get_yolo(name, precision, backend) for name in YOLO_MODEL_FILES]
 
 
 # ==========================================================
-# LOAD ALL (DOWNLOAD ONLY)
+# EAST text detector (OpenCV DNN)
 # ==========================================================
-
-def load_all_models():
+# The frozen EAST graph from OpenCV's text detection sample ships as a
+# tarball; only the .pb inside is kept. A failed download is not fatal:
+# without the file OCR reads full frames.
+
+TEXT_DETECTOR_URL = "https://www.dropbox.com/s/r2ingd0l3zt8hxs/frozen_east_text_detection.tar.gz?dl=1"
+
+
+def ensure_text_detector_model():
+    if TEXT_DETECTOR_PATH.exists():
+        print("EAST text detector already exists.")
+        return
+
+    print("Downloading EAST text detector...")
+    TEXT_DETECTOR_PATH.parent.mkdir(parents=True, exist_ok=True)
+    partial = TEXT_DETECTOR_PATH.with_suffix(".part")
+    try:
+        with urllib.request.urlopen(TEXT_DETECTOR_URL, timeout=60) as response:
+            with tarfile.open(fileobj=response, mode="r|gz") as archive:
+                for member in archive:
+                    if member.isfile() and Path(member.name).name == TEXT_DETECTOR_PATH.name:
+                        with archive.extractfile(member) as src, open(partial, "wb") as dst:
+                            shutil.copyfileobj(src, dst)
+                        break
+                else:
+                    raise OSError(f"{TEXT_DETECTOR_PATH.name} not found in the archive")
+        partial.replace(TEXT_DETECTOR_PATH)
+        print("EAST text detector saved locally.")
+    except (OSError, tarfile.TarError) as e:
+        partial.unlink(missing_ok=True)
+        print(f"EAST text detector download failed ({e}); OCR will run on full frames.")
+
+
+def _load_text_detector():
+    print("Loading EAST text detector into memory...")
+
+    model = cv2.dnn.TextDetectionModel_EAST(str(TEXT_DETECTOR_PATH))
+    model.setConfidenceThreshold(TEXT_DETECT_CONF)
+    model.setNMSThreshold(TEXT_DETECT_NMS)
+    # Input size is set per image (see text_regions.detect_text_regions)
+    model.setInputParams(1.0, (320, 320), (123.68, 116.78, 103.94), True)
+
+    return model
+
+
+def get_text_detector():
     """
-    Ensures all models are downloaded.
-    Does NOT load large models into RAM.
+    The EAST model, or None when its file is missing.
     """
-    print("Ensuring all models exist...")
+    if not TEXT_DETECTOR_PATH.exists():
+        return None
+    return registry.get("east")
 
-    ensure_bart_model()
-    ensure_blip2_model()
-    load_yolo_models()
 
-    print("All models ready.")
+# ==========================================================
+# REGISTRATION
+# ==========================================================
 
+registry.register("bart", _load_classifier)
+registry.register("blip2", _load_blip)
+registry.register("blip", _load_blip_base)
+registry.register("embedder", _load_embedder)
+registry.register("east", _load_text_detector)
+for _name in YOLO_MODEL_FILES:
+    registry.register(_name, lambda name=_name: _load_yolo(name))
+
+
+@register_collector
+def _model_metrics():
+    stats = registry.stats()
+    models = sorted(stats["models"].items())
+    rss_mb = stats["process_rss_mb"]
+
+    return [
+        ("model_loaded", "gauge", "1 when the model is resident",
+         [({"model": name}, int(m["loaded"])) for name, m in models]),
+        ("model_resident_bytes", "gauge", "Resident weight size of a loaded model",
+         [({"model": name}, int(m["resident_mb"] * 1024 ** 2)) for name, m in models]),
+        ("model_load_seconds", "gauge", "Duration of the model's most recent load",
+         [({"model": name}, m["load_seconds"]) for name, m in models]),
+        ("model_loads_total", "counter", "Loads of the model, including reloads after eviction",
+         [({"model": name}, m["loads"]) for name, m in models]),
+        ("process_resident_memory_bytes", "gauge", "Resident memory of the server process",
+         [({}, int(rss_mb * 1024 ** 2) if rss_mb is not None else None)]),
+    ]
 
 
+# ==========================================================
+# LOAD ALL
+# ==========================================================
+
+def _startup_models():
+    """
+    name -> (ensure, load) for every model. `load` is None for models
+    the default settings do not use; those are only downloaded and
+    load on first use.
+    """
+    def ensure_bart():
+        ensure_bart_model()
+        # ONNX graphs are exported up front rather than on the first request
+        if BART_BACKEND == "onnx":
+            ensure_bart_onnx()
+
+    def ensure_yolo(name):
+        ensure_yolo_model(name)
+        if YOLO_BACKEND == "onnx":
+            ensure_yolo_onnx(name)
+
+    # BART also backs the embedding engine's low-margin fallback
+    models = {
+        "bart": (ensure_bart, get_classifier),
+        "embedder": (ensure_embedder_model, get_embedder if "embedding" in (CLASSIFIER_MODE, VIDEO_PROVISIONAL_CLASSIFIER) else None),
+        "blip": (ensure_blip_model, get_blip_base if CAPTION_TIER != "detailed" else None),
+        "blip2": (ensure_blip2_model, get_blip if CAPTION_TIER == "detailed" else None),
+        "east": (ensure_text_detector_model, get_text_detector if TEXT_DETECT else None),
+    }
+    for name in YOLO_MODEL_FILES:
+        models[name] = (lambda name=name: ensure_yolo(name), lambda name=name: get_yolo(name))
+
+    return models
+
+
+def _prepare_model(name, ensure, load):
+    start = time.perf_counter()
+    ensure()
+    ensured = time.perf_counter()
+    if load is not None:
+        load()
+    done = time.perf_counter()
+
+    timing = {"ensure_s": round(ensured - start, 2), "load_s": round(done - ensured, 2) if load else None}
+    loaded = f", load {timing['load_s']:.1f}s" if load else ""
+    print(f"{name}: ready in {done - start:.1f}s (download/check {timing['ensure_s']:.1f}s{loaded})")
+    return timing
+
+
+def load_all_models(preload=False, workers=MODEL_LOAD_WORKERS):
+    """
+    Ensures all models are downloaded and, with `preload`, loads the
+    ones the default settings use into the registry (once each, so the
+    first request does not pay for it). Models are prepared
+    concurrently, `workers` at a time.
+
+    Returns {name: {"ensure_s", "load_s"}}.
+    """
+    models = _startup_models()
+    if not preload:
+        models = {name: (ensure, None) for name, (ensure, _) in models.items()}
+
+    print(f"Ensuring all models exist{' and loading defaults' if preload else ''} ({workers} at a time)...")
+    start = time.perf_counter()
+
+    timings = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="model-load") as pool:
+        futures = {
+            pool.submit(_prepare_model, name, ensure, load): name
+            for name, (ensure, load) in models.items()
+        }
+        for future in as_completed(futures):
+            timings[futures[future]] = future.result()
+
+    serial = sum(t["ensure_s"] + (t["load_s"] or 0) for t in timings.values())
+    print(f"All models ready in {time.perf_counter() - start:.1f}s ({serial:.1f}s of model work).")
+    return timings
@@ -0,0 +1,159 @@
+import functools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import pytesseract
+from PIL import Image
+
+from backend.core.config import OCR_BACKEND, OCR_WORKERS, OCR_LANG
+from backend.core.profiling import attached, current_profile
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Tesseract page segmentation modes used here
+PSM_AUTO = 3
+PSM_SINGLE_LINE = 7
+
+
+def _to_pil(image):
+    """
+    Accepts a PIL image, a grayscale array or a BGR array.
+    """
+    if isinstance(image, Image.Image):
+        return image
+    if image.ndim == 2:
+        return Image.fromarray(image)
+    return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+
+# =========================================================
+# OCR backends
+# =========================================================
+class OcrBackend:
+    """
+    image_to_string() runs OCR on one image in the calling thread;
+    submit() / map() spread images over `workers` concurrent workers.
+    `psm` selects tesseract's page segmentation (PSM_SINGLE_LINE for
+    cropped text lines).
+    """
+
+    name = "base"
+
+    def __init__(self, workers=OCR_WORKERS, lang=OCR_LANG):
+        self.workers = max(1, int(workers))
+        self.lang = lang
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix=f"ocr-{self.name}"
+        )
+
+    def image_to_string(self, image, psm=PSM_AUTO):
+        raise NotImplementedError
+
+    def _profiled(self, profile, image, psm):
+        # Workers are sampled by the submitting job's profiler, if any
+        with attached(profile):
+            return self.image_to_string(image, psm)
+
+    def submit(self, image, psm=PSM_AUTO):
+        return self._executor.submit(self._profiled, current_profile(), image, psm)
+
+    def map(self, images, psm=PSM_AUTO):
+        call = functools.partial(self._profiled, current_profile(), psm=psm)
+        return list(self._executor.map(call, images))
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PytesseractBackend(OcrBackend):
+    """
+    The original path: writes a temp image and spawns a `tesseract`
+    process (which reloads its language model) for every call.
+    """
+
+    name = "pytesseract"
+
+    def image_to_string(self, image, psm=PSM_AUTO):
+        return pytesseract.image_to_string(_to_pil(image), lang=self.lang, config=f"--psm {psm}")
+
+
+class TesserocrBackend(OcrBackend):
+    """
+    In-process libtesseract through tesserocr. Each worker borrows a
+    long-lived PyTessBaseAPI (language model loaded once) from a pool;
+    recognition releases the GIL, so workers run in parallel.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, workers=OCR_WORKERS, lang=OCR_LANG):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+
+        super().__init__(workers, lang)
+        self._apis = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._apis.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.workers:
+                # Counted once built, so a failed init does not use up a slot
+                api = tesserocr.PyTessBaseAPI(lang=self.lang)
+                self._created += 1
+                return api
+
+        return self._apis.get()
+
+    def image_to_string(self, image, psm=PSM_AUTO):
+        api = self._acquire()
+        try:
+            api.SetPageSegMode(psm)
+            api.SetImage(_to_pil(image))
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            self._apis.put(api)
+
+    def close(self):
+        super().close()
+        while not self._apis.empty():
+            self._apis.get_nowait().End()
+
+
+BACKENDS = {
+    "pytesseract": PytesseractBackend,
+    "tesserocr": TesserocrBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_ocr_backend(name=None):
+    """
+    Shared backend instance. name defaults to OCR_BACKEND; "auto" picks
+    tesserocr when it is installed and pytesseract otherwise.
+    """
+    name = name or OCR_BACKEND
+    if name == "auto":
+        name = "tesserocr" if tesserocr is not None else "pytesseract"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown OCR backend: {name} (expected one of {list(BACKENDS)})")
+
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+            print(f"OCR backend: {name} ({_backends[name].workers} workers)")
+        return _backends[name]
@@ -0,0 +1,281 @@
+import ast
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+import torchvision
+
+from backend.core.config import (
+    ONNX_GRAPH_OPT,
+    ONNX_INTRA_OP_THREADS,
+    ONNX_INTER_OP_THREADS,
+    ONNX_OPSET,
+)
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+GRAPH_OPT_LEVELS = ("disable", "basic", "extended", "all")
+
+
+# =========================================================
+# Sessions
+# =========================================================
+def _require_ort():
+    if ort is None:
+        raise RuntimeError("onnxruntime is not installed (pip install onnxruntime)")
+
+
+def session_options(graph_opt=ONNX_GRAPH_OPT,
+                    intra_op_threads=ONNX_INTRA_OP_THREADS,
+                    inter_op_threads=ONNX_INTER_OP_THREADS):
+    _require_ort()
+
+    if graph_opt not in GRAPH_OPT_LEVELS:
+        raise ValueError(f"Unknown ONNX graph optimization level: {graph_opt} "
+                         f"(expected one of {list(GRAPH_OPT_LEVELS)})")
+
+    levels = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = levels[graph_opt]
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    options.execution_mode = (
+        ort.ExecutionMode.ORT_PARALLEL if inter_op_threads > 1 else ort.ExecutionMode.ORT_SEQUENTIAL
+    )
+    return options
+
+
+def create_session(path, **options):
+    """
+    CPU inference session for an .onnx file. Sessions are safe to
+    run from several threads at once.
+    """
+    return ort.InferenceSession(
+        str(path),
+        sess_options=session_options(**options),
+        providers=["CPUExecutionProvider"],
+    )
+
+
+# =========================================================
+# Export
+# =========================================================
+class _LogitsOnly(torch.nn.Module):
+    # Traced graph returns a plain tensor instead of a ModelOutput
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+def export_sequence_classifier(model, tokenizer, dest, opset=ONNX_OPSET):
+    """
+    Exports a transformers sequence-classification model to `dest`
+    with dynamic batch and sequence axes (inputs: input_ids,
+    attention_mask; output: logits).
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_suffix(".tmp")
+
+    sample = tokenizer(["An example premise."], ["This example is a hypothesis."], return_tensors="pt")
+    model.eval()
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model),
+            (sample["input_ids"], sample["attention_mask"]),
+            str(tmp),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset,
+            dynamo=False,
+        )
+
+    tmp.replace(dest)
+    return dest
+
+
+def export_yolo(pt_path, dest, imgsz):
+    """
+    Exports a YOLO checkpoint to `dest` with a dynamic batch axis.
+    Class names travel in the graph metadata.
+    """
+    from ultralytics import YOLO
+
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+
+    exported = YOLO(str(pt_path)).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=False)
+    Path(exported).replace(dest)
+    return dest
+
+
+# =========================================================
+# Models
+# =========================================================
+class OrtZeroShotClassifier:
+    """
+    Zero-shot NLI classification on an exported sequence classifier.
+    Called like the transformers zero-shot pipeline (single-label mode,
+    same hypothesis template and scoring) and returns the same
+    {"sequence", "labels", "scores"} dicts.
+    """
+
+    def __init__(self, path, tokenizer, entailment_id, hypothesis_template="This example is {}.", **session_kwargs):
+        self.session = create_session(path, **session_kwargs)
+        self.nbytes = Path(path).stat().st_size
+        self.tokenizer = tokenizer
+        self.entailment_id = entailment_id
+        self.hypothesis_template = hypothesis_template
+
+    def _logits(self, premises, hypotheses):
+        encoding = self.tokenizer(
+            premises,
+            hypotheses,
+            padding=True,
+            truncation="only_first",
+            return_tensors="np",
+        )
+        return self.session.run(["logits"], {
+            "input_ids": encoding["input_ids"].astype(np.int64),
+            "attention_mask": encoding["attention_mask"].astype(np.int64),
+        })[0]
+
+    def __call__(self, sequences, candidate_labels, batch_size=1, hypothesis_template=None):
+        single = isinstance(sequences, str)
+        sequences = [sequences] if single else list(sequences)
+        candidate_labels = [candidate_labels] if isinstance(candidate_labels, str) else list(candidate_labels)
+        template = hypothesis_template or self.hypothesis_template
+
+        pairs = [(s, template.format(label)) for s in sequences for label in candidate_labels]
+        batch_size = max(1, batch_size)
+
+        logits = np.concatenate([
+            self._logits([p for p, _ in pairs[i:i + batch_size]], [h for _, h in pairs[i:i + batch_size]])
+            for i in range(0, len(pairs), batch_size)
+        ])
+        logits = logits.reshape(len(sequences), len(candidate_labels), -1)
+
+        # Softmax over the entailment logits of all labels
+        entail = logits[..., self.entailment_id]
+        scores = np.exp(entail) / np.exp(entail).sum(-1, keepdims=True)
+
+        results = []
+        for sequence, row in zip(sequences, scores):
+            order = list(reversed(row.argsort()))
+            results.append({
+                "sequence": sequence,
+                "labels": [candidate_labels[i] for i in order],
+                "scores": row[order].tolist(),
+            })
+
+        return results[0] if single else results
+
+
+class _Boxes:
+    # The part of ultralytics' Boxes the pipelines read
+
+    def __init__(self, data):
+        self.data = data
+
+    @property
+    def xyxy(self):
+        return self.data[:, :4]
+
+    @property
+    def conf(self):
+        return self.data[:, 4]
+
+    @property
+    def cls(self):
+        return self.data[:, 5]
+
+    def __len__(self):
+        return len(self.data)
+
+
+class OrtResult:
+
+    def __init__(self, boxes, names):
+        self.boxes = _Boxes(boxes)
+        self.names = names
+
+
+class OrtYolo:
+    """
+    An exported YOLO detector with an ultralytics-style predict():
+    same confidence filter, class-aware NMS and max_det, returning one
+    result per image with .boxes (xyxy / conf / cls tensors) and .names.
+
+    A (B, 3, H, W) tensor in [0, 1] is used as is (boxes in input
+    coordinates, like ultralytics); BGR arrays or paths are
+    letterboxed and their boxes mapped back to the original image.
+    """
+
+    def __init__(self, path, iou=0.7, max_det=300, **session_kwargs):
+        self.session = create_session(path, **session_kwargs)
+        self.nbytes = Path(path).stat().st_size
+        self.iou = iou
+        self.max_det = max_det
+        self.input_name = self.session.get_inputs()[0].name
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata["names"])
+
+    def _postprocess(self, prediction, conf):
+        # (4 + classes, anchors) -> (n, 6): x1, y1, x2, y2, conf, cls
+        prediction = torch.from_numpy(prediction).T
+        scores, classes = prediction[:, 4:].max(1)
+        keep = scores > conf
+
+        xywh = prediction[keep, :4]
+        boxes = torch.cat([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], dim=1)
+        scores, classes = scores[keep], classes[keep]
+
+        kept = torchvision.ops.batched_nms(boxes, scores, classes, self.iou)[:self.max_det]
+        return torch.cat([boxes[kept], scores[kept, None], classes[kept, None].float()], dim=1)
+
+    def predict(self, source, conf=0.25, imgsz=640, verbose=False, **kwargs):
+        from backend.core.detection import preprocess_batch
+
+        metas = None
+        if isinstance(source, torch.Tensor):
+            batch = source
+        else:
+            images = source if isinstance(source, list) else [source]
+            images = [cv2.imread(str(i)) if isinstance(i, (str, Path)) else i for i in images]
+            batch, metas = preprocess_batch(images, imgsz)
+
+        output = self.session.run(None, {self.input_name: batch.numpy().astype(np.float32, copy=False)})[0]
+
+        results = []
+        for i, prediction in enumerate(output):
+            boxes = self._postprocess(prediction, conf)
+
+            if metas is not None:
+                ratio, (pad_x, pad_y), (h, w) = metas[i]
+                boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad_x) / ratio).clamp(0, w)
+                boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad_y) / ratio).clamp(0, h)
+
+            results.append(OrtResult(boxes, self.names))
+
+        return results
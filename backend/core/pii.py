@@ -0,0 +1,146 @@
+import threading
+
+import spacy
+from presidio_analyzer import AnalyzerEngine, RecognizerResult
+from presidio_analyzer.nlp_engine import SpacyNlpEngine
+
+from backend.core.config import PII_CHUNK_CHARS, PII_PARALLEL, PII_RECOGNIZERS, PII_ENTITIES
+from backend.core.executor import submit_cpu
+
+
+# =========================================================
+# Analyzer (one per process)
+# =========================================================
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+# Recognizers that read the NLP engine's named entities, and the
+# entity types they report
+NER_RECOGNIZERS = {"SpacyRecognizer", "StanzaRecognizer", "TransformersRecognizer"}
+NER_ENTITIES = {"PERSON", "LOCATION", "NRP", "DATE_TIME", "ORGANIZATION"}
+
+
+class _NoNerSpacyNlpEngine(SpacyNlpEngine):
+    # Tokens and lemmas only (pattern recognizers still use them for
+    # context words); the NER and parser components are not loaded
+    # or run.
+
+    def load(self):
+        self.nlp = {
+            model["lang_code"]: spacy.load(model["model_name"], exclude=["ner", "parser"])
+            for model in self.models
+        }
+
+
+def needs_ner(recognizers=PII_RECOGNIZERS, entities=PII_ENTITIES):
+    """
+    False when the allow-lists leave no NER-based recognizer or entity,
+    so the spaCy NER pass can be skipped.
+    """
+    if recognizers and not NER_RECOGNIZERS & set(recognizers):
+        return False
+    if entities and not NER_ENTITIES & set(entities):
+        return False
+    return True
+
+
+def get_analyzer():
+    """
+    The Presidio analyzer for this process, restricted to the
+    PII_RECOGNIZERS allow-list when one is configured. When the
+    allow-lists exclude every NER-based recognizer / entity, spaCy
+    runs without its NER and parser.
+    """
+    global _analyzer
+
+    if _analyzer is not None:
+        return _analyzer
+
+    # One build even when the first requests arrive together
+    with _analyzer_lock:
+        if _analyzer is None:
+            if needs_ner():
+                analyzer = AnalyzerEngine()
+            else:
+                nlp_engine = _NoNerSpacyNlpEngine()
+                nlp_engine.load()
+                analyzer = AnalyzerEngine(nlp_engine=nlp_engine)
+                analyzer.registry.recognizers = [
+                    r for r in analyzer.registry.recognizers if r.name not in NER_RECOGNIZERS
+                ]
+                print("Presidio: no NER-based recognizer allowed, spaCy NER disabled")
+
+            if PII_RECOGNIZERS:
+                analyzer.registry.recognizers = [
+                    r for r in analyzer.registry.recognizers if r.name in PII_RECOGNIZERS
+                ]
+                print(f"Presidio recognizers: {', '.join(r.name for r in analyzer.registry.recognizers)}")
+
+            _analyzer = analyzer
+
+    return _analyzer
+
+
+# =========================================================
+# Chunking
+# =========================================================
+def split_text(text, max_chars=PII_CHUNK_CHARS):
+    """
+    Splits text on line boundaries into chunks of at most about
+    max_chars (a single longer line stays whole). Returns a list of
+    (offset, chunk) where offset is the chunk's start in `text`.
+    """
+    if len(text) <= max_chars:
+        return [(0, text)]
+
+    chunks = []
+    start = 0
+    pos = 0
+
+    for line in text.splitlines(keepends=True):
+        if pos + len(line) - start > max_chars and pos > start:
+            chunks.append((start, text[start:pos]))
+            start = pos
+        pos += len(line)
+
+    if start < len(text):
+        chunks.append((start, text[start:]))
+
+    return chunks
+
+
+def _analyze_chunk(chunk, language, entities):
+    """
+    Runs in a worker process. Returns plain tuples (cheap to pickle).
+    """
+    results = get_analyzer().analyze(text=chunk, language=language, entities=entities)
+    return [(r.entity_type, r.start, r.end, r.score) for r in results]
+
+
+# =========================================================
+# Public API
+# =========================================================
+def analyze_text(text, language="en"):
+    """
+    Presidio analysis of text of any size. Large text is split on line
+    boundaries and the chunks are analyzed in parallel on the CPU
+    process pool; spans are shifted back to offsets in `text`.
+    """
+    entities = PII_ENTITIES or None
+    chunks = split_text(text)
+
+    if len(chunks) == 1 or not PII_PARALLEL:
+        return get_analyzer().analyze(text=text, language=language, entities=entities)
+
+    futures = [
+        (offset, submit_cpu(_analyze_chunk, chunk, language, entities))
+        for offset, chunk in chunks
+    ]
+
+    results = []
+    for offset, future in futures:
+        for entity_type, start, end, score in future.result():
+            results.append(RecognizerResult(entity_type, start + offset, end + offset, score))
+
+    results.sort(key=lambda r: (r.start, r.end))
+    return results
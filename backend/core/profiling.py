@@ -0,0 +1,231 @@
+import collections
+import contextvars
+import json
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from backend.core.config import PROFILE_SAMPLE_RATE, PROFILE_INTERVAL_MS, PROFILE_KEEP
+
+
+BASE_PATH = Path(__file__).resolve().parents[2]
+PROFILE_DIR = BASE_PATH / "backend" / "profiles"
+
+_current_profile = contextvars.ContextVar("profile", default=None)
+
+
+# ==========================================================
+# Sampling profiler (one per profiled job)
+# ==========================================================
+# Pipeline work runs on shared inference threads, so a per-thread
+# profiler (cProfile) would miss it or mix jobs. Instead, worker calls
+# made on behalf of a profiled job attach their thread to the job's
+# profiler (inference threads in executor, micro-batch workers in
+# batching, OCR workers in ocr), and a sampler thread records the
+# stacks of the attached threads every PROFILE_INTERVAL_MS. The result
+# is written in the collapsed-stack format that flamegraph.pl and
+# speedscope read. Chunks sent to the CPU process pool are not sampled;
+# their time shows up as the caller waiting on the result.
+
+def _frame_name(frame):
+    code = frame.f_code
+    path = Path(code.co_filename)
+    return f"{code.co_name} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+
+def _fold(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+
+    def __init__(self, job_id, interval_ms=PROFILE_INTERVAL_MS):
+        self.job_id = job_id
+        self.interval = max(0.001, interval_ms / 1000.0)
+        self.stacks = collections.Counter()
+        self.samples = 0
+
+        self._threads = collections.Counter()   # thread ident -> attach depth
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name=f"profiler-{job_id[:8]}", daemon=True)
+        self._started = None
+        self.duration = 0.0
+
+    def attach(self):
+        with self._lock:
+            self._threads[threading.get_ident()] += 1
+
+    def detach(self):
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] -= 1
+            if self._threads[ident] <= 0:
+                del self._threads[ident]
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                idents = [i for i in self._threads if i != own]
+            if not idents:
+                continue
+
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[_fold(frame)] += 1
+                    self.samples += 1
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self._started
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit=20):
+        """
+        Leaf frames with the most samples (where the time was spent).
+        """
+        leaves = collections.Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [{"function": name, "samples": count} for name, count in leaves.most_common(limit)]
+
+
+def current_profile():
+    return _current_profile.get()
+
+
+@contextmanager
+def attached(*profiles):
+    """
+    Attaches the calling thread to `profiles` (by default the current
+    job's profiler, if any) for the duration of the block.
+    """
+    if not profiles:
+        profiles = (_current_profile.get(),)
+    profiles = [p for p in profiles if p is not None]
+
+    for profile in profiles:
+        profile.attach()
+    try:
+        yield
+    finally:
+        for profile in profiles:
+            profile.detach()
+
+
+def should_profile(requested=False, sample_rate=PROFILE_SAMPLE_RATE):
+    return bool(requested) or (sample_rate > 0 and random.random() < sample_rate)
+
+
+# ==========================================================
+# Stored profiles
+# ==========================================================
+
+class ProfileStore:
+    """
+    Profiles under PROFILE_DIR: <job_id>.folded (collapsed stacks) and
+    <job_id>.json (job metadata and top functions). Only the newest
+    `keep` profiles are kept.
+    """
+
+    def __init__(self, profile_dir=PROFILE_DIR, keep=PROFILE_KEEP):
+        self.profile_dir = Path(profile_dir)
+        self.keep = keep
+
+    def _check(self, job_id):
+        # Job ids are generated by the server (uuid hex)
+        if not job_id.isalnum():
+            raise KeyError(job_id)
+        return job_id
+
+    def path(self, job_id, suffix=".folded"):
+        return self.profile_dir / f"{self._check(job_id)}{suffix}"
+
+    def save(self, profile, **meta):
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+
+        meta = dict(
+            meta,
+            job_id=profile.job_id,
+            created=time.time(),
+            duration_s=round(profile.duration, 3),
+            interval_ms=round(profile.interval * 1000.0, 2),
+            samples=profile.samples,
+            top_functions=profile.top_functions(),
+        )
+        self.path(profile.job_id).write_text(profile.folded())
+        self.path(profile.job_id, ".json").write_text(json.dumps(meta, default=str))
+
+        self.prune()
+        return meta
+
+    def list(self):
+        if not self.profile_dir.exists():
+            return []
+
+        entries = []
+        for path in self.profile_dir.glob("*.json"):
+            try:
+                meta = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            meta.pop("top_functions", None)
+            entries.append(meta)
+
+        return sorted(entries, key=lambda m: m.get("created", 0), reverse=True)
+
+    def prune(self):
+        if self.keep <= 0:
+            return
+
+        metas = sorted(self.profile_dir.glob("*.json"), key=os.path.getmtime, reverse=True)
+        for path in metas[self.keep:]:
+            path.with_suffix(".folded").unlink(missing_ok=True)
+            path.unlink(missing_ok=True)
+
+
+profile_store = ProfileStore()
+
+
+@contextmanager
+def profile_job(job_id, enabled, **meta):
+    """
+    Profiles the block (and every worker call it makes) when `enabled`.
+    Yields the profiler or None; the profile is saved when the block ends.
+    """
+    if not enabled:
+        yield None
+        return
+
+    profile = SamplingProfiler(job_id)
+    token = _current_profile.set(profile)
+    profile.start()
+    status = "ok"
+    try:
+        yield profile
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        profile.stop()
+        _current_profile.reset(token)
+        saved = profile_store.save(profile, status=status, **meta)
+        print(f"Profile {job_id}: {saved['samples']} samples over {saved['duration_s']}s")
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from backend.core import config
+from backend.core.config import (
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_MB,
+    RESULT_CACHE_TTL_HOURS,
+)
+from backend.core.metrics import register_collector
+from backend.core.model_manager import MODEL_VERSIONS
+
+
+BASE_PATH = Path(__file__).resolve().parents[2]
+RESULT_CACHE_DIR = BASE_PATH / "backend" / "cache" / "results"
+
+# Deployment settings that change what a pipeline returns
+RESULT_SETTINGS = [
+    "BART_BACKEND",
+    "YOLO_BACKEND",
+    "BART_PRECISION",
+    "BLIP2_PRECISION",
+    "YOLO_PRECISION",
+    "CAPTION_TIER",
+    "CAPTION_BUDGET_MS",
+    "CAPTION_MAX_TOKENS",
+    "YOLO_IMGSZ",
+    "YOLO_CONF",
+    "YOLO_MERGE_IOU",
+    "VIDEO_YOLO_MODELS",
+    "VIDEO_DETECT_STRIDE",
+    "VIDEO_PROVISIONAL_CLASSIFIER",
+    "OCR_DEDUP",
+    "OCR_DEDUP_MAX_DISTANCE",
+    "OCR_BACKEND",
+    "OCR_LANG",
+    "TEXT_DETECT",
+    "TEXT_DETECT_SIZE",
+    "TEXT_DETECT_CONF",
+    "TEXT_DETECT_NMS",
+    "TEXT_REGION_PAD",
+    "TEXT_FULL_PAGE_RATIO",
+    "KEYFRAME_MODE",
+    "KEYFRAME_THUMB_WIDTH",
+    "EMBED_FALLBACK_MARGIN",
+    "CLASSIFY_WINDOW_TOKENS",
+    "CLASSIFY_WINDOW_OVERLAP",
+    "CLASSIFY_AGGREGATE",
+    "CLASSIFY_EARLY_STOP",
+    "PII_RECOGNIZERS",
+    "PII_ENTITIES",
+    "PII_CHUNK_CHARS",
+]
+
+
+# ==========================================================
+# Content-addressed result cache
+# ==========================================================
+# Results are stored as JSON files named by a key derived from the
+# upload's content hash and everything that can change the result
+# (file type, request options, model versions). Entries expire after
+# a TTL and the oldest-used ones are removed past a size limit.
+
+class ResultCache:
+
+    def __init__(self, cache_dir=RESULT_CACHE_DIR, max_mb=RESULT_CACHE_MAX_MB,
+                 ttl_hours=RESULT_CACHE_TTL_HOURS, enabled=RESULT_CACHE_ENABLED):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_hours * 3600
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(content_hash, file_type, **options):
+        """
+        Cache key for one analysis of one file. Every option that
+        changes the result must be passed in `options`.
+        """
+        payload = {
+            "content_hash": content_hash,
+            "file_type": file_type,
+            "options": options,
+            "models": MODEL_VERSIONS,
+            "settings": {name: getattr(config, name) for name in RESULT_SETTINGS},
+        }
+        raw = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        if self.ttl_seconds > 0 and time.time() - stat.st_mtime > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        # Record the use for size-based (least recently used) eviction
+        os.utime(path, (time.time(), stat.st_mtime))
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.replace(tmp, path)
+
+        self.evict()
+
+    def evict(self):
+        """
+        Drops expired entries, then least recently used ones until
+        the cache fits in max_mb.
+        """
+        with self._lock:
+            now = time.time()
+            entries = []
+
+            for path in self.cache_dir.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+
+                if self.ttl_seconds > 0 and now - stat.st_mtime > self.ttl_seconds:
+                    path.unlink(missing_ok=True)
+                    continue
+
+                entries.append((stat.st_atime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            if self.max_bytes <= 0 or total <= self.max_bytes:
+                return
+
+            for _, size, path in sorted(entries):
+                path.unlink(missing_ok=True)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+result_cache = ResultCache()
+
+
+@register_collector
+def _result_cache_metrics():
+    stats = result_cache.stats()
+    return [
+        ("result_cache_hits_total", "counter", "Result cache lookups that returned a stored result",
+         [({}, stats["hits"])]),
+        ("result_cache_misses_total", "counter", "Result cache lookups without a usable entry",
+         [({}, stats["misses"])]),
+        ("result_cache_hit_ratio", "gauge", "Hits / lookups since start",
+         [({}, stats["hit_rate"])]),
+    ]
@@ -1,76 +1,205 @@
 import cv2
+import numpy as np
 from PIL import Image
-import pytesseract
 from ultralytics import YOLO
-from presidio_analyzer import AnalyzerEngine
 
-from backend.core.model_manager import get_classifier, get_blip, load_yolo_models
+from backend.core.model_manager import load_yolo_models
+from backend.core.captioning import caption_image
+from backend.core.classification import (  # noqa: F401
+    CANDIDATE_LABELS, classify, classify_batch, classify_long, classify_long_batch,
+)
+from backend.core.detection import get_ensemble, get_video_ensemble, detection_labels
+from backend.core.frame_dedup import FrameDeduper
+from backend.core.pii import analyze_text  # noqa: F401
+from backend.core.ocr import PSM_SINGLE_LINE, get_ocr_backend
+from backend.core.text_regions import detect_text_regions, covers_page, crop_region
+from backend.core.config import (
+    OCR_DEDUP,
+    OCR_DEDUP_MAX_DISTANCE,
+    YOLO_CONF,
+    YOLO_BATCH_SIZE,
+)
 
-classifier = get_classifier()
-processor, blip_model = get_blip()
-yolo_models = load_yolo_models()
+# Models are loaded on first use through the model registry
+# (see model_manager.registry); nothing heavy happens at import.
 
 
 
 
+# =========================================================
+# Shared helpers
+# =========================================================
+def submit_ocr(frame, backend=None):
+    """
+    Queues OCR for one BGR frame on the OCR workers.
 
+    Text regions are located first and only those crops are OCR'd, one
+    future per line; a frame without text regions gets no OCR at all.
+    Returns (regions, futures); regions is None when text detection is
+    unavailable and the whole frame is OCR'd.
+    """
+    backend = backend or get_ocr_backend()
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    regions = detect_text_regions(frame)
 
+    if regions is None or covers_page(regions, frame.shape):
+        return regions, [backend.submit(gray)]
 
-analyzer = AnalyzerEngine()
+    return regions, [backend.submit(crop_region(gray, r["box"]), PSM_SINGLE_LINE) for r in regions]
 
-CANDIDATE_LABELS = [
-    "identity information such as a person's name, ID badge or face",
-    "financial information such as bank details or payment cards",
-    "medical or health information",
-    "contact information such as phone number or email",
-    "location or address information",
-    "vehicle information such as license plate numbers",
-    "digital screen content showing private messages",
-    "non-sensitive public information"
-]
 
-# =========================================================
-# Shared helpers
-# =========================================================
-def run_ocr(image_path):
-    return pytesseract.image_to_string(Image.open(image_path))
+def collect_ocr(regions, futures):
+    """
+    Waits for submit_ocr() futures. Returns (text, regions) with the
+    text of each region attached when it was OCR'd on its own.
+    """
+    texts = [f.result().strip() for f in futures]
 
+    if regions is None or len(futures) != len(regions):
+        return "\n".join(t for t in texts if t), regions
 
+    regions = [dict(r, text=t) for r, t in zip(regions, texts)]
+    return "\n".join(t for t in texts if t), regions
 
-def run_ocr_on_video(video_path):
+
+def run_ocr(image_path, return_regions=False):
     """
-    Runs OCR on a video and returns extracted text.
+    OCR of an image file (restricted to detected text regions).
+    With return_regions=True returns (text, regions).
     """
+    image = cv2.cvtColor(np.array(Image.open(image_path).convert("RGB")), cv2.COLOR_RGB2BGR)
+    text, regions = collect_ocr(*submit_ocr(image))
+
+    if return_regions:
+        return text, regions
+    return text
 
+
+
+def iter_video_frames(video_path):
+    """
+    Yields every decoded frame (BGR) of a video.
+    """
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         raise ValueError("Could not open video file")
 
-    final_text = []
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+class VideoOcr:
+    """
+    OCR over consecutive batches of BGR frames (e.g. video segments),
+    keeping dedup state between batches.
+
+    With `dedup`, frames whose perceptual hash is within
+    OCR_DEDUP_MAX_DISTANCE bits of the last OCR'd frame are not sent
+    to tesseract; the previous frame's text is reused instead. Frames
+    without detected text regions are not OCR'd either.
+    """
+
+    def __init__(self, dedup=OCR_DEDUP):
+        self.deduper = FrameDeduper(max_distance=OCR_DEDUP_MAX_DISTANCE) if dedup else None
+        self.backend = get_ocr_backend()
+        self.frames = 0
+        self.without_text = 0
+        self.text_regions = 0
+        self._current = None
+        self._last = None   # (position, (text, regions)) of the last OCR'd frame
+
+    def process(self, frames):
+        """
+        Returns (text, regions) for this batch of frames; each region
+        carries the position of its frame among all frames processed.
+        """
+        # Frames are submitted to the OCR workers as they arrive; a duplicate
+        # frame points at the work of the last frame that was OCR'd.
+        pending = []
+
+        for frame in frames:
+            position = self.frames
+            self.frames += 1
+
+            if self.deduper is None or not self.deduper.is_duplicate(frame):
+                self._current = (position, *submit_ocr(frame, self.backend))
+
+            pending.append(self._current)
+
+        final_text = []
+        new_regions = []
+        collected = dict([self._last]) if self._last else {}
+
+        for position, regions, futures in pending:
+            if position not in collected:
+                collected[position] = collect_ocr(regions, futures)
+                new_regions.extend(dict(r, frame=position) for r in collected[position][1] or [])
+                if regions == []:
+                    self.without_text += 1
+
+            text = collected[position][0]
+            if text:
+                final_text.append(text)
+
+        if pending:
+            self._last = (pending[-1][0], collected[pending[-1][0]])
+        self.text_regions += len(new_regions)
+
+        return "\n".join(final_text), new_regions
+
+    def stats(self):
+        stats = self.deduper.stats() if self.deduper else {
+            "frames": self.frames,
+            "processed": self.frames,
+            "skipped": 0,
+        }
+        stats["without_text"] = self.without_text
+        stats["text_regions"] = self.text_regions
+        return stats
+
+
+def run_ocr_on_frames(frames, dedup=OCR_DEDUP, return_regions=False):
+    """
+    Runs OCR on a sequence of BGR frames (see VideoOcr).
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    Returns (text, stats) where stats counts skipped frames, or
+    (text, stats, regions) with return_regions=True; each region
+    carries the position of its frame in `frames`.
+    """
+    ocr = VideoOcr(dedup=dedup)
+    text, regions = ocr.process(frames)
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if return_regions:
+        return text, ocr.stats(), regions
+    return text, ocr.stats()
 
-        text = pytesseract.image_to_string(gray)
-        text = text.strip()
 
-        if text:
-            final_text.append(text)
+def run_ocr_on_video(video_path, dedup=OCR_DEDUP, return_stats=False):
+    """
+    Runs OCR on a video and returns extracted text
+    (and dedup stats with return_stats=True).
+    """
+    text, stats = run_ocr_on_frames(iter_video_frames(video_path), dedup=dedup)
 
-    cap.release()
+    if stats["skipped"]:
+        print(f"OCR dedup: skipped {stats['skipped']}/{stats['frames']} near-duplicate frames")
 
-    return "\n".join(final_text)
+    if return_stats:
+        return text, stats
+    return text
 
 
 
 def detect_objects(image):
     objects = []
     
-    for model in yolo_models:
+    for model in load_yolo_models():
         results = model.predict(image, conf=0.5)
         for r in results:
             if r.boxes is not None:
@@ -103,83 +232,147 @@ def predict_and_detect(chosen_model, img, classes=[], conf=0.5, rectangle_thickn
 
 
 
-def detect_objects_on_image(image):
+def detect_objects_on_image(image, return_detections=False):
+    """
+    Runs the YOLO ensemble once on the image (shared preprocessing,
+    batched with concurrent requests). Returns the sorted object names,
+    or (names, detections) where each detection carries its box,
+    confidence and the models that found it.
+    """
     image = cv2.imread(image)
-    result_img1, det_obj1, results1 = predict_and_detect(yolo_models[0], image, classes=[], conf=0.5)
-    result_img2, det_obj2, results2 = predict_and_detect(yolo_models[1], image, classes=[], conf=0.5)
-    result_img3, det_obj3, results3 = predict_and_detect(yolo_models[2], image, classes=[], conf=0.5)
-    objects = list(set(det_obj1 + det_obj2 + det_obj3))
-    return sorted({obj.strip().lower() for obj in objects})
+    detections = get_ensemble().detect(image)
+    objects = detection_labels(detections)
 
-import cv2
+    if return_detections:
+        return objects, detections
+    return objects
 
+def iter_sampled_frames(video_path, skip_frames=5):
+    """
+    Decodes a video in one forward pass and yields every
+    `skip_frames`-th frame as (frame_index, timestamp_seconds, frame).
+    Skipped frames are only grab()bed, never converted.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError("Could not open video file")
 
-def detect_objects_in_video(video_path,
-                       skip_frames=5,
-                       conf=0.5,
-                       display=False):
-    return []
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    step = max(1, int(skip_frames))
+    frame_idx = 0
 
-def detect_objects_in_video(video_path,
-                       skip_frames=5,
-                       conf=0.5,
-                       display=False):
+    try:
+        while cap.grab():
+            if frame_idx % step == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                timestamp = frame_idx / fps if fps > 0 else 0.0
+                yield frame_idx, timestamp, frame
+            frame_idx += 1
+    finally:
+        cap.release()
 
-    cap = cv2.VideoCapture(video_path)
 
-    if not cap.isOpened():
-        print("Error: Cannot open video.")
-        return
+def detect_objects_in_frames(sampled_frames, conf=YOLO_CONF, batch_size=YOLO_BATCH_SIZE):
+    """
+    Runs the video detector on (frame_index, timestamp, frame) tuples in
+    batches and aggregates detections over the whole sequence.
 
-    frame_id = 0
+    Returns {label: {"count", "frames", "first_seen", "max_confidence"}}
+    where count is the number of boxes and frames the number of sampled
+    frames the label appeared in.
+    """
+    detector = get_video_ensemble()
+    summary = {}
+    batch = []
 
-    while True:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_id)
-        ret, frame = cap.read()
+    def flush():
+        detections = detector.detect_batch([frame for _, _, frame in batch], conf=conf)
 
-        if not ret:
-            break
+        for (_, timestamp, _), dets in zip(batch, detections):
+            for label in detection_labels(dets):
+                entry = summary.setdefault(label, {
+                    "count": 0,
+                    "frames": 0,
+                    "first_seen": round(timestamp, 2),
+                    "max_confidence": 0.0,
+                })
+                entry["frames"] += 1
 
-        result_img1, det_obj1, results1 = predict_and_detect(
-            yolo_models[2], frame, classes=[], conf=conf)
+            for det in dets:
+                entry = summary[det["label"]]
+                entry["count"] += 1
+                entry["max_confidence"] = max(entry["max_confidence"], det["confidence"])
 
-      
-        
+        batch.clear()
 
-        if display:
-            cv2.imshow("Detection", result_img1)
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+    for item in sampled_frames:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    return summary
 
-        frame_id += skip_frames  # Skip frames for speed
 
-    cap.release()
-    cv2.destroyAllWindows()
-    return sorted({obj.strip().lower() for obj in det_obj1})    
+def merge_object_summaries(total, part):
+    """
+    Adds a detect_objects_in_frames() summary of later frames into
+    `total` (in place) and returns it.
+    """
+    for label, entry in part.items():
+        if label not in total:
+            total[label] = dict(entry)
+            continue
+
+        merged = total[label]
+        merged["count"] += entry["count"]
+        merged["frames"] += entry["frames"]
+        merged["first_seen"] = min(merged["first_seen"], entry["first_seen"])
+        merged["max_confidence"] = max(merged["max_confidence"], entry["max_confidence"])
 
+    return total
 
 
+def detect_objects_in_video(video_path,
+                       skip_frames=5,
+                       conf=YOLO_CONF,
+                       return_summary=False):
+    """
+    Samples every `skip_frames`-th frame with sequential decoding and
+    detects objects across the whole video. Returns the sorted object
+    names, or (names, summary) with per-label counts and first-seen
+    timestamps.
+    """
+    try:
+        summary = detect_objects_in_frames(
+            iter_sampled_frames(video_path, skip_frames),
+            conf=conf
+        )
+    except ValueError:
+        print("Error: Cannot open video.")
+        summary = {}
 
+    objects = sorted(summary)
 
-def generate_caption(image_path, max_tokens=50):
-    image = Image.open(image_path).convert("RGB")
-    # processor, blip_model = ensure_blip2_model()
+    if return_summary:
+        return objects, summary
+    return objects
 
-    inputs = processor(images=image, return_tensors="pt")
-    ids = blip_model.generate(**inputs, max_new_tokens=max_tokens)
-    return processor.decode(ids[0], skip_special_tokens=True)
-    # return "A caption describing the image."
 
-def classify(text):
-    # clf = get_classifier()
-    # clf = ensure_bart_model()
-    result = classifier(text, candidate_labels=CANDIDATE_LABELS)
-    return result
 
 
-def analyze_text(text, language="en"):
-    return analyzer.analyze(text=text, language=language)
 
+def generate_caption(image_path, max_tokens=50, tier=None):
+    """
+    image_path: an image path or an in-memory BGR array.
+    Returns the caption text; see captioning.caption_image for the
+    tier / model that produced it.
+    """
+    return caption_image(image_path, tier=tier, max_tokens=max_tokens)["caption"]
 
 def convert_text_segments(text_segments):
     """
@@ -0,0 +1,138 @@
+import threading
+
+import cv2
+import numpy as np
+
+from backend.core.config import (
+    TEXT_DETECT,
+    TEXT_DETECT_SIZE,
+    TEXT_REGION_PAD,
+    TEXT_FULL_PAGE_RATIO,
+)
+from backend.core.model_manager import get_text_detector
+
+# Crops shorter than this are upscaled before OCR (tesseract reads
+# glyphs of ~20-30 px best)
+MIN_CROP_HEIGHT = 32
+
+# cv2.dnn models are not safe to call from several threads at once
+_detect_lock = threading.Lock()
+
+
+# =========================================================
+# Box helpers
+# =========================================================
+def _input_size(shape, size=TEXT_DETECT_SIZE):
+    """
+    EAST input (w, h): long side scaled to `size`, both multiples of 32.
+    """
+    h, w = shape[:2]
+    scale = size / max(h, w)
+    return (
+        max(32, int(round(w * scale / 32)) * 32),
+        max(32, int(round(h * scale / 32)) * 32),
+    )
+
+
+def quad_to_box(quad, shape, pad=TEXT_REGION_PAD):
+    """
+    Rotated EAST quadrilateral -> padded, clipped [x1, y1, x2, y2].
+    """
+    h, w = shape[:2]
+    pts = np.asarray(quad, dtype=np.float32).reshape(-1, 2)
+    x1, y1 = pts.min(axis=0) - pad
+    x2, y2 = pts.max(axis=0) + pad
+    return [
+        int(max(0, x1)),
+        int(max(0, y1)),
+        int(min(w, x2)),
+        int(min(h, y2)),
+    ]
+
+
+def merge_line_boxes(regions, max_gap=1.0):
+    """
+    Joins word boxes that sit on the same line (vertical overlap above
+    half the smaller height, horizontal gap below `max_gap` box heights)
+    so tesseract sees whole lines. Returns regions in reading order.
+    """
+    lines = []
+
+    for region in sorted(regions, key=lambda r: (r["box"][0], r["box"][1])):
+        x1, y1, x2, y2 = region["box"]
+
+        for line in lines:
+            lx1, ly1, lx2, ly2 = line["box"]
+            overlap = min(y2, ly2) - max(y1, ly1)
+            height = min(y2 - y1, ly2 - ly1)
+            gap = x1 - lx2
+
+            if height > 0 and overlap >= 0.5 * height and gap <= max_gap * height:
+                line["box"] = [min(x1, lx1), min(y1, ly1), max(x2, lx2), max(y2, ly2)]
+                line["confidence"] = max(line["confidence"], region["confidence"])
+                break
+        else:
+            lines.append({"box": list(region["box"]), "confidence": region["confidence"]})
+
+    return sorted(lines, key=lambda r: (r["box"][1], r["box"][0]))
+
+
+def covers_page(regions, shape, ratio=TEXT_FULL_PAGE_RATIO):
+    """
+    True when the regions cover so much of the image (documents,
+    screenshots) that one full-page OCR pass is cheaper than per-line crops.
+    """
+    if not regions or ratio <= 0:
+        return False
+
+    mask = np.zeros(shape[:2], dtype=np.uint8)
+    for r in regions:
+        x1, y1, x2, y2 = r["box"]
+        mask[y1:y2, x1:x2] = 1
+
+    return mask.mean() > ratio
+
+
+def crop_region(image, box):
+    x1, y1, x2, y2 = box
+    crop = image[y1:y2, x1:x2]
+
+    if 0 < crop.shape[0] < MIN_CROP_HEIGHT:
+        factor = MIN_CROP_HEIGHT / crop.shape[0]
+        crop = cv2.resize(crop, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+
+    return crop
+
+
+# =========================================================
+# Detection
+# =========================================================
+def detect_text_regions(image):
+    """
+    Finds text lines in a BGR image with the EAST detector.
+
+    Returns a list of {"box": [x1, y1, x2, y2], "confidence"} in
+    reading order, or None when detection is disabled / the model is
+    not installed (callers then OCR the full frame).
+    """
+    if not TEXT_DETECT:
+        return None
+
+    model = get_text_detector()
+    if model is None:
+        return None
+
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+    with _detect_lock:
+        model.setInputSize(_input_size(image.shape))
+        quads, confidences = model.detect(image)
+
+    regions = [
+        {"box": quad_to_box(q, image.shape), "confidence": round(float(c), 4)}
+        for q, c in zip(quads, np.ravel(confidences))
+    ]
+    regions = [r for r in regions if r["box"][2] > r["box"][0] and r["box"][3] > r["box"][1]]
+
+    return merge_line_boxes(regions)
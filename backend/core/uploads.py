@@ -0,0 +1,289 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from pathlib import Path
+
+from backend.core.config import UPLOAD_MAX_MB, UPLOAD_PARTIAL_TTL_HOURS
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+UPLOAD_MAX_BYTES = UPLOAD_MAX_MB * 1024 * 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class UploadConflict(ValueError):
+    pass
+
+
+# ==========================================================
+# Upload storage with content hashing
+# ==========================================================
+
+def hash_sidecar(file_path):
+    """
+    Path of the file holding an upload's sha256 next to the upload.
+    """
+    file_path = Path(file_path)
+    return file_path.with_name(file_path.name + ".sha256")
+
+
+def upload_name(upload_id, filename):
+    """
+    Stored file name; only the base name of the client's file name is kept.
+    """
+    return f"{upload_id}_{Path(filename or 'upload').name}"
+
+
+def resolve_upload(upload_dir, file_id):
+    """
+    Path of a stored upload from a client-supplied file id. Raises
+    ValueError for ids that resolve outside upload_dir (including its
+    .partial directory) and for hash sidecars.
+    """
+    upload_dir = Path(upload_dir).resolve()
+    path = (upload_dir / str(file_id)).resolve()
+
+    if path.parent != upload_dir or path.name.endswith(".sha256"):
+        raise ValueError(f"Invalid file id: {file_id}")
+    return path
+
+
+def _write_chunk(buffer, hasher, chunk):
+    # Runs off the event loop; hashlib releases the GIL on large buffers
+    buffer.write(chunk)
+    hasher.update(chunk)
+
+
+async def write_stream(chunks, buffer, hasher, start=0, max_bytes=UPLOAD_MAX_BYTES):
+    """
+    Writes an async iterator of byte chunks to an open file, updating
+    `hasher` in the same pass. Raises UploadTooLarge as soon as
+    start + written exceeds max_bytes (0 = no limit).
+    Returns the number of bytes written.
+    """
+    written = 0
+
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        written += len(chunk)
+        if max_bytes and start + written > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes // (1024 * 1024)} MB")
+        await asyncio.to_thread(_write_chunk, buffer, hasher, chunk)
+
+    return written
+
+
+async def save_upload_stream(chunks, dest_path, max_bytes=UPLOAD_MAX_BYTES):
+    """
+    Streams chunks to dest_path without blocking the event loop,
+    hashing them in the same pass; the hash is stored in a sidecar.
+    Returns (sha256_hex, size_in_bytes). A partial file is removed when
+    the upload is rejected or interrupted.
+    """
+    hasher = hashlib.sha256()
+    dest_path = Path(dest_path)
+
+    try:
+        with open(dest_path, "wb") as buffer:
+            size = await write_stream(chunks, buffer, hasher, max_bytes=max_bytes)
+    except BaseException:
+        dest_path.unlink(missing_ok=True)
+        raise
+
+    content_hash = hasher.hexdigest()
+    hash_sidecar(dest_path).write_text(content_hash)
+    return content_hash, size
+
+
+def _hash_file(file_path, chunk_size=UPLOAD_CHUNK_SIZE):
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher
+
+
+def upload_hash(file_path, chunk_size=UPLOAD_CHUNK_SIZE, store=True):
+    """
+    sha256 of an uploaded file: read from its sidecar when present,
+    otherwise computed from the file itself (and stored if `store`).
+    """
+    sidecar = hash_sidecar(file_path)
+    if sidecar.exists():
+        return sidecar.read_text().strip()
+
+    hasher = _hash_file(file_path, chunk_size)
+    content_hash = hasher.hexdigest()
+    if store:
+        sidecar.write_text(content_hash)
+    return content_hash
+
+
+# ==========================================================
+# Resumable uploads
+# ==========================================================
+# A client announces the file (name, total size, optional sha256),
+# then sends it in any number of PATCH requests, each starting at the
+# offset the server reports. Bytes already written survive a dropped
+# connection or a server restart, so a transfer resumes instead of
+# starting over. Once all bytes have arrived the file is moved into
+# the upload directory exactly like a single-request upload.
+
+class ResumableUploads:
+
+    def __init__(self, upload_dir, max_bytes=UPLOAD_MAX_BYTES, ttl_hours=UPLOAD_PARTIAL_TTL_HOURS):
+        self.upload_dir = Path(upload_dir)
+        self.partial_dir = self.upload_dir / ".partial"
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_hours * 3600
+
+        # upload_id -> (sha256 of the bytes written so far, offset it covers)
+        self._hashers = {}
+        self._locks = {}
+
+    def _meta_path(self, upload_id):
+        return self.partial_dir / f"{upload_id}.json"
+
+    def _part_path(self, upload_id):
+        return self.partial_dir / f"{upload_id}.part"
+
+    def _load(self, upload_id):
+        # Ids are generated here (uuid hex); anything else is unknown
+        if not upload_id.isalnum():
+            raise KeyError(upload_id)
+
+        meta_path = self._meta_path(upload_id)
+        if not meta_path.exists():
+            raise KeyError(upload_id)
+        return json.loads(meta_path.read_text())
+
+    def create(self, filename, size, content_type=None, sha256=None):
+        if size < 0:
+            raise ValueError("size must be >= 0")
+        if self.max_bytes and size > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {self.max_bytes // (1024 * 1024)} MB")
+
+        self.cleanup()
+
+        upload_id = uuid.uuid4().hex
+        meta = {
+            "upload_id": upload_id,
+            "file_name": upload_name(upload_id, filename),
+            "content_type": content_type,
+            "size": size,
+            "sha256": sha256.lower() if sha256 else None,
+            "created": time.time(),
+        }
+        self._meta_path(upload_id).write_text(json.dumps(meta))
+        self._part_path(upload_id).touch()
+
+        return self.status(upload_id)
+
+    def status(self, upload_id):
+        meta = self._load(upload_id)
+        part = self._part_path(upload_id)
+        offset = part.stat().st_size if part.exists() else 0
+
+        return {
+            "upload_id": upload_id,
+            "file_name": meta["file_name"],
+            "size": meta["size"],
+            "offset": offset,
+            "complete": False,
+        }
+
+    async def append(self, upload_id, offset, chunks):
+        """
+        Appends a request body at `offset` (which must equal the bytes
+        already received). Returns the new status, or the final upload
+        info (file_name, content_hash, size, complete=True) once the
+        last byte has arrived.
+        """
+        meta = self._load(upload_id)
+        lock = self._locks.setdefault(upload_id, asyncio.Lock())
+        if lock.locked():
+            raise UploadConflict("Another request is writing to this upload")
+
+        async with lock:
+            part = self._part_path(upload_id)
+            current = part.stat().st_size
+
+            if offset != current:
+                raise UploadConflict(f"Offset mismatch: server has {current} bytes, request starts at {offset}")
+
+            hasher, hashed = self._hashers.get(upload_id, (None, -1))
+            if hashed != current:
+                # First request after a restart / failure: rebuild the hash of the stored prefix
+                hasher = await asyncio.to_thread(_hash_file, part)
+
+            try:
+                with open(part, "ab") as buffer:
+                    written = await write_stream(chunks, buffer, hasher, start=current, max_bytes=meta["size"])
+            except UploadTooLarge:
+                self._hashers.pop(upload_id, None)
+                raise UploadTooLarge(f"Body runs past the announced size of {meta['size']} bytes")
+            except BaseException:
+                # Keep what was written; the next request rehashes it
+                self._hashers.pop(upload_id, None)
+                raise
+
+            offset = current + written
+            self._hashers[upload_id] = (hasher, offset)
+
+            if offset < meta["size"]:
+                return self.status(upload_id)
+
+            return await asyncio.to_thread(self._finalize, upload_id, meta, hasher)
+
+    def _finalize(self, upload_id, meta, hasher):
+        content_hash = hasher.hexdigest()
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+
+        if meta["sha256"] and meta["sha256"] != content_hash:
+            self.abort(upload_id)
+            raise ValueError(f"sha256 mismatch: expected {meta['sha256']}, received {content_hash}")
+
+        dest = self.upload_dir / meta["file_name"]
+        self._part_path(upload_id).replace(dest)
+        hash_sidecar(dest).write_text(content_hash)
+        self._meta_path(upload_id).unlink(missing_ok=True)
+
+        return {
+            "upload_id": upload_id,
+            "file_name": meta["file_name"],
+            "content_type": meta["content_type"],
+            "content_hash": content_hash,
+            "size": meta["size"],
+            "complete": True,
+        }
+
+    def abort(self, upload_id):
+        self._load(upload_id)
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+        self._part_path(upload_id).unlink(missing_ok=True)
+        self._meta_path(upload_id).unlink(missing_ok=True)
+
+    def cleanup(self):
+        """
+        Deletes unfinished uploads older than the TTL.
+        """
+        if self.ttl_seconds <= 0:
+            return
+
+        cutoff = time.time() - self.ttl_seconds
+        for meta_path in self.partial_dir.glob("*.json"):
+            part = self._part_path(meta_path.stem)
+            last_write = part.stat().st_mtime if part.exists() else meta_path.stat().st_mtime
+            if last_write < cutoff:
+                part.unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+                self._hashers.pop(meta_path.stem, None)
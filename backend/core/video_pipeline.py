@@ -2,214 +2,138 @@
 
 # ========================= no highlight ================================
 
-import os
+import asyncio
+import base64
+import time
 import cv2
 import numpy as np
 import tempfile
-from PIL import Image
-from skimage.metrics import structural_similarity as ssim
 
 from backend.core.shared import (
+    VideoOcr,
     convert_text_segments,
-    run_ocr_on_video,
-    detect_objects_in_video,
-    generate_caption,
-    classify,
+    run_ocr_on_frames,
+    detect_objects_in_frames,
+    merge_object_summaries,
+    caption_image,
+    classify_long,
     analyze_text
 )
+from backend.core.classification import aggregate_results, classify_provisional
+from backend.core.executor import run_in_thread, run_stage
+from backend.core.keyframes import (
+    Keyframe,
+    KeyframeExtractor,
+    KeyframeStore,
+    iter_decoded_frames,
+)
+from backend.core.config import KEYFRAME_MODE, VIDEO_DETECT_STRIDE, VIDEO_SEGMENT_SECONDS
 
 
 # =========================================================
 # Keyframe extraction
 # =========================================================
-def extract_keyframes(video_path, output_dir):
-    cap = cv2.VideoCapture(video_path)
-    ret, prev = cap.read()
-    if not ret:
-        return []
-
-    prev_gray = cv2.cvtColor(prev, cv2.COLOR_BGR2GRAY)
-    last_saved = None
-    frames = []
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        sim = ssim(prev_gray, gray)
-        blur = cv2.Laplacian(gray, cv2.CV_64F).var()
-        motion = cv2.absdiff(prev_gray, gray).mean()
-
-        if sim < 0.90 and blur > 120 and motion > 2.0:
-            if last_saved is None or ssim(last_saved, gray) < 0.95:
-                path = os.path.join(output_dir, f"frame_{len(frames):04d}.jpg")
-                cv2.imwrite(path, frame)
-                frames.append(path)
-                last_saved = gray
-
-        prev_gray = gray
+def extract_keyframes(video_path, output_dir, mode=KEYFRAME_MODE):
+    """
+    Selects keyframes (see keyframes.KeyframeExtractor) and keeps them
+    as in-memory arrays in a KeyframeStore. output_dir is only used
+    when the store spills past KEYFRAME_SPILL_MB.
+    """
+    extractor = KeyframeExtractor(mode=mode)
+    store = KeyframeStore(spill_dir=output_dir)
 
-    cap.release()
-    return frames
+    for keyframe in extractor.iter_keyframes(iter_decoded_frames(video_path)):
+        store.add(keyframe)
 
+    return store
 
 
-def make_video_from_keyframe_paths(
-    keyframe_paths,
-    fps=60,
-    codec="mp4v",
-    ext=".mp4"
-):
+def iter_keyframe_segments(video_path, store, segment_seconds, mode=KEYFRAME_MODE):
     """
-    keyframe_paths: list of absolute image paths (already ordered)
-    returns: temp video file path
+    Selects keyframes exactly like extract_keyframes(), adding them to
+    `store`, and yields (start, end, keyframes) for every
+    `segment_seconds` of video as soon as decoding has passed its end.
+    Segments without keyframes are yielded too (empty list).
     """
+    extractor = KeyframeExtractor(mode=mode)
+    segment = []
+    start = 0.0
+    timestamp = 0.0
 
-    if not keyframe_paths:
-        raise ValueError("Empty keyframe list")
-
-    # Read first frame to get dimensions
-    first_frame = cv2.imread(keyframe_paths[0])
-    if first_frame is None:
-        raise ValueError("Failed to read first keyframe")
-
-    height, width, _ = first_frame.shape
+    for idx, timestamp, frame in iter_decoded_frames(video_path):
+        while timestamp >= start + segment_seconds:
+            yield start, start + segment_seconds, segment
+            segment = []
+            start += segment_seconds
 
-    # Create temp video file
-    temp_file = tempfile.NamedTemporaryFile(
-        suffix=ext,
-        delete=False
-    )
-    video_path = temp_file.name
-    temp_file.close()
+        keyframe = extractor.feed(idx, timestamp, frame)
+        if keyframe is not None:
+            segment.append(store.add(keyframe))
 
-    fourcc = cv2.VideoWriter_fourcc(*codec)
-    writer = cv2.VideoWriter(
-        video_path,
-        fourcc,
-        fps,
-        (width, height)
-    )
+    yield start, max(timestamp, start), segment
 
-    for path in keyframe_paths:
-        frame = cv2.imread(path)
-        if frame is None:
-            continue
 
-        # Safety resize (in case dimensions vary)
-        if frame.shape[:2] != (height, width):
-            frame = cv2.resize(frame, (width, height))
-
-        writer.write(frame)
+def video_duration(video_path):
+    cap = cv2.VideoCapture(video_path)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0.0
+    finally:
+        cap.release()
+    return frames / fps if fps > 0 else 0.0
 
-    writer.release()
-    return video_path
 
+def _frame_image(frame):
+    """
+    Accepts a Keyframe, a BGR array or an image path.
+    """
+    if isinstance(frame, Keyframe):
+        return frame.image()
+    if isinstance(frame, np.ndarray):
+        return frame
+    return cv2.imread(frame)
 
 
-def build_collage(frames, output_path, num_frames=6):
+def make_collage(frames, num_frames=6):
+    """
+    Returns a 2x3 BGR collage of evenly spaced frames
+    (Keyframes, arrays or paths).
+    """
     idxs = np.linspace(0, len(frames) - 1, min(num_frames, len(frames)), dtype=int)
-    imgs = [cv2.resize(cv2.imread(frames[i]), (320, 180)) for i in idxs]
+    imgs = [cv2.resize(_frame_image(frames[i]), (320, 180)) for i in idxs]
 
     while len(imgs) < num_frames:
         imgs.append(imgs[-1])
 
-    collage = np.vstack([
+    return np.vstack([
         np.hstack(imgs[:3]),
         np.hstack(imgs[3:6]),
     ])
 
-    cv2.imwrite(output_path, collage)
-    return output_path
-
-
-# def build_collage(frames, output_path, num_frames=6):
-#     # Calculate the interval (step size) to select frames evenly spaced
-#     total_frames = len(frames)
-#     step_size = total_frames // num_frames
-
-#     # Select evenly spaced frames
-#     idxs = [i * step_size for i in range(num_frames)]
-    
-#     # Ensure that the last index doesn't exceed the total number of frames
-#     idxs[-1] = min(idxs[-1], total_frames - 1)
-    
-#     # Read and resize the selected frames
-#     imgs = [cv2.resize(cv2.imread(frames[i]), (320, 180)) for i in idxs]
-
-#     # If there are fewer than `num_frames` selected, duplicate the last frame
-#     while len(imgs) < num_frames:
-#         imgs.append(imgs[-1])
-
-#     # Create a collage: stack the images horizontally (3 images per row)
-#     collage = np.vstack([
-#         np.hstack(imgs[:3]),  # First row of 3 frames
-#         np.hstack(imgs[3:6])  # Second row of 3 frames
-#     ])
-
-#     # Save the collage image
-#     cv2.imwrite(output_path, collage)
-#     return output_path
 
-
-# =========================================================
-# 
-# =========================================================
-import base64
-
-def image_to_base64(image_path):
-    with open(image_path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+def array_to_base64(image, ext=".jpg"):
+    ok, buf = cv2.imencode(ext, image)
+    if not ok:
+        raise ValueError("Failed to encode image")
+    return base64.b64encode(buf.tobytes()).decode("utf-8")
 
 
 # =========================================================
-# 
+# Video pipeline
 # =========================================================
 
-
-def build_video_from_frames(
-    frame_paths,
-    fps=2,
-    size=(640, 360),
-    codec="mp4v"
-):
+async def run_video_pipeline(video_path, progress_cb=None, enable_caption=False, classifier_mode=None,
+                             segment_seconds=VIDEO_SEGMENT_SECONDS, caption_tier=None, caption_budget_ms=None):
     """
-    Create a video from frame image paths.
-    Returns the temporary video path.
+    Analyzes a video. With segment_seconds > 0 the video is processed in
+    time segments and partial results are emitted after each one (see
+    run_segmented_video_pipeline); otherwise in one pass.
     """
-
-    if not frame_paths:
-        return None
-
-    tmp_dir = tempfile.mkdtemp()
-    video_path = os.path.join(tmp_dir, "keyframes_video.mp4")
-
-    fourcc = cv2.VideoWriter_fourcc(*codec)
-    writer = cv2.VideoWriter(video_path, fourcc, fps, size)
-
-    for frame_path in frame_paths:
-        img = cv2.imread(frame_path)
-        if img is None:
-            continue
-
-        img = cv2.resize(img, size)
-        writer.write(img)
-
-    writer.release()
-    return video_path
-
-
-
-
-# =========================================================
-# Video pipeline
-# =========================================================
-
-
-
-async def run_video_pipeline(video_path, progress_cb=None, enable_caption=False):
+    if segment_seconds and segment_seconds > 0:
+        return await run_segmented_video_pipeline(
+            video_path, progress_cb, enable_caption, classifier_mode, segment_seconds,
+            caption_tier, caption_budget_ms
+        )
 
     async def emit(step: str, percent: int, data=None):
         if progress_cb:
@@ -218,11 +142,13 @@ async def run_video_pipeline(video_path, progress_cb=None, enable_caption=False)
     data = {
         "sequence": None,
         "caption": None,
+        "caption_model": None,
         "text": None,
         "objects": None,
         "labels": None,
         "scores": None,
         "textSeg": None,
+        "textBoxes": None,
         "caption_image": None,
     }
 
@@ -232,49 +158,63 @@ async def run_video_pipeline(video_path, progress_cb=None, enable_caption=False)
         # Extract keyframes
         # -----------------------------------
         await emit("Extracting keyframes", 10, data)
-        keyframes = extract_keyframes(video_path, tmp)
+        # Keyframes stay in memory (thread pool, no pickling of frames)
+        # and are handed directly to collage, OCR and detection.
+        keyframes = await run_stage("keyframes", extract_keyframes, video_path, tmp)
+        data["keyframe_stats"] = {
+            "keyframes": len(keyframes),
+            "in_memory_mb": round(keyframes.memory_bytes / 1024 ** 2, 1),
+            "spilled": keyframes.spilled,
+        }
 
         # -----------------------------------
         # Build collage
         # -----------------------------------
         await emit("Building context collage", 25, data)
-        collage_path = build_collage(keyframes, os.path.join(tmp, "context.jpg"))
-        collage_base64 = image_to_base64(collage_path)
-        data["caption_image"] = collage_base64
-
-        # -----------------------------------
-        # Rebuild temp video from keyframes
-        # -----------------------------------
-        await emit("Rebuilding video from keyframes", 35, data)
-        video_path = make_video_from_keyframe_paths(
-            keyframe_paths=keyframes,
-            fps=60
-        )
+        collage = None
+        if len(keyframes):
+            collage = await run_stage("collage", make_collage, keyframes)
+            data["caption_image"] = await run_in_thread(array_to_base64, collage)
 
         # -----------------------------------
         # OCR
         # -----------------------------------
         await emit("Running OCR on video", 45, data)
-        textInVideo = run_ocr_on_video(video_path)
-        textSeg = analyze_text(textInVideo)
+        textInVideo, ocrStats, textRegions = await run_stage(
+            "ocr", run_ocr_on_frames, keyframes.images(), return_regions=True
+        )
+        textSeg = await run_stage("pii", analyze_text, textInVideo)
 
         data["text"] = textInVideo
+        data["ocr_stats"] = ocrStats
+        # Region "frame" is a keyframe position; report the video frame instead
+        data["textBoxes"] = [
+            dict(r, frame=keyframes[r["frame"]].index, timestamp=keyframes[r["frame"]].timestamp)
+            for r in textRegions
+        ]
         data["textSeg"] = convert_text_segments(textSeg)
 
         # -----------------------------------
         # Object Detection (separated step)
         # -----------------------------------
         await emit("Detecting objects in video", 55, data)
-        objectsInVideo = detect_objects_in_video(video_path)
+        objectSummary = await run_stage(
+            "detection", detect_objects_in_frames,
+            ((k.index, k.timestamp, k.image()) for k in keyframes[::VIDEO_DETECT_STRIDE])
+        )
+        objectsInVideo = sorted(objectSummary)
         data["objects"] = objectsInVideo
+        data["object_summary"] = objectSummary
 
         # -----------------------------------
         # Caption
         # -----------------------------------
         caption = ""
         await emit("Generating video caption", 70, data)
-        if enable_caption:
-            caption = generate_caption(collage_path)
+        if enable_caption and collage is not None:
+            captioned = await run_stage("caption", caption_image, collage, caption_tier, caption_budget_ms)
+            caption = captioned.pop("caption")
+            data["caption_model"] = captioned
         data["caption"] = caption
 
 
@@ -284,96 +224,192 @@ async def run_video_pipeline(video_path, progress_cb=None, enable_caption=False)
         await emit("Final sensitivity classification", 90, data)
 
         merged_text = f"{textInVideo}\n{objectsInVideo}\n{caption}"
-        classification = classify(merged_text)
+        # Long text is classified in token windows instead of being truncated
+        classification = await run_stage("classify", classify_long, merged_text, mode=classifier_mode)
 
         data["sequence"] = merged_text
         data["labels"] = classification["labels"]
         data["scores"] = classification["scores"]
+        data["classifier"] = classification.get("engine")
+        data["classification_windows"] = {
+            "windows": classification["windows"],
+            "classified": classification["windows_classified"],
+            "stopped_early": classification["stopped_early"],
+        }
 
         await emit("Completed", 100, data)
 
         return data
 
-# async def run_video_pipeline(video_path, progress_cb=None):
-
-#     async def emit(step: str, percent: int, data=None):
-#         if progress_cb:
-#             await progress_cb(step, percent, data)
-
-#     data = {
-#         "sequence": None,
-#         "caption": None,
-#         "text": None,
-#         "objects": None,
-#         "labels": None,
-#         "scores": None,
-#         "textSeg": None,
-#         "caption_image": None,
-#     }
-
-#     with tempfile.TemporaryDirectory() as tmp:
-
-#         # -----------------------------------
-#         # Extract keyframes
-#         # -----------------------------------
-#         await emit("Extracting keyframes", 10, data)
-#         keyframes = extract_keyframes(video_path, tmp)
-
-#         # -----------------------------------
-#         # Build collage
-#         # -----------------------------------
-#         await emit("Building context collage", 30, data)
-#         collage_path = build_collage(keyframes, os.path.join(tmp, "context.jpg"))
-#         collage_base64 = image_to_base64(collage_path)
-
-#         data["caption_image"] = collage_base64
-
-#         # -----------------------------------
-#         # Rebuild temp video from keyframes
-#         # -----------------------------------
-#         video_path = make_video_from_keyframe_paths(
-#             keyframe_paths=keyframes,
-#             fps=60
-#         )
-
-#         textInVideo = "no text extracted from video"
-#         textInVideo=run_ocr_on_video(video_path)
-#         objectsInVideo = detect_objects_in_video(video_path)
-#         textSeg = analyze_text(textInVideo)
-
-#         data["text"] = textInVideo
-#         data["objects"] = objectsInVideo
-#         data["textSeg"] = convert_text_segments(textSeg)
-
-#         await emit("Video analysis completed", 45, data)
-
-#         # -----------------------------------
-#         # Caption
-#         # -----------------------------------
-#         await emit("Generating video caption", 60, data)
-#         caption = "Placeholder caption image"
-#         caption = generate_caption(collage_path)
-
-#         data["caption"] = caption
+async def run_segmented_video_pipeline(video_path, progress_cb=None, enable_caption=False,
+                                       classifier_mode=None, segment_seconds=VIDEO_SEGMENT_SECONDS,
+                                       caption_tier=None, caption_budget_ms=None):
+    """
+    Processes a video in `segment_seconds` time segments. After each
+    segment, the findings so far (text, PII spans, text boxes, objects
+    and a provisional classification) go out through progress_cb, so
+    the first findings arrive after the first segment is decoded
+    instead of after the whole video.
+
+    Keyframe selection, OCR dedup and the detection stride carry over
+    between segments, so text and objects match a one-pass run. The
+    final classification still runs over the complete text.
+    """
 
-#         # -----------------------------------
-#         # Classification
-#         # -----------------------------------
-#         await emit("Final sensitivity classification", 90, data)
+    async def emit(step: str, percent: int, data=None):
+        if progress_cb:
+            await progress_cb(step, percent, data)
 
-#         merged_text = f"{textInVideo}\n{objectsInVideo}\n{caption}"
-#         classification = classify(merged_text)
+    data = {
+        "sequence": None,
+        "caption": None,
+        "caption_model": None,
+        "text": None,
+        "objects": None,
+        "labels": None,
+        "scores": None,
+        "textSeg": None,
+        "textBoxes": None,
+        "caption_image": None,
+        "provisional": True,
+        "segments": [],
+    }
+    started = time.perf_counter()
 
-#         data["sequence"] = merged_text
-#         data["labels"] = classification["labels"]
-#         data["scores"] = classification["scores"]
+    with tempfile.TemporaryDirectory() as tmp:
 
-#         await emit("Completed", 100, data)
+        await emit("Extracting keyframes", 5, data)
+        duration = await run_in_thread(video_duration, video_path)
+
+        keyframes = KeyframeStore(spill_dir=tmp)
+        segments = iter_keyframe_segments(video_path, keyframes, segment_seconds)
+        ocr = VideoOcr()
+
+        textInVideo = ""
+        textSeg = []
+        textBoxes = []
+        objectSummary = {}
+        segment_results = []
+        base = 0   # position of the segment's first keyframe among all keyframes
+
+        # Decoding the next segment overlaps the analysis of the current one
+        next_segment = asyncio.ensure_future(run_stage("keyframes", next, segments, None))
+        try:
+            while True:
+                item = await next_segment
+                if item is None:
+                    break
+                next_segment = asyncio.ensure_future(run_stage("keyframes", next, segments, None))
+
+                start, end, segment = item
+                summary = {
+                    "index": len(data["segments"]),
+                    "start": round(start, 2),
+                    "end": round(end, 2),
+                    "keyframes": len(segment),
+                }
+
+                if segment:
+                    # -------- OCR + detection of this segment --------
+                    (segText, segRegions), segObjects = await asyncio.gather(
+                        run_stage("ocr", ocr.process, (k.image() for k in segment)),
+                        run_stage(
+                            "detection", detect_objects_in_frames,
+                            ((k.index, k.timestamp, k.image())
+                             for pos, k in enumerate(segment, base) if pos % VIDEO_DETECT_STRIDE == 0)
+                        ),
+                    )
+
+                    # -------- PII (offsets shifted into the full text) --------
+                    if segText:
+                        offset = len(textInVideo) + 1 if textInVideo else 0
+                        spans = convert_text_segments(await run_stage("pii", analyze_text, segText))
+                        textSeg.extend(dict(sp, start=sp["start"] + offset, end=sp["end"] + offset) for sp in spans)
+                        textInVideo = f"{textInVideo}\n{segText}" if textInVideo else segText
+
+                    textBoxes.extend(
+                        dict(r, frame=segment[r["frame"] - base].index, timestamp=segment[r["frame"] - base].timestamp)
+                        for r in segRegions
+                    )
+                    merge_object_summaries(objectSummary, segObjects)
+
+                    # -------- Provisional classification --------
+                    # Only this segment's text, with the cheap engine by
+                    # default (VIDEO_PROVISIONAL_CLASSIFIER); the final
+                    # classification covers the whole video
+                    if segText or segObjects:
+                        classification = await run_stage(
+                            "classify", classify_provisional, f"{segText}\n{sorted(segObjects)}", classifier_mode
+                        )
+                        if classification is not None:
+                            segment_results.append(classification)
+                            data["labels"], data["scores"] = aggregate_results(segment_results)
+                            summary["label"] = classification["labels"][0]
+                            summary["score"] = classification["scores"][0]
+                        summary["objects"] = sorted(segObjects)
+
+                        data.setdefault("first_finding_seconds", round(time.perf_counter() - started, 2))
+
+                    base += len(segment)
+
+                data["segments"].append(summary)
+                data["segment"] = summary
+                data["text"] = textInVideo
+                data["textSeg"] = textSeg
+                data["textBoxes"] = textBoxes
+                data["objects"] = sorted(objectSummary)
+                data["object_summary"] = objectSummary
+
+                percent = 5 + int(75 * min(1.0, end / duration)) if duration > 0 else 50
+                await emit(f"Analyzed {end:.0f}s of video", percent, data)
+        finally:
+            await asyncio.gather(next_segment, return_exceptions=True)
+            await run_in_thread(segments.close)
+
+        data.pop("segment", None)
+        data["keyframe_stats"] = {
+            "keyframes": len(keyframes),
+            "in_memory_mb": round(keyframes.memory_bytes / 1024 ** 2, 1),
+            "spilled": keyframes.spilled,
+        }
+        data["ocr_stats"] = ocr.stats()
 
-#         return data
+        # -----------------------------------
+        # Collage + caption
+        # -----------------------------------
+        await emit("Generating video caption", 85, data)
+        collage = None
+        if len(keyframes):
+            collage = await run_stage("collage", make_collage, keyframes)
+            data["caption_image"] = await run_in_thread(array_to_base64, collage)
 
+        caption = ""
+        if enable_caption and collage is not None:
+            captioned = await run_stage("caption", caption_image, collage, caption_tier, caption_budget_ms)
+            caption = captioned.pop("caption")
+            data["caption_model"] = captioned
+        data["caption"] = caption
 
+        # -----------------------------------
+        # Final classification
+        # -----------------------------------
+        await emit("Final sensitivity classification", 90, data)
 
+        objectsInVideo = data["objects"]
+        merged_text = f"{textInVideo}\n{objectsInVideo}\n{caption}"
+        classification = await run_stage("classify", classify_long, merged_text, mode=classifier_mode)
 
+        data["sequence"] = merged_text
+        data["labels"] = classification["labels"]
+        data["scores"] = classification["scores"]
+        data["classifier"] = classification.get("engine")
+        data["classification_windows"] = {
+            "windows": classification["windows"],
+            "classified": classification["windows_classified"],
+            "stopped_early": classification["stopped_early"],
+        }
+        data["provisional"] = False
 
+        await emit("Completed", 100, data)
 
+        return data
@@ -0,0 +1,158 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from backend.core.captioning import warm_up as warm_up_caption
+from backend.core.classification import classify_batch
+from backend.core.config import CPU_PROCESSES, PII_PARALLEL
+from backend.core.detection import get_ensemble
+from backend.core.executor import submit_cpu
+from backend.core.metrics import register_collector
+from backend.core.model_manager import YOLO_MODEL_FILES
+from backend.core.ocr import get_ocr_backend
+from backend.core.pii import _analyze_chunk, get_analyzer
+from backend.core.text_regions import detect_text_regions
+
+
+WARMUP_TEXT = "Warm-up sample: Jane Doe, jane.doe@example.com, +1 555 0100"
+
+# ==========================================================
+# Readiness
+# ==========================================================
+# starting -> loading -> warming -> ready, or failed (the process is
+# still alive; /readyz reports the error).
+STATES = ("starting", "loading", "warming", "ready", "failed")
+
+
+class Readiness:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.state = "starting"
+        self.error = None
+        self.ready_at = None
+        self.models = {}    # name -> {"ensure_s", "load_s"}
+        self.warmup = {}    # step -> seconds
+
+    def set(self, state, error=None):
+        if state not in STATES:
+            raise ValueError(f"Unknown state: {state}")
+
+        with self._lock:
+            self.state = state
+            self.error = error
+            if state == "ready":
+                self.ready_at = time.time()
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "error": self.error,
+                "uptime_s": round(time.time() - self.started, 1),
+                "startup_s": round(self.ready_at - self.started, 1) if self.ready_at else None,
+                "models": dict(self.models),
+                "warmup": dict(self.warmup),
+            }
+
+
+readiness = Readiness()
+
+
+@register_collector
+def _readiness_metrics():
+    return [
+        ("service_ready", "gauge", "1 once models are loaded and warmed up",
+         [({}, int(readiness.ready))]),
+    ]
+
+
+# ==========================================================
+# Warm-up
+# ==========================================================
+# The first call into each model is much slower than the next ones
+# (YOLO fuses layers, torch allocates workspaces, spaCy loads its
+# pipeline, tesserocr workers load their language model), so one
+# synthetic input goes through every loaded model before the service
+# reports ready.
+
+def synthetic_image(width=640, height=480):
+    """
+    A BGR image with a few lines of text and some shapes.
+    """
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    cv2.rectangle(image, (40, 260), (260, 440), (40, 90, 160), -1)
+    cv2.circle(image, (460, 350), 80, (30, 160, 60), -1)
+
+    for i, line in enumerate(WARMUP_TEXT.split(", ")):
+        cv2.putText(image, line, (40, 60 + 50 * i), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+
+    return image
+
+
+def _warm_ocr(image):
+    backend = get_ocr_backend()
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    # One call per worker so each loads its language model
+    for future in [backend.submit(gray) for _ in range(backend.workers)]:
+        future.result()
+
+
+def _warm_pii():
+    get_analyzer().analyze(text=WARMUP_TEXT, language="en")
+
+    if PII_PARALLEL:
+        # Worker processes build their own analyzer on first use
+        # (best effort: a worker may pick up two of these)
+        futures = [submit_cpu(_analyze_chunk, WARMUP_TEXT, "en", None) for _ in range(CPU_PROCESSES)]
+        for future in futures:
+            future.result()
+
+
+def _warm_steps(loaded):
+    """
+    (step, callable) for the non-model stages and every loaded model.
+    """
+    image = synthetic_image()
+    steps = [
+        ("ocr", lambda: _warm_ocr(image)),
+        ("pii", _warm_pii),
+    ]
+
+    if "east" in loaded:
+        steps.append(("east", lambda: detect_text_regions(image)))
+    if any(name in loaded for name in YOLO_MODEL_FILES):
+        steps.append(("yolo", lambda: get_ensemble().detect_batch([image])))
+    if "bart" in loaded:
+        steps.append(("bart", lambda: classify_batch([WARMUP_TEXT], mode="nli")))
+    if "embedder" in loaded:
+        steps.append(("embedder", lambda: classify_batch([WARMUP_TEXT], mode="embedding")))
+    if "blip" in loaded:
+        steps.append(("blip", lambda: warm_up_caption("fast")))
+    if "blip2" in loaded:
+        steps.append(("blip2", lambda: warm_up_caption("detailed")))
+
+    return steps
+
+
+def warm_up(loaded):
+    """
+    Runs the synthetic input through OCR, Presidio and every model in
+    `loaded` (names as returned by load_all_models). Returns
+    {step: seconds}.
+    """
+    timings = {}
+    for step, run in _warm_steps(loaded):
+        start = time.perf_counter()
+        run()
+        timings[step] = round(time.perf_counter() - start, 2)
+        print(f"Warmed up {step} in {timings[step]:.2f}s")
+
+    return timings
@@ -3,13 +3,16 @@
 # ==========================================================
 
 
-from fastapi import FastAPI, WebSocket, UploadFile
-import shutil
+from fastapi import FastAPI, WebSocket, UploadFile, File, Form, HTTPException, Request, Header
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse, FileResponse
+from pydantic import BaseModel
 import uuid
+import json
 import os
 import traceback
 import sys
 import asyncio
+import time
 from typing import Any
 from pathlib import Path
 
@@ -18,24 +21,78 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
 
 from backend.core.image_pipeline import run_image_pipeline  # next step
 from backend.core.video_pipeline import run_video_pipeline  # next step
+from backend.core.batch_pipeline import run_batch, file_type_for
+from backend.core.config import BATCH_ROOT, CLASSIFIER_MODE, PRELOAD_MODELS, VIDEO_SEGMENT_SECONDS, WARMUP
 # from core.image_pipeline import run_image_pipeline  # next step
 # from core.video_pipeline import run_video_pipeline  # next step
 
 
 from contextlib import asynccontextmanager
-from backend.core.model_manager import load_all_models
+from backend.core.model_manager import load_all_models, registry
+from backend.core.executor import get_inference_pool, get_cpu_pool, shutdown_executors
+from backend.core.result_cache import result_cache
+from backend.core.classification import CLASSIFIER_MODES, classifier_batch_stats, prepare_classifier
+from backend.core.detection import get_ensemble
+from backend.core.captioning import caption_stats
+from backend.core.metrics import collect_stage_timings, render_prometheus, stage, track_job
+from backend.core.profiling import profile_job, profile_store, should_profile
+from backend.core.warmup import readiness, warm_up
+from backend.core.uploads import (
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_MAX_BYTES,
+    ResumableUploads,
+    UploadConflict,
+    UploadTooLarge,
+    hash_sidecar,
+    resolve_upload,
+    save_upload_stream,
+    upload_hash,
+    upload_name,
+)
+from starlette.concurrency import run_in_threadpool
+
+async def prepare_models():
+    """
+    Loads and warms up the models in the background, so /healthz
+    answers while /readyz reports progress.
+    """
+    try:
+        readiness.set("loading")
+        # Downloads what is missing and loads the default models, concurrently
+        readiness.models = await run_in_threadpool(load_all_models, preload=PRELOAD_MODELS)
+
+        # Label vectors for the embedding classifier (loaded from disk if cached)
+        await run_in_threadpool(prepare_classifier)
+        print("✅ Models ready.")
+
+        if WARMUP:
+            readiness.set("warming")
+            loaded = [name for name, t in readiness.models.items() if t["load_s"] is not None]
+            readiness.warmup = await run_in_threadpool(warm_up, loaded)
+
+        readiness.set("ready")
+        print(f"✅ Ready in {readiness.snapshot()['startup_s']}s")
+
+    except Exception as e:
+        traceback.print_exc()
+        readiness.set("failed", error=str(e))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 Starting up... Ensuring models exist.")
-    
-    load_all_models()  # download only
-    
-    print("✅ Models ready.")
+
+    # Start the execution layer before the first request arrives
+    get_inference_pool()
+    get_cpu_pool()
+
+    startup = asyncio.create_task(prepare_models())
 
     yield  # <-- App runs here
 
     print("🛑 Shutting down...")
+    startup.cancel()
+    shutdown_executors()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -78,23 +135,302 @@ UPLOAD_DIR = BASE_PATH / "backend" / "uploads"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
+resumable_uploads = ResumableUploads(UPLOAD_DIR)
+
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """
+    Rejects uploads whose Content-Length is already over the limit,
+    before any of the body is read.
+    """
+    if UPLOAD_MAX_BYTES and (request.url.path in ("/upload", "/batch/analyze") or request.url.path.startswith("/uploads")):
+        length = request.headers.get("content-length")
+        # 1 MB of slack for multipart framing
+        if length and length.isdigit() and int(length) > UPLOAD_MAX_BYTES + UPLOAD_CHUNK_SIZE:
+            return JSONResponse(status_code=413, content={"detail": f"Upload exceeds {UPLOAD_MAX_BYTES // (1024 * 1024)} MB"})
+
+    return await call_next(request)
+
+
 # ==========================================================
 # Upload endpoint (image + video)
 # ==========================================================
 @app.post("/upload")
 async def upload_file(file: UploadFile):
-    file_id = str(uuid.uuid4())
-    file_name = f"{file_id}_{file.filename}"
+    file_name = upload_name(uuid.uuid4(), file.filename)
     file_path = UPLOAD_DIR / file_name
 
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    if UPLOAD_MAX_BYTES and file.size and file.size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {UPLOAD_MAX_BYTES // (1024 * 1024)} MB")
+
+    async def chunks():
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+    # Starlette has already spooled the multipart body to a temp file
+    # (only the Content-Length middleware rejects before the body is
+    # read); it is copied out in chunks, and sha256 (used by the
+    # result cache) and size are computed in the same pass. The
+    # resumable /uploads endpoints stream the request body directly.
+    try:
+        content_hash, size = await save_upload_stream(chunks(), file_path)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
     return {
         "file_name": file_name,
-        "content_type": file.content_type
+        "content_type": file.content_type,
+        "content_hash": content_hash,
+        "size": size
+    }
+
+
+# ==========================================================
+# Resumable uploads (multi-GB videos)
+# ==========================================================
+# POST /uploads            {"filename", "size", "content_type"?, "sha256"?} -> upload_id, offset
+# PATCH /uploads/{id}      raw bytes starting at header Upload-Offset      -> new offset
+# GET /uploads/{id}        current offset (resume point after a dropped connection)
+# DELETE /uploads/{id}     abandon the upload
+# The PATCH that delivers the last byte returns the same fields as
+# /upload (file_name, content_hash, size) with "complete": true.
+
+class UploadInit(BaseModel):
+    filename: str
+    size: int
+    content_type: str | None = None
+    sha256: str | None = None
+
+
+def _upload_error(e: Exception) -> HTTPException:
+    if isinstance(e, KeyError):
+        return HTTPException(status_code=404, detail="Upload not found")
+    if isinstance(e, UploadTooLarge):
+        return HTTPException(status_code=413, detail=str(e))
+    if isinstance(e, UploadConflict):
+        return HTTPException(status_code=409, detail=str(e))
+    return HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/uploads")
+async def create_upload(init: UploadInit):
+    try:
+        return await run_in_threadpool(
+            resumable_uploads.create, init.filename, init.size, init.content_type, init.sha256
+        )
+    except ValueError as e:
+        raise _upload_error(e)
+
+
+@app.get("/uploads/{upload_id}")
+async def upload_status(upload_id: str):
+    try:
+        return resumable_uploads.status(upload_id)
+    except KeyError as e:
+        raise _upload_error(e)
+
+
+@app.patch("/uploads/{upload_id}")
+async def append_upload(upload_id: str, request: Request, upload_offset: int = Header(...)):
+    try:
+        return await resumable_uploads.append(upload_id, upload_offset, request.stream())
+    except (KeyError, ValueError) as e:
+        raise _upload_error(e)
+
+
+@app.delete("/uploads/{upload_id}")
+async def delete_upload(upload_id: str):
+    try:
+        resumable_uploads.abort(upload_id)
+    except KeyError as e:
+        raise _upload_error(e)
+    return {"upload_id": upload_id, "deleted": True}
+
+# ==========================================================
+# Batch analysis endpoint (NDJSON stream)
+# ==========================================================
+def _batch_root_path(relative: str) -> Path:
+    """
+    Resolves a server-side path inside BATCH_ROOT (never outside it).
+    """
+    if not BATCH_ROOT:
+        raise HTTPException(status_code=400, detail="Server-side paths are disabled (BATCH_ROOT not set)")
+
+    root = Path(BATCH_ROOT).resolve()
+    path = (root / relative).resolve()
+    if path != root and root not in path.parents:
+        raise HTTPException(status_code=400, detail=f"Path outside BATCH_ROOT: {relative}")
+    return path
+
+
+@app.post("/batch/analyze")
+async def batch_analyze(
+    files: list[UploadFile] = File(default=[]),
+    directory: str | None = Form(default=None),
+    manifest: UploadFile | None = File(default=None),
+    enable_caption: bool = Form(default=False),
+    classifier_mode: str | None = Form(default=None),
+    caption_tier: str | None = Form(default=None),
+    caption_budget_ms: int | None = Form(default=None),
+):
+    """
+    Analyzes many files in one request: uploaded `files`, every file in
+    a server-side `directory`, and/or a `manifest` (one path per line,
+    relative to BATCH_ROOT). Streams one JSON line per file, then a
+    summary line with aggregate throughput.
+    """
+    if classifier_mode is not None and classifier_mode not in CLASSIFIER_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown classifier_mode: {classifier_mode} (expected one of {list(CLASSIFIER_MODES)})")
+
+    items = []
+    # Uploaded copies; run_batch deletes each once its line is sent
+    uploaded = []
+
+    def discard_uploaded():
+        for path in uploaded:
+            Path(path).unlink(missing_ok=True)
+            hash_sidecar(path).unlink(missing_ok=True)
+
+    for file in files:
+        file_name = upload_name(uuid.uuid4(), file.filename)
+        file_path = UPLOAD_DIR / file_name
+
+        if UPLOAD_MAX_BYTES and file.size and file.size > UPLOAD_MAX_BYTES:
+            discard_uploaded()
+            raise HTTPException(status_code=413, detail=f"{file.filename}: upload exceeds {UPLOAD_MAX_BYTES // (1024 * 1024)} MB")
+
+        async def chunks(file=file):
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                yield chunk
+
+        # Same streamed, size-limited save as /upload
+        try:
+            await save_upload_stream(chunks(), file_path)
+        except UploadTooLarge as e:
+            discard_uploaded()
+            raise HTTPException(status_code=413, detail=f"{file.filename}: {e}")
+        uploaded.append(str(file_path))
+        items.append((file.filename, str(file_path)))
+
+    try:
+        if directory:
+            dir_path = _batch_root_path(directory)
+            if not dir_path.is_dir():
+                raise HTTPException(status_code=404, detail=f"Directory not found: {directory}")
+            for path in sorted(dir_path.rglob("*")):
+                if path.is_file() and file_type_for(path) is not None:
+                    items.append((str(path.relative_to(dir_path)), str(path)))
+
+        if manifest is not None:
+            lines = (await manifest.read()).decode("utf-8").splitlines()
+            for line in lines:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    items.append((line, str(_batch_root_path(line))))
+    except HTTPException:
+        discard_uploaded()
+        raise
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No files to analyze")
+
+    print(f"📦 Batch analysis of {len(items)} files")
+
+    async def stream():
+        with track_job("batch"), collect_stage_timings() as timings:
+            async for line in run_batch(items, enable_caption=enable_caption, classifier_mode=classifier_mode,
+                                        caption_tier=caption_tier, caption_budget_ms=caption_budget_ms,
+                                        remove_after=uploaded):
+                if line["type"] == "summary":
+                    # Stage time summed over the whole batch
+                    line["timings"] = {"stages": timings.as_dict()}
+                yield json.dumps(line) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# ==========================================================
+# Liveness / readiness probes
+# ==========================================================
+@app.get("/healthz")
+async def healthz():
+    """
+    Liveness: the process is up and serving (models may still be loading).
+    """
+    return {"status": "alive", "state": readiness.state}
+
+
+@app.get("/readyz")
+async def readyz():
+    """
+    Readiness: 200 once models are loaded and warmed up, 503 before
+    that (or when startup failed), with load / warm-up timings.
+    """
+    snapshot = readiness.snapshot()
+    return JSONResponse(snapshot, status_code=200 if readiness.ready else 503)
+
+# ==========================================================
+# Loaded models (resident size per model)
+# ==========================================================
+@app.get("/models")
+async def models_status():
+    return registry.stats()
+
+# ==========================================================
+# Batching / cache statistics
+# ==========================================================
+@app.get("/stats")
+async def stats():
+    return {
+        "classifier_batching": classifier_batch_stats(),
+        "yolo_batching": get_ensemble().batch_stats(),
+        "result_cache": result_cache.stats(),
+        "captioning": caption_stats(),
     }
 
+# ==========================================================
+# Prometheus metrics
+# ==========================================================
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Stage / job / queue / model / cache metrics in the Prometheus
+    text exposition format.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# ==========================================================
+# Stored request profiles
+# ==========================================================
+@app.get("/profiles")
+async def list_profiles():
+    """
+    Profiled /ws/analyze jobs, newest first.
+    """
+    return await run_in_threadpool(profile_store.list)
+
+
+@app.get("/profiles/{job_id}")
+async def download_profile(job_id: str, format: str = "folded"):
+    """
+    format=folded: collapsed stacks (flamegraph.pl / speedscope);
+    format=json: job metadata and the functions with the most samples.
+    """
+    if format not in ("folded", "json"):
+        raise HTTPException(status_code=400, detail="format must be 'folded' or 'json'")
+
+    try:
+        path = profile_store.path(job_id, f".{format}")
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "json":
+        return JSONResponse(json.loads(path.read_text()))
+    return FileResponse(path, media_type="text/plain", filename=path.name)
+
 # ==========================================================
 # WebSocket analysis endpoint
 # ==========================================================
@@ -108,10 +444,34 @@ async def websocket_analyze(websocket: WebSocket):
         file_id = data["file_id"]
         file_type = data.get("file_type", "image")  # default image
         enable_caption = data.get("enable_caption", False)
+        classifier_mode = data.get("classifier_mode") or CLASSIFIER_MODE
+        # Caption tier ("fast" / "detailed" / "auto") and/or latency budget
+        caption_tier = data.get("caption_tier")
+        caption_budget_ms = data.get("caption_budget_ms")
+        # Videos: seconds per streamed segment (0 = one pass, no partial results)
+        segment_seconds = float(data.get("segment_seconds", VIDEO_SEGMENT_SECONDS))
+        # Profile this job ({"profile": true}) or a PROFILE_SAMPLE_RATE share of jobs
+        profiled = should_profile(data.get("profile", False))
+        job_id = uuid.uuid4().hex
+
+        # Both end up in metric labels and cache keys: unknown values are
+        # rejected before any work starts
+        if file_type not in ("image", "video") or classifier_mode not in CLASSIFIER_MODES:
+            await websocket.send_json({
+                "type": "error",
+                "message": f"Unknown file_type or classifier_mode (expected file_type in ['image', 'video'], "
+                           f"classifier_mode in {list(CLASSIFIER_MODES)})"
+            })
+            return
 
-        file_path = os.path.join(UPLOAD_DIR, file_id)
+        # file_id comes from the client: only files stored in UPLOAD_DIR
+        # are analyzed (upload_hash writes a sidecar next to the file)
+        try:
+            file_path = str(resolve_upload(UPLOAD_DIR, file_id))
+        except ValueError:
+            file_path = None
 
-        if not os.path.exists(file_path):
+        if file_path is None or not os.path.isfile(file_path):
             await websocket.send_json({
                 "type": "error",
                 "message": "File not found"
@@ -119,37 +479,84 @@ async def websocket_analyze(websocket: WebSocket):
             await websocket.close()
             return
 
-        async def progress_cb(step: str, percent: int, other_data: dict[str, Any] | None):
-            data = {
-                "type": "progress",
-                "step": step,
-                "percent": percent, 
-                "other_data":other_data
-            }
-            print(f"Emitting progress: {data}")
-            await websocket.send_json(data)
-            await asyncio.sleep(0.05)
-
-        # ---------------- ROUTING ----------------
-        if file_type == "video":
-            print("🎥 Running video pipeline")
-            result = await run_video_pipeline(
-                file_path,
-                progress_cb=progress_cb,
-                enable_caption=enable_caption
-            )
-        else:
-            print("🖼️ Running image pipeline")
-            result = await run_image_pipeline(
-                file_path,
-                progress_cb=progress_cb,
-                enable_caption=enable_caption
-            )
+        # Per-stage time of this job, sent with every progress / result message
+        with track_job(file_type) as job, collect_stage_timings() as timings:
+            started = time.perf_counter()
+
+            def timings_block():
+                return {"elapsed_s": round(time.perf_counter() - started, 3), "stages": timings.as_dict()}
+
+            # ---------------- RESULT CACHE ----------------
+            with stage("cache"):
+                content_hash = await run_in_threadpool(upload_hash, file_path)
+            options = {"enable_caption": enable_caption, "classifier_mode": classifier_mode}
+            if enable_caption:
+                options.update(caption_tier=caption_tier, caption_budget_ms=caption_budget_ms)
+            if file_type == "video":
+                options["segment_seconds"] = segment_seconds
+            cache_key = result_cache.make_key(content_hash, file_type, **options)
+            with stage("cache"):
+                cached = await run_in_threadpool(result_cache.get, cache_key)
+
+            if cached is not None:
+                print(f"⚡ Cache hit for {content_hash[:12]}")
+                job["status"] = "cached"
+                cached["cached"] = True
+                await websocket.send_json({
+                    "type": "result",
+                    "data": cached,
+                    "job_id": job_id,
+                    "timings": timings_block()
+                })
+                return
+
+            async def progress_cb(step: str, percent: int, other_data: dict[str, Any] | None):
+                data = {
+                    "type": "progress",
+                    "step": step,
+                    "percent": percent, 
+                    "other_data":other_data,
+                    "job_id": job_id,
+                    "timings": timings_block()
+                }
+                print(f"Emitting progress: {step} ({percent}%)")
+                await websocket.send_json(data)
+                await asyncio.sleep(0.05)
+
+            # ---------------- ROUTING ----------------
+            with profile_job(job_id, profiled, file_id=file_id, file_type=file_type, options=options):
+                if file_type == "video":
+                    print("🎥 Running video pipeline")
+                    result = await run_video_pipeline(
+                        file_path,
+                        progress_cb=progress_cb,
+                        enable_caption=enable_caption,
+                        classifier_mode=classifier_mode,
+                        segment_seconds=segment_seconds,
+                        caption_tier=caption_tier,
+                        caption_budget_ms=caption_budget_ms
+                    )
+                else:
+                    print("🖼️ Running image pipeline")
+                    result = await run_image_pipeline(
+                        file_path,
+                        progress_cb=progress_cb,
+                        enable_caption=enable_caption,
+                        classifier_mode=classifier_mode,
+                        caption_tier=caption_tier,
+                        caption_budget_ms=caption_budget_ms
+                    )
+
+            await run_in_threadpool(result_cache.put, cache_key, result)
+            result["cached"] = False
 
-        await websocket.send_json({
-            "type": "result",
-            "data": result
-        })
+            await websocket.send_json({
+                "type": "result",
+                "data": result,
+                "job_id": job_id,
+                "profile": f"/profiles/{job_id}" if profiled else None,
+                "timings": timings_block()
+            })
 
     except Exception as e:
         traceback.print_exc()
@@ -0,0 +1,126 @@
+"""
+Accuracy / latency comparison of the classification engines.
+
+Builds the same merged text the image pipeline classifies (OCR text +
+detected objects) for every image in test_data/data, then classifies it
+with the BART zero-shot engine ("nli"), the embedding engine without
+fallback and the embedding engine with its NLI fallback.
+
+Accuracy is reported as top-label agreement with NLI and, when a
+--truth JSON ({"file name": "expected label", ...}) is given, against
+those expected labels.
+
+    python benchmarks/classifier_compare.py
+    python benchmarks/classifier_compare.py --truth labels.json --json report.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from backend.core import classification  # noqa: E402
+from backend.core.classification import CANDIDATE_LABELS  # noqa: E402
+from backend.core.embedding_classifier import embedding_classify_batch, label_vectors  # noqa: E402
+from backend.core.shared import run_ocr, detect_objects_on_image  # noqa: E402
+
+BASE_PATH = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_PATH / "test_data" / "data"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+def merged_texts(paths):
+    texts = {}
+    for path in paths:
+        text = run_ocr(str(path))
+        objects = detect_objects_on_image(str(path))
+        texts[path.name] = f"{text}\n{objects}"
+    return texts
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def summarize(latencies):
+    return {
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "median_ms": round(statistics.median(latencies), 1),
+        "max_ms": round(max(latencies), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare NLI and embedding classification")
+    parser.add_argument("--data", type=Path, default=DATA_DIR)
+    parser.add_argument("--truth", type=Path, help="JSON mapping file name -> expected label")
+    parser.add_argument("--json", type=Path, help="write the full report to this file")
+    args = parser.parse_args()
+
+    paths = sorted(p for p in args.data.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    truth = json.loads(args.truth.read_text()) if args.truth else {}
+
+    print(f"Preparing merged text for {len(paths)} images (OCR + YOLO)...")
+    texts = merged_texts(paths)
+
+    # Warm both engines so the first file doesn't pay model loading
+    label_vectors(CANDIDATE_LABELS)
+    classification.classify_batch(["warm up"], mode="nli")
+    embedding_classify_batch(["warm up"], CANDIDATE_LABELS)
+
+    rows = []
+    for name, text in texts.items():
+        nli, nli_ms = timed(classification.classify_batch, [text], mode="nli")
+        emb, emb_ms = timed(embedding_classify_batch, [text], CANDIDATE_LABELS)
+        fb, fb_ms = timed(classification.classify_batch, [text], mode="embedding")
+
+        rows.append({
+            "file": name,
+            "expected": truth.get(name),
+            "nli": {"label": nli[0]["labels"][0], "ms": round(nli_ms, 1)},
+            "embedding": {"label": emb[0]["labels"][0], "ms": round(emb_ms, 1),
+                          "margin": round(emb[0]["margin"], 4)},
+            "embedding_fallback": {"label": fb[0]["labels"][0], "ms": round(fb_ms, 1),
+                                   "engine": fb[0]["engine"]},
+        })
+
+    report = {"files": len(rows), "engines": {}, "rows": rows}
+
+    for engine in ("nli", "embedding", "embedding_fallback"):
+        summary = summarize([r[engine]["ms"] for r in rows])
+        if engine != "nli":
+            agree = sum(r[engine]["label"] == r["nli"]["label"] for r in rows)
+            summary["agreement_with_nli"] = round(agree / len(rows), 3)
+        labelled = [r for r in rows if r["expected"]]
+        if labelled:
+            correct = sum(r[engine]["label"] == r["expected"] for r in labelled)
+            summary["accuracy"] = round(correct / len(labelled), 3)
+        report["engines"][engine] = summary
+
+    fallbacks = sum(r["embedding_fallback"]["engine"] == "nli-fallback" for r in rows)
+    report["engines"]["embedding_fallback"]["fallback_rate"] = round(fallbacks / len(rows), 3)
+
+    print(f"\n{'file':<32} {'nli':>8} {'emb':>8} {'emb+fb':>8}  agree")
+    for r in rows:
+        agree = "✓" if r["embedding"]["label"] == r["nli"]["label"] else "✗"
+        print(f"{r['file'][:32]:<32} {r['nli']['ms']:>7.0f}ms {r['embedding']['ms']:>6.0f}ms "
+              f"{r['embedding_fallback']['ms']:>6.0f}ms  {agree}")
+
+    print()
+    for engine, summary in report["engines"].items():
+        print(f"{engine:<20} {summary}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
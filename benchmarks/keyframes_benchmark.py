@@ -0,0 +1,151 @@
+"""
+Keyframe extraction benchmark.
+
+Compares the original full-resolution SSIM loop ("legacy") with the
+keyframe engine in "compat" and "fast" modes: wall time, frames per
+second and how closely each keyframe set matches the legacy one.
+
+    python benchmarks/keyframes_benchmark.py
+    python benchmarks/keyframes_benchmark.py path/to/video.mp4 --tolerance 5 --json out.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import cv2
+from skimage.metrics import structural_similarity as ssim
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from backend.core.keyframes import KeyframeExtractor, iter_decoded_frames  # noqa: E402
+
+BASE_PATH = Path(__file__).resolve().parents[1]
+DEFAULT_VIDEOS = sorted((BASE_PATH / "test_data" / "data").glob("*.mp4"))
+
+
+# =========================================================
+# Reference: the original extract_keyframes loop
+# =========================================================
+def legacy_keyframe_indices(video_path):
+    cap = cv2.VideoCapture(str(video_path))
+    ret, prev = cap.read()
+    if not ret:
+        return []
+
+    prev_gray = cv2.cvtColor(prev, cv2.COLOR_BGR2GRAY)
+    last_saved = None
+    indices = []
+    idx = 0
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        idx += 1
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        sim = ssim(prev_gray, gray)
+        blur = cv2.Laplacian(gray, cv2.CV_64F).var()
+        motion = cv2.absdiff(prev_gray, gray).mean()
+
+        if sim < 0.90 and blur > 120 and motion > 2.0:
+            if last_saved is None or ssim(last_saved, gray) < 0.95:
+                indices.append(idx)
+                last_saved = gray
+
+        prev_gray = gray
+
+    cap.release()
+    return indices
+
+
+def engine_keyframe_indices(video_path, mode):
+    extractor = KeyframeExtractor(mode=mode)
+    keyframes = extractor.iter_keyframes(iter_decoded_frames(str(video_path)))
+    return [k.index for k in keyframes], extractor.stats
+
+
+# =========================================================
+# Comparison
+# =========================================================
+def match_rate(reference, candidate, tolerance):
+    """
+    Fraction of reference keyframes with a candidate keyframe
+    within `tolerance` frames.
+    """
+    if not reference:
+        return 1.0 if not candidate else 0.0
+    hits = sum(1 for r in reference if any(abs(r - c) <= tolerance for c in candidate))
+    return hits / len(reference)
+
+
+def frame_count(video_path):
+    cap = cv2.VideoCapture(str(video_path))
+    count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return count
+
+
+def benchmark_video(video_path, tolerance):
+    frames = frame_count(video_path)
+    report = {"video": str(video_path), "frames": frames, "modes": {}}
+
+    start = time.perf_counter()
+    legacy = legacy_keyframe_indices(video_path)
+    elapsed = time.perf_counter() - start
+    report["modes"]["legacy"] = {
+        "seconds": round(elapsed, 3),
+        "fps": round(frames / elapsed, 1) if elapsed else None,
+        "keyframes": legacy,
+    }
+
+    for mode in ("compat", "fast"):
+        start = time.perf_counter()
+        indices, stats = engine_keyframe_indices(video_path, mode)
+        elapsed = time.perf_counter() - start
+        report["modes"][mode] = {
+            "seconds": round(elapsed, 3),
+            "fps": round(frames / elapsed, 1) if elapsed else None,
+            "speedup_vs_legacy": round(report["modes"]["legacy"]["seconds"] / elapsed, 2) if elapsed else None,
+            "keyframes": indices,
+            "identical_to_legacy": indices == legacy,
+            "recall_vs_legacy": round(match_rate(legacy, indices, tolerance), 3),
+            "precision_vs_legacy": round(match_rate(indices, legacy, tolerance), 3),
+            "stats": stats,
+        }
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyframe extraction modes")
+    parser.add_argument("videos", nargs="*", type=Path, default=DEFAULT_VIDEOS)
+    parser.add_argument("--tolerance", type=int, default=3,
+                        help="frames of slack when matching keyframes against legacy")
+    parser.add_argument("--json", type=Path, help="write the full report to this file")
+    args = parser.parse_args()
+
+    reports = []
+    for video in args.videos:
+        print(f"\n🎥 {video.name}")
+        report = benchmark_video(video, args.tolerance)
+        reports.append(report)
+
+        for mode, r in report["modes"].items():
+            line = f"  {mode:<7} {r['seconds']:>8.2f}s {str(r['fps']):>8} fps  {len(r['keyframes']):>4} keyframes"
+            if mode != "legacy":
+                line += (f"  x{r['speedup_vs_legacy']}  identical={r['identical_to_legacy']}"
+                         f"  recall={r['recall_vs_legacy']}  precision={r['precision_vs_legacy']}")
+            print(line)
+
+    if args.json:
+        args.json.write_text(json.dumps(reports, indent=2))
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+OCR backend benchmark.
+
+Runs every available OCR backend (pytesseract, tesserocr) over the
+images in test_data/data, first one image at a time and then spread
+over N concurrent workers, and reports per-image latency, total time,
+speedup over sequential pytesseract and text similarity to it.
+
+    python benchmarks/ocr_benchmark.py
+    python benchmarks/ocr_benchmark.py --workers 4 --json ocr_report.json
+"""
+
+import argparse
+import difflib
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from backend.core.ocr import BACKENDS  # noqa: E402
+
+BASE_PATH = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_PATH / "test_data" / "data"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, " ".join(a.split()), " ".join(b.split())).ratio()
+
+
+def run_sequential(backend, images):
+    texts = []
+    latencies = []
+    start = time.perf_counter()
+
+    for image in images:
+        t0 = time.perf_counter()
+        texts.append(backend.image_to_string(image))
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    return texts, latencies, time.perf_counter() - start
+
+
+def run_concurrent(backend, images):
+    start = time.perf_counter()
+    texts = backend.map(images)
+    return texts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare OCR backends")
+    parser.add_argument("--data", type=Path, default=DATA_DIR)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--json", type=Path, help="write the full report to this file")
+    args = parser.parse_args()
+
+    paths = sorted(p for p in args.data.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    images = [Image.open(p).convert("RGB") for p in paths]
+    print(f"{len(images)} images, {args.workers} concurrent workers\n")
+
+    report = {"images": len(images), "workers": args.workers, "backends": {}}
+    reference = None
+    baseline_s = None
+
+    for name, cls in BACKENDS.items():
+        try:
+            backend = cls(workers=args.workers)
+        except RuntimeError as e:
+            print(f"{name:<12} skipped: {e}")
+            continue
+
+        # First call pays model loading (tesserocr) / process startup
+        backend.image_to_string(images[0])
+
+        texts, latencies, seq_s = run_sequential(backend, images)
+        conc_texts, conc_s = run_concurrent(backend, images)
+        backend.close()
+
+        if reference is None:
+            reference, baseline_s = texts, seq_s
+
+        sims = [similarity(r, t) for r, t in zip(reference, texts)]
+        summary = {
+            "mean_ms": round(statistics.mean(latencies), 1),
+            "median_ms": round(statistics.median(latencies), 1),
+            "max_ms": round(max(latencies), 1),
+            "sequential_s": round(seq_s, 2),
+            "concurrent_s": round(conc_s, 2),
+            "speedup_sequential": round(baseline_s / seq_s, 2),
+            "speedup_concurrent": round(baseline_s / conc_s, 2),
+            "text_similarity": round(statistics.mean(sims), 3),
+            "concurrent_matches_sequential": conc_texts == texts,
+        }
+        report["backends"][name] = summary
+
+        print(f"{name:<12} {summary['mean_ms']:>7.0f}ms/img  "
+              f"seq {seq_s:>6.2f}s  x{args.workers} {conc_s:>6.2f}s  "
+              f"speedup {summary['speedup_concurrent']:>5.2f}x  "
+              f"similarity {summary['text_similarity']:.3f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Parity and latency of the ONNX Runtime backend against torch.
+
+Runs BART-MNLI and every YOLO checkpoint on both backends over
+test_data/data and checks that the ONNX outputs match the torch ones:
+
+    bart   same top label and per-label scores within --score-atol
+    yolo   every detection matched by one of the same class with
+           IoU >= --min-iou and confidence within --conf-atol
+
+Graphs are exported to backend/models/onnx on the first run. Session
+settings come from ONNX_GRAPH_OPT / ONNX_INTRA_OP_THREADS /
+ONNX_INTER_OP_THREADS. Exits with status 1 when a check fails.
+
+    python benchmarks/onnx_parity.py
+    ONNX_GRAPH_OPT=basic python benchmarks/onnx_parity.py --json parity.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from backend.core import model_manager  # noqa: E402
+from backend.core.classification import CANDIDATE_LABELS  # noqa: E402
+from backend.core.config import YOLO_CONF, YOLO_IMGSZ  # noqa: E402
+from backend.core.detection import _iou, preprocess_batch  # noqa: E402
+from backend.core.shared import run_ocr  # noqa: E402
+
+BASE_PATH = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_PATH / "test_data" / "data"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def latency_summary(torch_ms, onnx_ms):
+    return {
+        "torch_mean_ms": round(statistics.mean(torch_ms), 1),
+        "onnx_mean_ms": round(statistics.mean(onnx_ms), 1),
+        "speedup": round(statistics.mean(torch_ms) / statistics.mean(onnx_ms), 2),
+    }
+
+
+def compare_bart(texts, score_atol):
+    reference = model_manager.get_classifier("fp32", backend="torch")
+    candidate = model_manager.get_classifier(backend="onnx")
+
+    torch_ms, onnx_ms = [], []
+    top_matches, max_diff = 0, 0.0
+
+    for text in texts:
+        expected, ms = timed(reference, text, candidate_labels=CANDIDATE_LABELS)
+        torch_ms.append(ms)
+        actual, ms = timed(candidate, text, candidate_labels=CANDIDATE_LABELS)
+        onnx_ms.append(ms)
+
+        top_matches += expected["labels"][0] == actual["labels"][0]
+        expected_scores = dict(zip(expected["labels"], expected["scores"]))
+        actual_scores = dict(zip(actual["labels"], actual["scores"]))
+        max_diff = max(max_diff, max(abs(expected_scores[lb] - actual_scores[lb]) for lb in CANDIDATE_LABELS))
+
+    summary = {
+        "texts": len(texts),
+        "top_label_matches": top_matches,
+        "max_score_diff": round(max_diff, 6),
+        **latency_summary(torch_ms, onnx_ms),
+    }
+    summary["passed"] = top_matches == len(texts) and max_diff <= score_atol
+    return summary
+
+
+def _detections(result):
+    if result.boxes is None:
+        return []
+    return [
+        (result.names[int(c)], [float(v) for v in box], float(conf))
+        for box, conf, c in zip(result.boxes.xyxy.cpu().numpy(),
+                                result.boxes.conf.cpu().numpy(),
+                                result.boxes.cls.cpu().numpy())
+    ]
+
+
+def match_detections(expected, actual, min_iou):
+    """
+    Greedily pairs detections of the same label by IoU. Returns
+    (unmatched count, max confidence diff, min IoU of the pairs).
+    """
+    remaining = list(actual)
+    unmatched, conf_diff, worst_iou = 0, 0.0, 1.0
+
+    for label, box, conf in expected:
+        candidates = [(i, _iou(box, b)) for i, (lb, b, _) in enumerate(remaining) if lb == label]
+        best = max(candidates, key=lambda c: c[1], default=None)
+        if best is None or best[1] < min_iou:
+            unmatched += 1
+            continue
+
+        _, _, other_conf = remaining.pop(best[0])
+        conf_diff = max(conf_diff, abs(conf - other_conf))
+        worst_iou = min(worst_iou, best[1])
+
+    return unmatched + len(remaining), conf_diff, worst_iou
+
+
+def compare_yolo(name, tensors, min_iou, conf_atol):
+    reference = model_manager.get_yolo(name, "fp32", backend="torch")
+    candidate = model_manager.get_yolo(name, backend="onnx")
+
+    torch_ms, onnx_ms = [], []
+    unmatched, conf_diff, worst_iou, total = 0, 0.0, 1.0, 0
+
+    for tensor in tensors:
+        expected, ms = timed(reference.predict, tensor, conf=YOLO_CONF, imgsz=YOLO_IMGSZ, verbose=False)
+        torch_ms.append(ms)
+        actual, ms = timed(candidate.predict, tensor, conf=YOLO_CONF, imgsz=YOLO_IMGSZ, verbose=False)
+        onnx_ms.append(ms)
+
+        expected, actual = _detections(expected[0]), _detections(actual[0])
+        total += len(expected)
+        missing, diff, iou = match_detections(expected, actual, min_iou)
+        unmatched += missing
+        conf_diff = max(conf_diff, diff)
+        worst_iou = min(worst_iou, iou)
+
+    summary = {
+        "detections": total,
+        "unmatched": unmatched,
+        "max_conf_diff": round(conf_diff, 6),
+        "min_iou": round(worst_iou, 4),
+        **latency_summary(torch_ms, onnx_ms),
+    }
+    summary["passed"] = unmatched == 0 and conf_diff <= conf_atol
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check ONNX Runtime outputs against torch")
+    parser.add_argument("--data", type=Path, default=DATA_DIR)
+    parser.add_argument("--score-atol", type=float, default=1e-3)
+    parser.add_argument("--conf-atol", type=float, default=1e-2)
+    parser.add_argument("--min-iou", type=float, default=0.95)
+    parser.add_argument("--json", type=Path, help="write the full report to this file")
+    args = parser.parse_args()
+
+    paths = sorted(p for p in args.data.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    tensors = [preprocess_batch([cv2.imread(str(p))], YOLO_IMGSZ)[0] for p in paths]
+    texts = [t for t in (run_ocr(str(p)).strip() for p in paths) if t]
+    print(f"{len(paths)} images, {len(texts)} with text\n")
+
+    report = {"images": len(paths), "bart": None, "yolo": {}}
+
+    if texts:
+        report["bart"] = compare_bart(texts, args.score_atol)
+        model_manager.registry.unload("bart")
+        model_manager.registry.unload("bart:onnx")
+        bart = report["bart"]
+        print(f"{'bart':<18} {'ok' if bart['passed'] else 'FAIL':<4}  "
+              f"top label {bart['top_label_matches']}/{bart['texts']}  "
+              f"max score diff {bart['max_score_diff']:.2e}  speedup {bart['speedup']:.2f}x")
+
+    for name in model_manager.YOLO_MODEL_FILES:
+        summary = compare_yolo(name, tensors, args.min_iou, args.conf_atol)
+        report["yolo"][name] = summary
+        model_manager.registry.unload(name)
+        model_manager.registry.unload(f"{name}:onnx")
+        print(f"{name:<18} {'ok' if summary['passed'] else 'FAIL':<4}  "
+              f"unmatched {summary['unmatched']}/{summary['detections']}  "
+              f"max conf diff {summary['max_conf_diff']:.2e}  min IoU {summary['min_iou']:.3f}  "
+              f"speedup {summary['speedup']:.2f}x")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.json}")
+
+    checks = ([report["bart"]] if report["bart"] else []) + list(report["yolo"].values())
+    sys.exit(0 if all(c["passed"] for c in checks) else 1)
+
+
+if __name__ == "__main__":
+    main()
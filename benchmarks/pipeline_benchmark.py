@@ -0,0 +1,377 @@
+"""
+End-to-end pipeline benchmark.
+
+Drives run_image_pipeline / run_video_pipeline over the files in
+test_data/data (optionally over synthetic copies: --copies N repeats
+the corpus, --upscale F resizes every image and video by F) and
+records per file the wall time, the time spent in each stage
+(keyframes, ocr, pii, detection, collage, caption, classify), the
+process RSS and the top label. The summary adds per-stage totals and
+percentiles, latency per file type, throughput and peak RSS.
+
+Reports are JSON. With --baseline, the run is diffed against a stored
+report: stage / latency / throughput / RSS changes in percent, plus
+files whose top label changed. test_data/results holds the reference
+reports as PDFs, so label changes are tracked against the baseline.
+
+    python benchmarks/pipeline_benchmark.py --json baseline.json
+    python benchmarks/pipeline_benchmark.py --baseline baseline.json --max-regression 10
+    python benchmarks/pipeline_benchmark.py --copies 4 --upscale 2 --concurrency 4 --json scaled.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from backend.core import config  # noqa: E402
+from backend.core.batch_pipeline import file_type_for  # noqa: E402
+from backend.core.image_pipeline import run_image_pipeline  # noqa: E402
+from backend.core.metrics import collect_stage_timings  # noqa: E402
+from backend.core.model_manager import _process_rss_mb  # noqa: E402
+from backend.core.result_cache import RESULT_SETTINGS  # noqa: E402
+from backend.core.video_pipeline import run_video_pipeline  # noqa: E402
+
+BASE_PATH = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_PATH / "test_data" / "data"
+
+# Baseline diff: metric -> True when higher is better
+DIFF_METRICS = {
+    "files_per_second": True,
+    "mb_per_second": True,
+    "peak_rss_mb": False,
+}
+
+
+# =========================================================
+# Corpus
+# =========================================================
+def _scale_video(src, dest, factor):
+    cap = cv2.VideoCapture(str(src))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    writer = None
+
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frame = cv2.resize(frame, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+        if writer is None:
+            h, w = frame.shape[:2]
+            writer = cv2.VideoWriter(str(dest), cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+        writer.write(frame)
+
+    cap.release()
+    if writer is not None:
+        writer.release()
+
+
+def build_corpus(data_dir, work_dir, copies=1, upscale=1.0):
+    """
+    Returns [(name, path, file_type)]. Without synthetic options the
+    original files are used in place.
+    """
+    sources = sorted(p for p in Path(data_dir).iterdir() if p.is_file() and file_type_for(p))
+    if copies <= 1 and upscale == 1.0:
+        return [(p.name, p, file_type_for(p)) for p in sources]
+
+    corpus = []
+    for copy in range(copies):
+        copy_dir = Path(work_dir) / f"copy{copy}"
+        copy_dir.mkdir(parents=True, exist_ok=True)
+
+        for src in sources:
+            dest = copy_dir / src.name
+            file_type = file_type_for(src)
+
+            if upscale == 1.0:
+                shutil.copyfile(src, dest)
+            elif file_type == "image":
+                image = cv2.imread(str(src))
+                cv2.imwrite(str(dest), cv2.resize(image, None, fx=upscale, fy=upscale, interpolation=cv2.INTER_CUBIC))
+            else:
+                dest = dest.with_suffix(".mp4")
+                _scale_video(src, dest, upscale)
+
+            corpus.append((f"copy{copy}/{src.name}", dest, file_type))
+
+    return corpus
+
+
+# =========================================================
+# Measurement
+# =========================================================
+class RssSampler:
+    """
+    Samples the process RSS in a background thread and keeps the peak.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_mb = _process_rss_mb() or 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, _process_rss_mb() or 0.0)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, _process_rss_mb() or 0.0)
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def distribution(values):
+    return {
+        "total_s": round(sum(values), 4),
+        "mean_s": round(statistics.mean(values), 4),
+        "p50_s": round(percentile(values, 50), 4),
+        "p95_s": round(percentile(values, 95), 4),
+        "max_s": round(max(values), 4),
+    }
+
+
+async def run_file(name, path, file_type, options):
+    with collect_stage_timings() as timings:
+        start = time.perf_counter()
+        try:
+            if file_type == "video":
+                data = await run_video_pipeline(str(path), **options)
+            else:
+                data = await run_image_pipeline(
+                    str(path),
+                    **{k: v for k, v in options.items() if k != "segment_seconds"}
+                )
+            error = None
+        except Exception as e:
+            data, error = {}, str(e)
+        wall = time.perf_counter() - start
+
+    entry = {
+        "file": name,
+        "type": file_type,
+        "bytes": Path(path).stat().st_size,
+        "wall_s": round(wall, 4),
+        "stages": timings.as_dict(),
+        "rss_mb": _process_rss_mb(),
+        "label": (data.get("labels") or [None])[0],
+    }
+    if error:
+        entry["error"] = error
+    return entry
+
+
+async def run_corpus(corpus, options, concurrency):
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def limited(item):
+        async with semaphore:
+            entry = await run_file(*item, options)
+            status = "ERROR " + entry["error"] if "error" in entry else entry["label"]
+            print(f"{entry['file']:<40} {entry['wall_s']:>8.2f}s  {status}")
+            return entry
+
+    return await asyncio.gather(*[limited(item) for item in corpus])
+
+
+def summarize(entries, elapsed, peak_rss_mb):
+    done = [e for e in entries if "error" not in e]
+    summary = {
+        "files": len(entries),
+        "errors": len(entries) - len(done),
+        "elapsed_s": round(elapsed, 3),
+        "files_per_second": round(len(done) / elapsed, 4) if elapsed else None,
+        "mb_per_second": round(sum(e["bytes"] for e in done) / 1024 ** 2 / elapsed, 4) if elapsed else None,
+        "peak_rss_mb": round(peak_rss_mb, 1),
+        "latency": {},
+        "stages": {},
+    }
+
+    for file_type in ("image", "video"):
+        walls = [e["wall_s"] for e in done if e["type"] == file_type]
+        if walls:
+            summary["latency"][file_type] = distribution(walls)
+
+    stage_names = sorted({s for e in done for s in e["stages"]})
+    stage_total = sum(e["stages"][s]["seconds"] for e in done for s in e["stages"]) or 1.0
+    for stage_name in stage_names:
+        seconds = [e["stages"][stage_name]["seconds"] for e in done if stage_name in e["stages"]]
+        summary["stages"][stage_name] = dict(distribution(seconds), share=round(sum(seconds) / stage_total, 4))
+
+    return summary
+
+
+def metadata(args):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_PATH, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        "commit": commit,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "inference_threads": config.INFERENCE_THREADS,
+        "settings": {name: getattr(config, name) for name in RESULT_SETTINGS},
+        "args": {k: str(v) for k, v in vars(args).items()},
+    }
+
+
+# =========================================================
+# Baseline diff
+# =========================================================
+def _change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return round((new - old) / old * 100, 1)
+
+
+def diff_reports(baseline, report):
+    """
+    Percent change per metric (positive = slower / bigger, except for
+    throughput where positive = faster) and top-label changes.
+    """
+    old, new = baseline["summary"], report["summary"]
+    rows = []
+
+    for metric, higher_is_better in DIFF_METRICS.items():
+        change = _change(old.get(metric), new.get(metric))
+        regression = change is not None and (-change if higher_is_better else change)
+        rows.append({"metric": metric, "baseline": old.get(metric), "current": new.get(metric),
+                     "change_pct": change, "regression_pct": regression})
+
+    for group in ("latency", "stages"):
+        for name in sorted(set(old.get(group, {})) | set(new.get(group, {}))):
+            before = old.get(group, {}).get(name, {}).get("mean_s")
+            after = new.get(group, {}).get(name, {}).get("mean_s")
+            change = _change(before, after)
+            rows.append({"metric": f"{group}.{name}.mean_s", "baseline": before, "current": after,
+                         "change_pct": change, "regression_pct": change})
+
+    old_labels = {e["file"]: e.get("label") for e in baseline["files"]}
+    label_changes = [
+        {"file": e["file"], "baseline": old_labels[e["file"]], "current": e.get("label")}
+        for e in report["files"]
+        if e["file"] in old_labels and old_labels[e["file"]] != e.get("label")
+    ]
+
+    return {"baseline_commit": baseline.get("meta", {}).get("commit"), "metrics": rows, "label_changes": label_changes}
+
+
+def print_diff(diff):
+    print(f"\nDiff against baseline ({diff['baseline_commit']}):")
+    for row in diff["metrics"]:
+        change = "n/a" if row["change_pct"] is None else f"{row['change_pct']:+.1f}%"
+        print(f"  {row['metric']:<36} {str(row['baseline']):>12} -> {str(row['current']):>12}  {change}")
+    for change in diff["label_changes"]:
+        print(f"  label changed: {change['file']}: {change['baseline']} -> {change['current']}")
+
+
+# =========================================================
+# Main
+# =========================================================
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the image / video pipelines end to end")
+    parser.add_argument("--data", type=Path, default=DATA_DIR)
+    parser.add_argument("--copies", type=int, default=1, help="repeat the corpus N times (synthetic copies)")
+    parser.add_argument("--upscale", type=float, default=1.0, help="resize images and videos by this factor")
+    parser.add_argument("--concurrency", type=int, default=1, help="files analyzed at the same time")
+    parser.add_argument("--caption", action="store_true", help="enable captioning")
+    parser.add_argument("--caption-tier", default=None)
+    parser.add_argument("--classifier-mode", default=None)
+    parser.add_argument("--segment-seconds", type=float, default=config.VIDEO_SEGMENT_SECONDS)
+    parser.add_argument("--no-warmup", action="store_true", help="include model loading in the first file")
+    parser.add_argument("--json", type=Path, help="write the report to this file")
+    parser.add_argument("--baseline", type=Path, help="report to diff against")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="exit with status 1 when a metric regresses by more than this many percent")
+    args = parser.parse_args()
+
+    options = {
+        "enable_caption": args.caption,
+        "classifier_mode": args.classifier_mode,
+        "caption_tier": args.caption_tier,
+        "segment_seconds": args.segment_seconds,
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        corpus = build_corpus(args.data, work_dir, args.copies, args.upscale)
+        print(f"{len(corpus)} files, concurrency {args.concurrency}\n")
+
+        report = {"meta": metadata(args)}
+
+        if not args.no_warmup:
+            # Loads every model the run needs, so file timings exclude loading
+            start = time.perf_counter()
+            for file_type in ("image", "video"):
+                first = next((item for item in corpus if item[2] == file_type), None)
+                if first:
+                    asyncio.run(run_file(*first, options))
+            report["meta"]["warmup_s"] = round(time.perf_counter() - start, 2)
+            print(f"Warm-up: {report['meta']['warmup_s']:.1f}s\n")
+
+        with RssSampler() as rss:
+            start = time.perf_counter()
+            entries = asyncio.run(run_corpus(corpus, options, args.concurrency))
+            elapsed = time.perf_counter() - start
+
+    report["summary"] = summarize(entries, elapsed, rss.peak_mb)
+    report["files"] = entries
+
+    summary = report["summary"]
+    print(f"\n{summary['files']} files in {summary['elapsed_s']:.1f}s  "
+          f"({summary['files_per_second']} files/s, {summary['mb_per_second']} MB/s), "
+          f"peak RSS {summary['peak_rss_mb']:.0f} MB, {summary['errors']} errors")
+    for stage_name, stats in summary["stages"].items():
+        print(f"  {stage_name:<10} total {stats['total_s']:>8.2f}s  mean {stats['mean_s']:>7.3f}s  "
+              f"p95 {stats['p95_s']:>7.3f}s  {stats['share'] * 100:>5.1f}%")
+
+    failed = False
+    if args.baseline:
+        diff = diff_reports(json.loads(args.baseline.read_text()), report)
+        report["diff"] = diff
+        print_diff(diff)
+
+        if args.max_regression is not None:
+            worst = [r for r in diff["metrics"] if r["regression_pct"] and r["regression_pct"] > args.max_regression]
+            for row in worst:
+                print(f"REGRESSION {row['metric']}: {row['change_pct']:+.1f}%")
+            failed = bool(worst)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, default=str))
+        print(f"\nReport written to {args.json}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
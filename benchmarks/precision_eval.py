@@ -0,0 +1,176 @@
+"""
+Latency / memory / agreement of reduced-precision model variants.
+
+For every precision (fp32, bf16, int8) loads BART-MNLI, the YOLO
+ensemble and (with --caption) BLIP2 through model_manager, runs them
+over test_data/data and reports load time, RSS growth, mean latency
+and agreement with fp32:
+
+    bart   top-label agreement on the merged OCR + objects text
+    yolo   mean Jaccard similarity of the detected label sets
+    blip2  mean caption text similarity
+
+The first run of bf16 / int8 converts the fp32 weights and caches them
+under backend/models/precision; later loads read the cache.
+
+    python benchmarks/precision_eval.py
+    python benchmarks/precision_eval.py --precisions fp32,int8 --caption --json precision.json
+"""
+
+import argparse
+import difflib
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+from backend.core import model_manager  # noqa: E402
+from backend.core.classification import _nli_classify_batch  # noqa: E402
+from backend.core.detection import YoloEnsemble, detection_labels  # noqa: E402
+from backend.core.shared import run_ocr  # noqa: E402
+
+BASE_PATH = Path(__file__).resolve().parents[1]
+DATA_DIR = BASE_PATH / "test_data" / "data"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+
+
+def rss_mb():
+    return model_manager._process_rss_mb() or 0.0
+
+
+def unload_all():
+    for name in list(model_manager.registry.stats()["models"]):
+        model_manager.registry.unload(name)
+    gc.collect()
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000.0
+
+
+def jaccard(a, b):
+    a, b = set(a), set(b)
+    return 1.0 if not a and not b else len(a & b) / len(a | b)
+
+
+def caption(image_path, precision):
+    from PIL import Image
+
+    processor, model = model_manager.get_blip(precision)
+    inputs = processor(images=Image.open(image_path).convert("RGB"), return_tensors="pt").to(dtype=model.dtype)
+    ids = model.generate(**inputs, max_new_tokens=50)
+    return processor.decode(ids[0], skip_special_tokens=True)
+
+
+def evaluate(family, precision, paths, images, texts):
+    """
+    Returns ({"load_s", "rss_mb", "mean_ms"}, outputs per file).
+    """
+    unload_all()
+    before = rss_mb()
+    start = time.perf_counter()
+
+    if family == "bart":
+        model_manager.get_classifier(precision)
+    elif family == "yolo":
+        ensemble = YoloEnsemble(precision=precision)
+        model_manager.load_yolo_models(precision)
+    else:
+        model_manager.get_blip(precision)
+
+    load_s = time.perf_counter() - start
+    loaded_rss = rss_mb() - before
+
+    outputs, latencies = [], []
+    for path, image, text in zip(paths, images, texts):
+        if family == "bart":
+            result, ms = timed(_nli_classify_batch, [text], precision=precision)
+            outputs.append(result[0]["labels"][0])
+        elif family == "yolo":
+            result, ms = timed(ensemble.detect_batch, [image])
+            outputs.append(detection_labels(result[0]))
+        else:
+            result, ms = timed(caption, str(path), precision)
+            outputs.append(result)
+        latencies.append(ms)
+
+    return {
+        "load_s": round(load_s, 2),
+        "rss_mb": round(loaded_rss, 1),
+        "mean_ms": round(statistics.mean(latencies), 1),
+        "median_ms": round(statistics.median(latencies), 1),
+    }, outputs
+
+
+def agreement(family, reference, outputs):
+    if family == "bart":
+        return sum(r == o for r, o in zip(reference, outputs)) / len(outputs)
+    if family == "yolo":
+        return statistics.mean(jaccard(r, o) for r, o in zip(reference, outputs))
+    return statistics.mean(difflib.SequenceMatcher(None, r, o).ratio() for r, o in zip(reference, outputs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 / bf16 / int8 model variants")
+    parser.add_argument("--data", type=Path, default=DATA_DIR)
+    parser.add_argument("--precisions", default="fp32,bf16,int8")
+    parser.add_argument("--caption", action="store_true", help="also evaluate BLIP2 (slow)")
+    parser.add_argument("--json", type=Path, help="write the full report to this file")
+    args = parser.parse_args()
+
+    precisions = [p.strip() for p in args.precisions.split(",") if p.strip()]
+    if "fp32" not in precisions:
+        precisions.insert(0, "fp32")
+
+    paths = sorted(p for p in args.data.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    images = [cv2.imread(str(p)) for p in paths]
+
+    print(f"Preparing merged text for {len(paths)} images (OCR + fp32 YOLO)...")
+    fp32_labels = YoloEnsemble(precision="fp32").detect_batch(images)
+    texts = [f"{run_ocr(str(p))}\n{detection_labels(d)}" for p, d in zip(paths, fp32_labels)]
+
+    families = ["bart", "yolo"] + (["blip2"] if args.caption else [])
+    report = {"files": len(paths), "families": {}}
+
+    for family in families:
+        report["families"][family] = {}
+        reference = None
+
+        for precision in precisions:
+            try:
+                summary, outputs = evaluate(family, precision, paths, images, texts)
+            except Exception as e:
+                print(f"{family:<6} {precision:<5} failed: {e}")
+                report["families"][family][precision] = {"error": str(e)}
+                continue
+
+            if family == "yolo" and precision == "int8":
+                summary["note"] = "runs as fp32 (dynamic int8 does not cover convolutions)"
+            if precision == "fp32":
+                reference = outputs
+            if reference is not None:
+                summary["agreement_with_fp32"] = round(agreement(family, reference, outputs), 3)
+
+            report["families"][family][precision] = summary
+            print(f"{family:<6} {precision:<5} load {summary['load_s']:>6.1f}s  "
+                  f"rss +{summary['rss_mb']:>7.0f} MB  {summary['mean_ms']:>7.0f} ms/img  "
+                  f"agreement {summary.get('agreement_with_fp32', '-')}")
+
+    unload_all()
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
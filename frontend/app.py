@@ -373,6 +373,9 @@ with right_col:
         if "caption" in st.session_state.result:
             st.markdown("### 📝 Scene / Context Caption")
             st.write(st.session_state.result["caption"])
+            caption_model = st.session_state.result.get("caption_model")
+            if caption_model:
+                st.caption(f"{caption_model['model']} ({caption_model['tier']} tier, {caption_model['ms']:.0f} ms)")
 
         st.divider()
         st.markdown("### 🔐 Sensitivity Classification")
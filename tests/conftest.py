@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Same import root as backend/main.py and the benchmarks
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
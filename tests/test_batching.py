@@ -0,0 +1,71 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.core.batching import MicroBatcher
+
+
+def test_submit_returns_own_result():
+    batcher = MicroBatcher(lambda items: [i * 2 for i in items], max_batch_size=4, max_wait_ms=5)
+
+    assert batcher.submit(21) == 42
+
+
+def test_concurrent_items_share_a_batch():
+    batches = []
+    release = threading.Event()
+
+    def batch_fn(items):
+        release.wait(5)
+        batches.append(list(items))
+        return [i + 100 for i in items]
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=200)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(batcher.submit, i) for i in range(4)]
+        time.sleep(0.05)
+        release.set()
+        results = [f.result(5) for f in futures]
+
+    assert results == [100, 101, 102, 103]
+    assert sorted(i for batch in batches for i in batch) == [0, 1, 2, 3]
+    assert len(batches) < 4
+
+
+def test_batch_is_capped_at_max_batch_size():
+    sizes = []
+
+    def batch_fn(items):
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=3, max_wait_ms=50)
+    futures = [batcher.submit_async(i) for i in range(7)]
+
+    assert [f.result(5) for f in futures] == list(range(7))
+    assert max(sizes) <= 3
+
+
+def test_batch_error_reaches_every_caller_and_worker_survives():
+    calls = []
+
+    def batch_fn(items):
+        calls.append(items)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return items
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        batcher.submit("a")
+    assert batcher.submit("b") == "b"
+
+
+def test_result_count_mismatch_is_an_error():
+    batcher = MicroBatcher(lambda items: [], max_batch_size=2, max_wait_ms=1, name="short")
+
+    with pytest.raises(RuntimeError, match="short: batch_fn returned 0 results for 1 items"):
+        batcher.submit(1)
@@ -0,0 +1,81 @@
+import re
+
+import pytest
+
+from backend.core.classification import CANDIDATE_LABELS, aggregate_results, split_windows
+
+
+class WhitespaceTokenizer:
+    """
+    One token per whitespace-separated word, with character offsets
+    (the subset of a fast tokenizer split_windows uses).
+    """
+
+    def __call__(self, text, **kwargs):
+        return {"offset_mapping": [m.span() for m in re.finditer(r"\S+", text)]}
+
+
+def words(n):
+    return " ".join(f"w{i}" for i in range(n))
+
+
+def test_short_text_is_one_window():
+    text = words(5)
+
+    assert split_windows(text, WhitespaceTokenizer(), window_tokens=5, overlap=1) == [text]
+
+
+def test_windows_overlap_and_cover_the_text():
+    text = words(10)
+
+    windows = split_windows(text, WhitespaceTokenizer(), window_tokens=4, overlap=1)
+
+    assert windows == [
+        "w0 w1 w2 w3",
+        "w3 w4 w5 w6",
+        "w6 w7 w8 w9",
+    ]
+
+
+def test_windows_are_slices_of_the_original_text():
+    text = "alpha  beta\n\tgamma delta   epsilon"
+
+    windows = split_windows(text, WhitespaceTokenizer(), window_tokens=2, overlap=0)
+
+    assert windows == ["alpha  beta", "gamma delta", "epsilon"]
+    assert all(w in text for w in windows)
+
+
+def test_overlap_not_below_window_still_advances():
+    windows = split_windows(words(4), WhitespaceTokenizer(), window_tokens=2, overlap=5)
+
+    assert windows == ["w0 w1", "w1 w2", "w2 w3"]
+
+
+def result(scores):
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    return {"labels": [label for label, _ in ranked], "scores": [score for _, score in ranked]}
+
+
+def test_aggregate_max_takes_each_labels_best_window():
+    a, b = CANDIDATE_LABELS[0], CANDIDATE_LABELS[1]
+
+    labels, scores = aggregate_results([result({a: 0.9, b: 0.1}), result({a: 0.2, b: 0.8})], how="max")
+
+    assert labels == [a, b]
+    assert scores == [0.9, 0.8]
+
+
+def test_aggregate_mean_averages_windows():
+    a, b = CANDIDATE_LABELS[0], CANDIDATE_LABELS[1]
+
+    labels, scores = aggregate_results([result({a: 0.9, b: 0.1}), result({a: 0.2, b: 0.8})], how="mean")
+
+    assert labels == [a, b]
+    assert scores == pytest.approx([0.55, 0.45])
+
+
+def test_aggregate_single_window_is_unchanged():
+    window = result({label: i / 10 for i, label in enumerate(CANDIDATE_LABELS)})
+
+    assert aggregate_results([window]) == (window["labels"], window["scores"])
@@ -0,0 +1,94 @@
+import cv2
+import numpy as np
+from skimage.metrics import structural_similarity as ssim
+
+from backend.core.keyframes import KeyframeExtractor, KeyframeStore
+
+
+def legacy_keyframe_indices(frames):
+    """
+    The original extract_keyframes loop (see
+    benchmarks/keyframes_benchmark.py), over in-memory frames.
+    """
+    prev_gray = cv2.cvtColor(frames[0], cv2.COLOR_BGR2GRAY)
+    last_saved = None
+    indices = []
+
+    for idx, frame in enumerate(frames[1:], start=1):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        sim = ssim(prev_gray, gray)
+        blur = cv2.Laplacian(gray, cv2.CV_64F).var()
+        motion = cv2.absdiff(prev_gray, gray).mean()
+
+        if sim < 0.90 and blur > 120 and motion > 2.0:
+            if last_saved is None or ssim(last_saved, gray) < 0.95:
+                indices.append(idx)
+                last_saved = gray
+
+        prev_gray = gray
+
+    return indices
+
+
+def synthetic_frames(seed=0, height=72, width=96):
+    """
+    Sharp noise "scenes" with near-static stretches, blurred frames,
+    a scene that comes back and a few small shifts.
+    """
+    rng = np.random.default_rng(seed)
+    scenes = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+    frames = []
+
+    for scene in [0, 1, 1, 2, 0, 3, 2]:
+        base = scenes[scene]
+        for i in range(5):
+            noise = rng.integers(-2, 3, base.shape)
+            frames.append(np.clip(base.astype(int) + noise, 0, 255).astype(np.uint8))
+        frames.append(cv2.GaussianBlur(base, (15, 15), 5))
+        frames.append(np.roll(base, 3, axis=1))
+
+    return frames
+
+
+def engine_keyframe_indices(frames, mode):
+    extractor = KeyframeExtractor(mode=mode)
+    keyframes = extractor.iter_keyframes((i, i / 30.0, f) for i, f in enumerate(frames))
+    return [k.index for k in keyframes], extractor.stats
+
+
+def test_compat_mode_matches_the_original_loop():
+    for seed in range(3):
+        frames = synthetic_frames(seed)
+        expected = legacy_keyframe_indices(frames)
+
+        indices, stats = engine_keyframe_indices(frames, "compat")
+
+        assert expected, "fixture should produce keyframes"
+        assert indices == expected
+        assert stats["motion_rejected"] > 0
+        assert stats["blur_rejected"] > 0
+
+
+def test_fast_mode_stats_match_its_keyframes():
+    frames = synthetic_frames()
+
+    indices, stats = engine_keyframe_indices(frames, "fast")
+
+    assert indices == sorted(indices)
+    assert stats["keyframes"] == len(indices)
+    assert stats["frames"] == len(frames)
+
+
+def test_store_spills_past_threshold(tmp_path):
+    frames = synthetic_frames()
+    indices, _ = engine_keyframe_indices(frames, "compat")
+    extractor = KeyframeExtractor(mode="compat")
+    store = KeyframeStore(spill_dir=str(tmp_path), spill_threshold_mb=frames[0].nbytes * 1.5 / 1024 ** 2)
+
+    for keyframe in extractor.iter_keyframes((i, i / 30.0, f) for i, f in enumerate(frames)):
+        store.add(keyframe)
+
+    assert [k.index for k in store] == indices
+    assert store.spilled == len(indices) - 1
+    for keyframe, image in zip(store, store.images()):
+        assert np.array_equal(image, frames[keyframe.index])
@@ -0,0 +1,38 @@
+from backend.core import config
+from backend.core.result_cache import RESULT_SETTINGS, ResultCache
+
+
+def test_key_is_stable_and_ignores_option_order():
+    first = ResultCache.make_key("abc", "image", enable_caption=True, classifier_mode="nli")
+    second = ResultCache.make_key("abc", "image", classifier_mode="nli", enable_caption=True)
+
+    assert first == second
+
+
+def test_key_depends_on_content_type_and_options():
+    base = ResultCache.make_key("abc", "image", enable_caption=False)
+
+    assert ResultCache.make_key("abd", "image", enable_caption=False) != base
+    assert ResultCache.make_key("abc", "video", enable_caption=False) != base
+    assert ResultCache.make_key("abc", "image", enable_caption=True) != base
+
+
+def test_key_depends_on_result_settings(monkeypatch):
+    base = ResultCache.make_key("abc", "image")
+
+    for name in RESULT_SETTINGS:
+        assert hasattr(config, name), name
+
+    monkeypatch.setattr(config, "CLASSIFY_AGGREGATE", "changed-for-test")
+    assert ResultCache.make_key("abc", "image") != base
+
+
+def test_put_get_roundtrip(tmp_path):
+    cache = ResultCache(cache_dir=tmp_path, max_mb=1, ttl_hours=1, enabled=True)
+    key = cache.make_key("abc", "image")
+
+    assert cache.get(key) is None
+    cache.put(key, {"labels": ["x"], "scores": [1.0]})
+
+    assert cache.get(key) == {"labels": ["x"], "scores": [1.0]}
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from backend.core.uploads import (
+    ResumableUploads,
+    UploadConflict,
+    UploadTooLarge,
+    hash_sidecar,
+    resolve_upload,
+)
+
+
+def body(*chunks):
+    async def gen():
+        for chunk in chunks:
+            yield chunk
+    return gen()
+
+
+def append(uploads, upload_id, offset, *chunks):
+    return asyncio.run(uploads.append(upload_id, offset, body(*chunks)))
+
+
+# ==========================================================
+# resolve_upload
+# ==========================================================
+
+def test_resolve_upload_accepts_a_stored_name(tmp_path):
+    assert resolve_upload(tmp_path, "abc_photo.jpg") == (tmp_path / "abc_photo.jpg").resolve()
+
+
+@pytest.mark.parametrize("file_id", [
+    "../secret.txt",
+    "../../etc/passwd",
+    "/etc/passwd",
+    "sub/dir.jpg",
+    ".partial/abc.part",
+    "abc_photo.jpg.sha256",
+    "",
+    ".",
+])
+def test_resolve_upload_rejects_paths_outside_upload_dir(tmp_path, file_id):
+    with pytest.raises(ValueError):
+        resolve_upload(tmp_path, file_id)
+
+
+# ==========================================================
+# Resumable uploads
+# ==========================================================
+
+def test_chunks_resume_at_the_reported_offset(tmp_path):
+    data = b"0123456789" * 10
+    uploads = ResumableUploads(tmp_path, max_bytes=0)
+    upload_id = uploads.create("clip.mp4", len(data))["upload_id"]
+
+    status = append(uploads, upload_id, 0, data[:30], data[30:40])
+    assert status["offset"] == 40
+    assert uploads.status(upload_id)["offset"] == 40
+
+    done = append(uploads, upload_id, 40, data[40:])
+    assert done["complete"] is True
+    assert done["content_hash"] == hashlib.sha256(data).hexdigest()
+
+    stored = tmp_path / done["file_name"]
+    assert stored.read_bytes() == data
+    assert hash_sidecar(stored).read_text() == done["content_hash"]
+
+
+def test_wrong_offset_is_rejected(tmp_path):
+    uploads = ResumableUploads(tmp_path, max_bytes=0)
+    upload_id = uploads.create("a.bin", 10)["upload_id"]
+    append(uploads, upload_id, 0, b"abcd")
+
+    with pytest.raises(UploadConflict):
+        append(uploads, upload_id, 0, b"abcd")
+    with pytest.raises(UploadConflict):
+        append(uploads, upload_id, 6, b"ghij")
+    assert uploads.status(upload_id)["offset"] == 4
+
+
+def test_resume_after_restart_rehashes_the_prefix(tmp_path):
+    data = b"resumable upload payload"
+    upload_id = ResumableUploads(tmp_path, max_bytes=0).create("a.bin", len(data))["upload_id"]
+    append(ResumableUploads(tmp_path, max_bytes=0), upload_id, 0, data[:10])
+
+    restarted = ResumableUploads(tmp_path, max_bytes=0)
+    assert restarted.status(upload_id)["offset"] == 10
+
+    done = append(restarted, upload_id, 10, data[10:])
+    assert done["content_hash"] == hashlib.sha256(data).hexdigest()
+
+
+def test_body_past_announced_size_is_rejected(tmp_path):
+    uploads = ResumableUploads(tmp_path, max_bytes=0)
+    upload_id = uploads.create("a.bin", 4)["upload_id"]
+
+    with pytest.raises(UploadTooLarge):
+        append(uploads, upload_id, 0, b"abcdef")
+
+
+def test_sha256_mismatch_aborts_the_upload(tmp_path):
+    uploads = ResumableUploads(tmp_path, max_bytes=0)
+    upload_id = uploads.create("a.bin", 3, sha256="0" * 64)["upload_id"]
+
+    with pytest.raises(ValueError, match="sha256 mismatch"):
+        append(uploads, upload_id, 0, b"abc")
+    with pytest.raises(KeyError):
+        uploads.status(upload_id)
+
+
+def test_unknown_or_malformed_upload_id(tmp_path):
+    uploads = ResumableUploads(tmp_path, max_bytes=0)
+
+    with pytest.raises(KeyError):
+        uploads.status("0" * 32)
+    with pytest.raises(KeyError):
+        uploads.status("../etc")